@@ -0,0 +1,67 @@
+"""Recall@k vs latency vs memory for the index types in `src/ann_index.py`.
+
+Generates a clustered synthetic corpus (gaussian blobs, roughly like
+sentence embeddings), computes exact neighbours with a flat index and
+reports, per configuration: recall@k against the exact result, mean
+single-query latency and serialized index size.
+
+    python benchmarks/bench_ann_index.py [n_vectors] [dim]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import faiss
+import numpy as np
+
+from src.ann_index import build_faiss_index, get_index_config
+
+CONFIGS = [
+    ("flat", {}),
+    ("ivf", {"nprobe": 1}),
+    ("ivf", {"nprobe": 8}),
+    ("ivf", {"nprobe": 32}),
+    ("hnsw", {"hnsw_m": 32, "ef_search": 16}),
+    ("hnsw", {"hnsw_m": 32, "ef_search": 64}),
+    ("hnsw", {"hnsw_m": 32, "ef_search": 128}),
+    ("pq", {"pq_m": 16}),
+    ("ivfpq", {"pq_m": 16, "nprobe": 16}),
+]
+
+
+def make_corpus(n, dim, n_queries, clusters=256, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32") * 4
+    labels = rng.integers(0, clusters, n + n_queries)
+    data = centers[labels] + rng.standard_normal((n + n_queries, dim)).astype("float32")
+    return data[:n], data[n:]
+
+
+def main(n=100000, dim=64, n_queries=500, k=10):
+    vectors, queries = make_corpus(n, dim, n_queries)
+    exact = faiss.IndexFlatL2(dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    print(f"{n} vectors x {dim} dims, {n_queries} queries, recall@{k}")
+    print(f"{'config':<28} {'build s':>8} {'recall':>7} {'ms/query':>9} {'memory MB':>10}")
+    for index_type, params in CONFIGS:
+        config = get_index_config(index_type, **params)
+        started = time.perf_counter()
+        index = build_faiss_index(vectors, config)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        found = np.vstack([index.search(q[None, :], k)[1] for q in queries])
+        latency = (time.perf_counter() - started) / n_queries * 1000
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        memory = faiss.serialize_index(index).nbytes / 1e6
+        label = index_type + " " + " ".join(f"{key}={val}" for key, val in params.items())
+        print(f"{label:<28} {build:8.1f} {recall:7.3f} {latency:9.3f} {memory:10.1f}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
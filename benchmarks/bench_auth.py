@@ -0,0 +1,52 @@
+"""API key verification cost as the number of keys grows.
+
+Compares `KeyStore.verify()` with the obvious way to support several
+keys, `secrets.compare_digest` against each known key in turn, for valid
+keys (found early, late) and invalid ones. Timing-safe compares per key
+make the scan O(n); the hashed table stays flat and takes the same time
+for a valid and an invalid key.
+
+    python benchmarks/bench_auth.py [max_keys]
+"""
+import secrets
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.auth import KeyStore
+
+
+def scan_verify(keys, key):
+    for known in keys:
+        if secrets.compare_digest(known, key):
+            return True
+    return False
+
+
+def per_call(fn, arg, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main(max_keys=100_000):
+    n = 1
+    print(f"{'keys':>8}  {'table first':>12} {'table last':>11} {'table bad':>10}   "
+          f"{'scan first':>10} {'scan last':>10} {'scan bad':>10}  (us/call)")
+    while n <= max_keys:
+        keys = [secrets.token_urlsafe(32) for _ in range(n)]
+        store = KeyStore({"key": k} for k in keys)
+        bad = secrets.token_urlsafe(32)
+        repeat = max(20, 200_000 // n)
+        table = [per_call(store.verify, k, 20_000) for k in (keys[0], keys[-1], bad)]
+        scan = [per_call(lambda key: scan_verify(keys, key), k, repeat) for k in (keys[0], keys[-1], bad)]
+        print(f"{n:>8}  {table[0]:>12.2f} {table[1]:>11.2f} {table[2]:>10.2f}   "
+              f"{scan[0]:>10.2f} {scan[1]:>10.2f} {scan[2]:>10.2f}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
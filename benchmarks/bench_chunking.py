@@ -0,0 +1,93 @@
+"""Compare `TokenChunker` with the fixed-size `CharacterTextSplitter`.
+
+Splits a synthetic multi-page document (paragraphs of varying length, as
+in extracted PDFs) with both splitters at the day21 settings and reports
+chunk count, tokens per chunk (mean / p95 / max), budget utilisation
+(mean tokens / 250), the share of chunks over budget, and throughput.
+Tokens are counted with `tiktoken` when installed, otherwise with the
+approximation in `src/chunking.py`.
+
+    python benchmarks/bench_chunking.py [n_pages]
+"""
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.chunking import TokenChunker, default_token_counter
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    Document = None
+
+WORDS = [
+    "retrieval", "index", "vector", "document", "query", "model", "token", "chunk", "latency",
+    "embedding", "search", "answer", "context", "page", "summary", "keyword", "score", "rank",
+    "the", "a", "of", "and", "to", "in", "is", "for", "with", "on",
+]
+BUDGET = 250
+
+
+def make_pages(n, seed=0):
+    rng = random.Random(seed)
+    pages = []
+    for p in range(n):
+        paragraphs = []
+        for _ in range(rng.randint(2, 8)):
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 30))).capitalize() + "."
+                for _ in range(rng.randint(1, 12))
+            ]
+            paragraphs.append(" ".join(sentences))
+        pages.append({"page_content": "\n\n".join(paragraphs), "metadata": {"source": "bench.pdf", "page": p}})
+    return pages
+
+
+def _report(name, chunks, elapsed, n_bytes, count):
+    sizes = sorted(count(c.page_content) for c in chunks)
+    mean = sum(sizes) / len(sizes)
+    p95 = sizes[int(0.95 * (len(sizes) - 1))]
+    over = sum(s > BUDGET for s in sizes) / len(sizes)
+    print(
+        f"{name:<24} {len(chunks):7d} chunks  tokens mean={mean:6.1f} p95={p95:4d} max={sizes[-1]:5d}"
+        f"  util={mean / BUDGET:5.1%}  over={over:5.1%}  {n_bytes / elapsed / 1e6:6.2f} MB/s"
+    )
+
+
+def main(n_pages=500):
+    if Document is None:
+        print("langchain_core is required for this benchmark")
+        return
+    count = default_token_counter()
+    pages = [Document(**p) for p in make_pages(n_pages)]
+    n_bytes = sum(len(p.page_content.encode("utf-8")) for p in pages)
+    print(f"{n_pages} pages, {n_bytes / 1e6:.2f} MB, budget {BUDGET} tokens")
+
+    try:
+        from langchain.text_splitter import CharacterTextSplitter
+    except ImportError:
+        CharacterTextSplitter = None
+    if CharacterTextSplitter is not None:
+        # silence the per-chunk "longer than the specified" warnings
+        logging.getLogger("langchain_text_splitters.base").setLevel(logging.ERROR)
+        splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+        started = time.perf_counter()
+        chunks = splitter.split_documents(pages)
+        _report("character 1000/200", chunks, time.perf_counter() - started, n_bytes, count)
+
+    chunker = TokenChunker(chunk_tokens=BUDGET, overlap_tokens=50, count_tokens=count)
+    started = time.perf_counter()
+    chunks = chunker.split_documents(pages)
+    _report("token 250/50 per page", chunks, time.perf_counter() - started, n_bytes, count)
+
+    started = time.perf_counter()
+    chunks = list(chunker.split_stream(iter(pages)))
+    _report("token 250/50 stream", chunks, time.perf_counter() - started, n_bytes, count)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,76 @@
+"""Prompt size and overhead of the compression stage (`src/compression.py`).
+
+Indexes synthetic ~250-token chunks, each hiding one fact sentence
+("The code for item N is X."), in a BM25 index. For each query it
+compares the uncompressed top-4 context with the compressed context
+(12 candidates re-ranked, 4 kept, 300-token budget). It reports the
+prompt tokens, whether the fact sentence survived, and the
+per-query cost of the stage.
+
+    python benchmarks/bench_compression.py [n_chunks] [n_queries]
+"""
+import random
+import sys
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.bm25 import BM25Index
+from src.chunking import approx_token_count
+from src.compression import compress_documents
+
+WORDS = [
+    "retrieval", "index", "vector", "document", "query", "model", "token", "chunk", "latency",
+    "embedding", "search", "answer", "context", "page", "summary", "keyword", "score", "rank",
+    "the", "a", "of", "and", "to", "in", "is", "for", "with", "on", "item", "code",
+]
+
+
+def make_chunks(n, seed=0):
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(n):
+        sentences = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(rng.randint(12, 18))
+        ]
+        sentences.insert(rng.randint(0, len(sentences)), f"The code for item {i} is X{rng.randint(1000, 9999)}.")
+        chunks.append(types.SimpleNamespace(page_content=" ".join(sentences), metadata={"page": i}))
+    return chunks
+
+
+def main(n_chunks=5000, n_queries=200):
+    chunks = make_chunks(n_chunks)
+    index = BM25Index.from_documents(chunks)
+    rng = random.Random(1)
+    targets = [rng.randrange(n_chunks) for _ in range(n_queries)]
+
+    raw_tokens = comp_tokens = raw_hits = comp_hits = 0
+    elapsed = 0.0
+    for i in targets:
+        query = f"what is the code for item {i}"
+        fact = f"The code for item {i} is"
+        candidates = index.search(query, k=12)
+        raw = candidates[:4]
+        raw_tokens += sum(approx_token_count(d.page_content) for d in raw)
+        raw_hits += any(fact in d.page_content for d in raw)
+
+        started = time.perf_counter()
+        docs, stats = compress_documents(query, candidates, top_n=4, budget=300, count_tokens=approx_token_count)
+        elapsed += time.perf_counter() - started
+        comp_tokens += stats["tokens_after"]
+        comp_hits += any(fact in d.page_content for d in docs)
+
+    print(f"{n_chunks} chunks, {n_queries} queries")
+    print(f"uncompressed top-4 : {raw_tokens / n_queries:7.1f} prompt tokens/query, fact kept {raw_hits / n_queries:.1%}")
+    print(
+        f"compressed         : {comp_tokens / n_queries:7.1f} prompt tokens/query, fact kept {comp_hits / n_queries:.1%}, "
+        f"{elapsed / n_queries * 1000:.2f} ms/query"
+    )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
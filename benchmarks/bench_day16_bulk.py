@@ -0,0 +1,68 @@
+"""Throughput of the day16 bulk summary -> keyword runner.
+
+Simulates LLM latency with sleeps (40 ms per summary, 20 ms per keyword
+call). It compares processing documents one after another with
+`run_bulk` at a few per-stage concurrency limits, then measures a resume
+after an interrupted run.
+
+    python benchmarks/bench_day16_bulk.py [n_docs]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.day16 import run_bulk
+
+SUMMARY_LATENCY = 0.04
+KEYWORD_LATENCY = 0.02
+
+
+class SimulatedPipeline:
+    def __init__(self, stop_after=None):
+        self.calls = 0
+        self.stop_after = stop_after
+
+    def summarize(self, text):
+        self.calls += 1
+        if self.stop_after is not None and self.calls > self.stop_after:
+            raise KeyboardInterrupt  # stands in for a crash
+        time.sleep(SUMMARY_LATENCY)
+        return "summary of " + text
+
+    def keywords(self, summary):
+        time.sleep(KEYWORD_LATENCY)
+        return "kw"
+
+
+def main(n_docs=200):
+    docs = [(f"doc{i}", f"text {i}") for i in range(n_docs)]
+    print(f"{n_docs} documents, {SUMMARY_LATENCY * 1000:.0f} ms summary + {KEYWORD_LATENCY * 1000:.0f} ms keywords")
+
+    pipeline = SimulatedPipeline()
+    started = time.perf_counter()
+    for _, text in docs[:50]:
+        pipeline.keywords(pipeline.summarize(text))
+    per_doc = (time.perf_counter() - started) / 50
+    print(f"sequential          : {1 / per_doc:7.1f} docs/s (measured on 50 docs)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for summary_c, keyword_c in ((4, 2), (8, 4), (16, 8)):
+            out = os.path.join(tmp, f"out_{summary_c}.jsonl")
+            stats = run_bulk(SimulatedPipeline(), docs, out, summary_concurrency=summary_c, keyword_concurrency=keyword_c)
+            print(f"bulk summary={summary_c:<2} kw={keyword_c:<2}: {stats['done'] / stats['elapsed_s']:7.1f} docs/s")
+
+        out = os.path.join(tmp, "resume.jsonl")
+        try:
+            run_bulk(SimulatedPipeline(stop_after=n_docs // 2), docs, out, summary_concurrency=8, keyword_concurrency=4)
+        except KeyboardInterrupt:
+            pass
+        stats = run_bulk(SimulatedPipeline(), docs, out, summary_concurrency=8, keyword_concurrency=4)
+        print(f"resume after crash  : {stats['skipped']} skipped, {stats['done']} processed in {stats['elapsed_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,90 @@
+"""Throughput of day17's batch map-reduce PDF summarization.
+
+Page extraction is simulated with a CPU-bound loop (about 2 ms per page,
+like parsing a text-heavy PDF page) and LLM calls with a 40 ms sleep.
+Compares summarizing one document at a time with the batch runner at a
+few concurrency limits, then re-runs over the same tree after editing
+one page of every tenth document to show the content-hash cache.
+
+    python benchmarks/bench_day17_batch.py [n_docs] [pages_per_doc]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.day17 import summarize_directory
+
+LLM_LATENCY = 0.04
+PAGES_PER_DOC = 24
+EDITED = set()
+
+
+def simulated_pages(path):
+    name = os.path.basename(path)
+    pages = []
+    for i in range(PAGES_PER_DOC):
+        deadline = time.perf_counter() + 0.002
+        while time.perf_counter() < deadline:
+            pass
+        suffix = " (edited)" if name in EDITED and i == 0 else ""
+        pages.append(f"{name} page {i}{suffix}")
+    return pages
+
+
+class SimulatedSummarizer:
+    def __init__(self):
+        self.calls = 0
+
+    def summarize(self, kind, text):
+        self.calls += 1
+        time.sleep(LLM_LATENCY)
+        return f"{kind} summary of {text[:40]!r}"
+
+
+def make_tree(root, n_docs):
+    for i in range(n_docs):
+        with open(os.path.join(root, f"doc{i:04d}.pdf"), "wb") as f:
+            f.write(b"%PDF-1.4")
+
+
+def report(label, stats):
+    print(f"{label:<26}: {stats['docs_per_min']:8.0f} docs/min, "
+          f"{stats['llm_calls']} LLM calls, {stats['cache_hits']} cached")
+
+
+def main(n_docs=40):
+    print(f"{n_docs} documents x {PAGES_PER_DOC} pages, 4 pages per group, "
+          f"{LLM_LATENCY * 1000:.0f} ms per LLM call")
+    with tempfile.TemporaryDirectory() as tmp:
+        pdfs = os.path.join(tmp, "pdfs")
+        os.makedirs(pdfs)
+        make_tree(pdfs, n_docs)
+
+        out = os.path.join(tmp, "sequential.jsonl")
+        stats = summarize_directory(SimulatedSummarizer(), pdfs, out, extract=simulated_pages,
+                                    extract_executor=ThreadPoolExecutor(1), concurrency=1, lookahead=1)
+        report("one document at a time", stats)
+
+        for concurrency in (4, 16):
+            out = os.path.join(tmp, f"batch_{concurrency}.jsonl")
+            stats = summarize_directory(SimulatedSummarizer(), pdfs, out, extract=simulated_pages,
+                                        concurrency=concurrency)
+            report(f"batch, concurrency={concurrency}", stats)
+
+        # same cache, fresh output: only edited pages and their reduces run
+        EDITED.update(f"doc{i:04d}.pdf" for i in range(0, n_docs, 10))
+        stats = summarize_directory(SimulatedSummarizer(), pdfs, os.path.join(tmp, "rerun.jsonl"),
+                                    cache_path=os.path.join(tmp, "batch_16.cache.jsonl"),
+                                    extract=simulated_pages, concurrency=16)
+        report(f"rerun, {len(EDITED)} docs edited", stats)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        PAGES_PER_DOC = int(sys.argv[2])
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 40)
@@ -0,0 +1,91 @@
+"""Sequential `/ask` calls versus one `/ask_batch` call in `src/day21.py`.
+
+Indexes 2000 chunks in a real FAISS store using `HashingEmbeddings`. The
+embedding API round trip is simulated with a 30 ms sleep per call and
+the LLM with a 50 ms sleep per answer. It then answers the same
+questions one request at a time and as one streamed batch, and reports
+wall time and embedding calls.
+
+    python benchmarks/bench_day21_ask_batch.py [n_questions] [concurrency]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import langchain_community.llms as _lc_llms
+from fastapi.testclient import TestClient
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListLLM
+
+from src.embeddings import HashingEmbeddings
+
+# day21 imports a ChatOpenAI name that recent langchain_community no
+# longer exposes; it is never used on the code path measured here.
+if not hasattr(_lc_llms, "ChatOpenAI"):
+    _lc_llms.ChatOpenAI = FakeListLLM
+
+import src.day21 as day21  # noqa: E402
+
+EMBED_LATENCY = 0.03
+LLM_LATENCY = 0.05
+
+
+class RemoteLikeEmbeddings(HashingEmbeddings):
+    calls = 0
+
+    def embed_documents(self, texts):
+        RemoteLikeEmbeddings.calls += 1
+        time.sleep(EMBED_LATENCY)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        RemoteLikeEmbeddings.calls += 1
+        time.sleep(EMBED_LATENCY)
+        return super().embed_query(text)
+
+
+class SlowLLM(FakeListLLM):
+    def _call(self, *args, **kwargs):
+        time.sleep(LLM_LATENCY)
+        return super()._call(*args, **kwargs)
+
+
+def main(n_questions=50, concurrency=8):
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    os.environ["RAG_RETRIEVAL_MODE"] = "vector"
+    docs = [Document(page_content=f"section {i} describes topic {i % 97} in detail", metadata={"page": i}) for i in range(2000)]
+    embeddings = RemoteLikeEmbeddings(dim=128)
+    day21.vector_store = FAISS.from_documents(docs, embeddings)
+    day21.make_chat_llm = lambda **kw: SlowLLM(responses=["ok"])
+    day21._invalidate_qa_cache()
+    client = TestClient(day21.app)
+    questions = [f"what does topic {i} describe?" for i in range(n_questions)]
+
+    RemoteLikeEmbeddings.calls = 0
+    started = time.perf_counter()
+    for q in questions:
+        assert client.post("/ask", json={"question": q}).status_code == 200
+    sequential = time.perf_counter() - started
+    sequential_calls = RemoteLikeEmbeddings.calls
+
+    RemoteLikeEmbeddings.calls = 0
+    started = time.perf_counter()
+    resp = client.post("/ask_batch", json={"questions": questions, "concurrency": concurrency})
+    assert resp.status_code == 200 and len(resp.text.splitlines()) == n_questions
+    batched = time.perf_counter() - started
+
+    print(f"{n_questions} questions, embed {EMBED_LATENCY * 1000:.0f} ms/call, LLM {LLM_LATENCY * 1000:.0f} ms/answer")
+    print(f"sequential /ask : {sequential:6.2f} s  ({n_questions / sequential:6.1f} q/s, {sequential_calls} embedding calls)")
+    print(
+        f"/ask_batch (c={concurrency}): {batched:6.2f} s  ({n_questions / batched:6.1f} q/s, "
+        f"{RemoteLikeEmbeddings.calls} embedding calls)"
+    )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,64 @@
+"""Log calls per second: open/append/close per call vs the buffered writer.
+
+`log_api_call()` runs on the server's worker threads (FastAPI background
+tasks), so both loggers are driven from several threads at once. The
+buffered numbers include the final flush to disk.
+
+    python benchmarks/bench_day22_logging.py [calls_per_thread] [threads]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import day22
+
+
+def unbuffered_log_api_call(endpoint, user):
+    """The original implementation: one open/write/close per call."""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    log_entry = f"[{timestamp}] Endpoint: {endpoint} | User: {user}\n"
+    with open("api_logs.txt", "a") as f:
+        f.write(log_entry)
+
+
+def drive(log_call, calls, threads):
+    def worker(n):
+        for i in range(calls):
+            log_call("/some-endpoint", f"user{n}-{i % 100}")
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    day22.flush_logs()
+    return calls * threads / (time.perf_counter() - started)
+
+
+def main(calls=20000, threads=8):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            print(f"{threads} threads x {calls} calls")
+            old = drive(unbuffered_log_api_call, calls, threads)
+            print(f"open/write/close per call: {old:9.0f} calls/s")
+            os.remove("api_logs.txt")
+            new = drive(day22.log_api_call, calls, threads)
+            day22.close_logs()
+            print(f"buffered writer          : {new:9.0f} calls/s ({new / old:.1f}x)")
+            with open("api_logs.txt") as f:
+                assert sum(1 for _ in f) == calls * threads
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
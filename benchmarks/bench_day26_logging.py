@@ -0,0 +1,97 @@
+"""Endpoint throughput of src/day26.py with file logging off and on.
+
+Drives `POST /qa` (one `logger.info` per request) through the ASGI app
+from `concurrency` tasks and reports requests/s and latency percentiles
+for:
+
+- logging disabled (the `app` logger above CRITICAL),
+- the old synchronous console + file handlers (`LOG_QUEUE=0`),
+- the queue handler with text lines, and with JSON lines.
+
+Console output goes to /dev/null; the log file is in a temp directory.
+Each configuration runs once on that (fast, local) disk, then with every
+file write stalled by `stall_us` to stand in for a slow or network disk.
+
+    python benchmarks/bench_day26_logging.py [n_requests] [concurrency] [stall_us]
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+from src import day26
+
+
+async def drive(n, concurrency):
+    transport = httpx.ASGITransport(app=day26.app)
+    headers = {"X-API-Key": day26.VALID_API_KEY}
+    samples = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker(count):
+            for i in range(count):
+                started = time.perf_counter()
+                resp = await client.post("/qa", params={"query": f"question {i}"}, headers=headers)
+                samples.append(time.perf_counter() - started)
+                assert resp.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return samples, elapsed
+
+
+def report(label, samples, elapsed):
+    samples.sort()
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    print(f"{label:<22}: {len(samples) / elapsed:7.0f} req/s  p50 {pick(0.5):6.2f} ms  p99 {pick(0.99):6.2f} ms")
+
+
+def stalled(emit, stall):
+    def slow_emit(self, record):
+        time.sleep(stall)
+        emit(self, record)
+    return slow_emit
+
+
+def main(n=5000, concurrency=20, stall_us=500):
+    stderr = sys.stderr
+    emit = logging.FileHandler.emit
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        os.chdir(tmp)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        try:
+            print(f"{n} requests, {concurrency} concurrent")
+            runs = [(label, stall) for stall in (0, stall_us) for label in
+                    ("logging off", "sync console + file", "queue, text lines", "queue, JSON lines")]
+            for label, stall in runs:
+                if stall and label == "logging off":
+                    print(f"file writes stalled {stall} us")
+                    logging.FileHandler.emit = stalled(emit, stall / 1e6)
+                json_lines, use_queue, enabled = "JSON" in label, label.startswith("queue"), label != "logging off"
+                sys.stderr = devnull  # the console handler binds it when configured
+                day26.configure_logging(day26.logging_config(json_lines=json_lines, use_queue=use_queue))
+                sys.stderr = stderr
+                if not enabled:
+                    day26.logger.setLevel(logging.CRITICAL)
+                samples, elapsed = asyncio.run(drive(n, concurrency))
+                for handler in day26.logger.handlers:
+                    handler.flush()
+                report(label, samples, elapsed)
+            logging.shutdown()
+        finally:
+            logging.FileHandler.emit = emit
+            sys.stderr = stderr
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
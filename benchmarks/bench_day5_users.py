@@ -0,0 +1,73 @@
+"""User store at scale: lookups, bulk creation, paging and persistence.
+
+Builds `n` users (default 1M) and reports:
+
+- case-insensitive lookup: the old scan over `users_db` vs `find()`,
+- bulk creation (`put_many` in batches of 1,000, as `POST /users`
+  would receive them), in memory and appending to disk,
+- listing a page deep into the store,
+- reopening (replaying) the file, and compacting it after every user
+  was updated once.
+
+    python benchmarks/bench_day5_users.py [n_users]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.day5 import User
+from src.user_store import UserStore
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def fill(store, users, batch=1000):
+    for start in range(0, len(users), batch):
+        store.put_many(users[start:start + batch])
+
+
+def main(n=1_000_000):
+    users = [User(name=f"User{i:07d}", age=i % 90) for i in range(n)]
+    rng = random.Random(0)
+    probes = [f"user{rng.randrange(n):07d}" for _ in range(1000)]
+
+    store = UserStore(User)
+    _, elapsed = timed(fill, store, users)
+    print(f"bulk create, memory  : {n / elapsed:10.0f} users/s")
+
+    plain = {u.name: u for u in users}
+    scan = lambda name: next((v for k, v in plain.items() if k.lower() == name.lower()), None)
+    few = probes[:5]
+    _, elapsed = timed(lambda: [scan(p) for p in few])
+    print(f"lookup, scan         : {elapsed / len(few) * 1e3:10.1f} ms")
+    _, elapsed = timed(lambda: [store.find(p) for p in probes])
+    print(f"lookup, index        : {elapsed / len(probes) * 1e6:10.2f} us")
+    _, elapsed = timed(store.page, n - 1000, 100)
+    print(f"page at offset {n - 1000}: {elapsed * 1e6:8.1f} us")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.jsonl")
+        disk = UserStore(User, path=path, compact_ratio=float("inf"))
+        _, elapsed = timed(fill, disk, users)
+        disk.close()
+        print(f"bulk create, on disk : {n / elapsed:10.0f} users/s  ({os.path.getsize(path) / 1e6:.0f} MB)")
+        disk, elapsed = timed(UserStore, User, path, float("inf"))
+        print(f"reopen (replay)      : {elapsed:10.2f} s")
+        fill(disk, [User(name=u.name, age=u.age + 1) for u in users])
+        size = os.path.getsize(path)
+        _, elapsed = timed(disk.compact)
+        print(f"compact              : {elapsed:10.2f} s  ({size / 1e6:.0f} MB -> {os.path.getsize(path) / 1e6:.0f} MB)")
+        disk.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
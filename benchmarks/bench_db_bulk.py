@@ -0,0 +1,58 @@
+"""Loading books (src/day7.py): one `POST /books` per row vs `POST /books/bulk`.
+
+Each mode starts from an empty temporary database:
+
+- `single`: `POST /books` per book (a commit, and so an fsync, each);
+  timed over `n_single` books since it is slow;
+- `array`: `POST /books/bulk` with a JSON array of `n` books;
+- `ndjson`: the same `n` books as one NDJSON body.
+
+    python benchmarks/bench_db_bulk.py [n] [n_single]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from src import day7
+from src.db import make_engine
+
+
+def books(n):
+    return [{"title": f"Book number {i}", "author": f"Author {i % 1000}"} for i in range(n)]
+
+
+def load(mode, client, rows):
+    if mode == "single":
+        for row in rows:
+            client.post("/books", json=row).raise_for_status()
+    elif mode == "array":
+        client.post("/books/bulk", json=rows).raise_for_status()
+    else:
+        body = "".join(json.dumps(row) + "\n" for row in rows)
+        client.post("/books/bulk", content=body, headers={"content-type": "application/x-ndjson"}).raise_for_status()
+
+
+def main(n=100_000, n_single=2_000):
+    for mode, count in (("single", n_single), ("array", n), ("ndjson", n)):
+        with tempfile.TemporaryDirectory() as tmp:
+            day7.engine = make_engine(os.path.join(tmp, "books.db"))
+            SQLModel.metadata.create_all(day7.engine)
+            rows = books(count)
+            with TestClient(day7.app) as client:
+                started = time.perf_counter()
+                load(mode, client, rows)
+                elapsed = time.perf_counter() - started
+            day7.engine.dispose()
+        print(f"{mode:<7}: {count:7d} books in {elapsed:6.2f} s ({count / elapsed:8.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,88 @@
+"""Mixed reads and writes on books.db: SQLite defaults vs `make_engine()`.
+
+Fills a temporary books database (src/day7.py) with `n_rows` books, then
+`threads` threads run the day7 handlers for `seconds` seconds, each
+request in its own session as `get_session` gives it: `get_book` for a
+random id, or (`write_pct` percent of requests) `add_book`, which
+commits. Run once with a plain `create_engine()` (rollback journal,
+`synchronous=FULL`, default pool) and once with `make_engine()` (WAL,
+`synchronous=NORMAL`, larger cache, mmap, busy timeout, bigger pool).
+
+    python benchmarks/bench_db_concurrency.py [n_rows] [threads] [seconds] [write_pct]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, create_engine
+
+from src import day7
+from src.db import make_engine
+
+
+def fill(path, n):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+    con = sqlite3.connect(path)
+    con.executemany("INSERT INTO book (title, author) VALUES (?, ?)",
+                    ((f"Book number {i}", f"Author {i % 1000}") for i in range(n)))
+    con.commit()
+    con.close()
+
+
+def worker(engine, n, deadline, write_pct, seed, latencies, errors):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        write = rng.random() * 100 < write_pct
+        started = time.perf_counter()
+        try:
+            with Session(engine) as session:
+                if write:
+                    day7.add_book(day7.Book(title="New book", author="Someone"), session)
+                else:
+                    day7.get_book(rng.randrange(1, n + 1), session)
+        except OperationalError:  # "database is locked"
+            errors.append(write)
+            continue
+        latencies["write" if write else "read"].append(time.perf_counter() - started)
+
+
+def percentile(values, pct):
+    return sorted(values)[int(len(values) * pct / 100)] * 1e3 if values else float("nan")
+
+
+def run(name, engine, n, threads, seconds, write_pct):
+    latencies, errors = {"read": [], "write": []}, []
+    deadline = time.perf_counter() + seconds
+    pool = [threading.Thread(target=worker, args=(engine, n, deadline, write_pct, i, latencies, errors))
+            for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    engine.dispose()
+    for kind, values in latencies.items():
+        print(f"{name:<9} {kind:<5}: {len(values) / seconds:8.0f}/s  "
+              f"p50 {percentile(values, 50):7.2f} ms  p99 {percentile(values, 99):8.2f} ms")
+    print(f"{name:<9} locked: {len(errors)} errors")
+
+
+def main(n=100_000, threads=8, seconds=10, write_pct=20):
+    for name, factory in (("defaults", lambda path: create_engine(f"sqlite:///{path}")), ("tuned", make_engine)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "books.db")
+            fill(path, n)
+            run(name, factory(path), n, threads, seconds, write_pct)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:5]))
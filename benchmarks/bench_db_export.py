@@ -0,0 +1,109 @@
+"""Listing a large table: one JSON array vs keyset pages vs NDJSON stream.
+
+Fills a temporary tasks database (src/day6.py) with `n_rows` rows, then
+each mode runs in a fresh process so its peak RSS is its own:
+
+- `all`: `GET /tasks`, every row loaded and serialized in one response;
+- `pages`: `GET /tasks?limit=1000&after=...` following the `Link` header;
+- `ndjson`: `GET /tasks?format=ndjson`, read as a stream.
+
+    python benchmarks/bench_db_export.py [n_rows]
+"""
+import asyncio
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def fill(path, n):
+    from sqlmodel import SQLModel
+
+    from src import day6
+    from src.db import make_engine
+
+    engine = make_engine(path)
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+    con = sqlite3.connect(path)
+    con.executemany("INSERT INTO task (description) VALUES (?)",
+                    ((f"task number {i} with a short description",) for i in range(n)))
+    con.commit()
+    con.close()
+
+
+async def get(app, target):
+    """Call the ASGI app directly, counting body bytes as they are sent
+    (TestClient would buffer a streamed body)."""
+    path, _, query = target.partition("?")
+    scope = {"type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+             "headers": [(b"host", b"bench")], "server": ("bench", 80), "client": ("127.0.0.1", 1), "root_path": ""}
+    response = {"headers": {}, "body": bytearray(), "lines": 0}
+
+    requested = []
+
+    async def receive():
+        if not requested:
+            requested.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif target.endswith("ndjson"):
+            response["lines"] += message.get("body", b"").count(b"\n")  # consumed, not kept
+        else:
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response
+
+
+def run(mode, path):
+    import json
+
+    from src import day6
+    from src.db import make_engine
+
+    day6.engine = make_engine(path)
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    rows = 0
+    if mode == "all":
+        rows = len(json.loads(asyncio.run(get(day6.app, "/tasks"))["body"]))
+    elif mode == "pages":
+        url = "/tasks?limit=1000"
+        while url:
+            resp = asyncio.run(get(day6.app, url))
+            rows += len(json.loads(resp["body"]))
+            link = resp["headers"].get("link")
+            url = link[link.index("/tasks"):link.index(">")] if link else None
+    else:
+        rows = asyncio.run(get(day6.app, "/tasks?format=ndjson"))["lines"]
+    elapsed = time.perf_counter() - started
+    grown = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base_rss) / 1024
+    print(f"{mode:<7}: {rows} rows in {elapsed:6.2f} s ({rows / elapsed:8.0f} rows/s), peak RSS +{grown:6.0f} MB")
+
+
+def main(n=1_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tasks.db")
+        fill(path, n)
+        print(f"{n} tasks, {os.path.getsize(path) / 1e6:.0f} MB database")
+        for mode in ("all", "pages", "ndjson"):
+            subprocess.run([sys.executable, __file__, "--run", mode, path], check=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2], sys.argv[3])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,102 @@
+"""Book search (src/day7.py): FTS5 with BM25 vs a LIKE scan.
+
+Builds a synthetic catalog of `n_rows` books (titles of 2-5 words drawn
+from a skewed 5,000-word vocabulary, 20,000 authors), indexes it with
+`create_fts5()` and times `fts5_search()` for the first page (20 rows)
+of several query shapes, plus a page deep into a common word's results.
+The common word is timed with every match ranked and with the default
+`max_candidates` cap.
+`LIKE '%word%'` over title and author, the full scan a search without
+the index needs to find (let alone rank) every match, is timed once for
+comparison.
+
+    python benchmarks/bench_db_search.py [n_rows] [repeats]
+"""
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlmodel import Session, SQLModel
+
+from src.day7 import Book
+from src.db import create_fts5, fts5_search, make_engine
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "tha", "dor", "vel", "sun", "mar", "ith", "gal", "or", "en", "ul", "bra"]
+
+
+def vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def fill(path, n, rng):
+    words = vocabulary(rng, 5000)
+    # Zipf-like: a few words are in a large share of titles, like "the" in real ones
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    authors = [f"{rng.choice(words).title()} {rng.choice(words).title()}" for _ in range(20000)]
+    con = sqlite3.connect(path)
+    con.executemany("INSERT INTO book (title, author) VALUES (?, ?)",
+                    ((" ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(2, 5))).title(), rng.choice(authors))
+                     for _ in range(n)))
+    con.commit()
+    con.close()
+    return words
+
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return result, times[len(times) // 2] * 1e3, times[int(len(times) * 0.99)] * 1e3
+
+
+def main(n=1_000_000, repeats=20):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "books.db")
+        engine = make_engine(path)
+        SQLModel.metadata.create_all(engine)
+        started = time.perf_counter()
+        words = fill(path, n, rng)
+        print(f"{n} books inserted in {time.perf_counter() - started:.1f} s")
+        started = time.perf_counter()
+        create_fts5(engine, Book, ["title", "author"])
+        print(f"index built in {time.perf_counter() - started:.1f} s, "
+              f"database {os.path.getsize(path) / 1e6:.0f} MB")
+
+        common, mid, rare = words[0], words[50], words[4000]
+        queries = [
+            (f"common word ({common})", common, 0, None),
+            ("common word, capped", common, 0, 20000),
+            (f"mid word ({mid})", mid, 0, 20000),
+            (f"rare word ({rare})", rare, 0, 20000),
+            ("two words", f"{common} {mid}", 0, 20000),
+            ("prefix, 3 letters", f"{common[:3]}*", 0, 20000),
+            ("prefix, 4 letters", f"{mid[:4]}*", 0, 20000),
+            ("common word, capped, offset 1000", common, 1000, 20000),
+        ]
+        with Session(engine) as session:
+            for label, query, offset, cap in queries:
+                hits, p50, p99 = timed(lambda: fts5_search(session, Book, query, 20, offset, cap), repeats)
+                print(f"{label:<34}: p50 {p50:8.2f} ms  p99 {p99:8.2f} ms  ({len(hits)} rows)")
+            like = f"%{rare}%"
+            _, elapsed, _ = timed(lambda: session.connection().exec_driver_sql(
+                "SELECT * FROM book WHERE title LIKE ? OR author LIKE ?", (like, like)).all(), 1)
+            print(f"{'LIKE scan, rare word':<34}: {elapsed:8.2f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,74 @@
+"""Near-duplicate elimination at ingest (`src/dedup.py`).
+
+Builds a synthetic extracted-PDF corpus where every page carries a
+slightly varying header and footer and some pages are boilerplate
+repeats. It chunks the pages with `TokenChunker`, as day21 does, then
+reports how many chunks MinHash/LSH drops (the embeddings saved) and the
+deduplication throughput. It also times an all-pairs exact Jaccard
+baseline on a prefix of the corpus for comparison.
+
+    python benchmarks/bench_dedup.py [n_pages]
+"""
+import random
+import sys
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.chunking import TokenChunker, approx_token_count
+from src.dedup import MinHashDeduplicator
+
+BOILERPLATE = (
+    "This document is provided for information purposes only and does not constitute an offer. "
+    "All figures are unaudited and subject to change without notice. Past performance is not "
+    "indicative of future results. Redistribution without written consent is prohibited."
+)
+
+
+def make_pages(n, seed=0):
+    rng = random.Random(seed)
+    pages = []
+    for p in range(n):
+        header = f"ACME Corp quarterly report, section {p // 10 + 1}."
+        footer = f"Confidential. Copyright 2024 ACME Corporation. All rights reserved. Page {p + 1}."
+        if rng.random() < 0.15:
+            text = BOILERPLATE
+        else:
+            text = " ".join(
+                " ".join(f"w{rng.randint(0, 20000)}" for _ in range(rng.randint(8, 25))) + "."
+                for _ in range(rng.randint(10, 40))
+            )
+        content = f"{header}\n\n{text}\n\n{footer}"
+        pages.append(types.SimpleNamespace(page_content=content, metadata={"source": "report.pdf", "page": p}))
+    return pages
+
+
+def main(n_pages=2000):
+    pages = make_pages(n_pages)
+    chunks = TokenChunker(chunk_tokens=250, overlap_tokens=50, count_tokens=approx_token_count).split_documents(pages)
+
+    started = time.perf_counter()
+    result = MinHashDeduplicator(threshold=0.8).deduplicate(chunks)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(chunks)} chunks from {n_pages} pages: kept {len(result.kept)}, "
+        f"embeddings saved {result.saved} ({result.saved / len(chunks):.1%}), "
+        f"{len(chunks) / elapsed:,.0f} chunks/s"
+    )
+
+    sample = chunks[:1000]
+    dedup = MinHashDeduplicator()
+    shingles = [dedup.shingles(c.page_content) for c in sample]
+    started = time.perf_counter()
+    kept = []
+    for s in shingles:
+        if not any(dedup.jaccard(s, k) >= 0.8 for k in kept):
+            kept.append(s)
+    elapsed = time.perf_counter() - started
+    print(f"all-pairs exact Jaccard on {len(sample)} chunks: {len(sample) / elapsed:,.0f} chunks/s (quadratic)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
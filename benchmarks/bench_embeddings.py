@@ -0,0 +1,58 @@
+"""Throughput of the local embedding backends in `src/embeddings.py`.
+
+Embeds synthetic ~1000-character chunks (the size produced by the RAG
+examples' splitters) and reports chunks/s for `HashingEmbeddings` at a
+few batch sizes, and for `SentenceTransformerEmbeddings` when the
+optional `sentence-transformers` package is installed.
+
+    python benchmarks/bench_embeddings.py [n_chunks]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.embeddings import HashingEmbeddings, SentenceTransformerEmbeddings
+
+WORDS = [
+    "retrieval", "index", "vector", "document", "query", "model", "token", "chunk", "latency",
+    "embedding", "search", "answer", "context", "page", "summary", "keyword", "score", "rank",
+]
+
+
+def make_chunks(n, chars=1000, seed=0):
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(n):
+        words = []
+        while sum(len(w) + 1 for w in words) < chars:
+            words.append(rng.choice(WORDS) + str(rng.randint(0, 500)))
+        chunks.append(" ".join(words))
+    return chunks
+
+
+def _rate(model, chunks):
+    started = time.perf_counter()
+    vectors = model.embed_array(chunks)
+    elapsed = time.perf_counter() - started
+    return len(chunks) / elapsed, vectors.shape
+
+
+def main(n=20000):
+    chunks = make_chunks(n)
+    for batch_size in (32, 256, 1024):
+        rate, shape = _rate(HashingEmbeddings(dim=384, batch_size=batch_size), chunks)
+        print(f"hashing   dim=384 batch={batch_size:<5} {rate:10.0f} chunks/s  -> {shape}")
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        print("sentence-transformers not installed; skipping")
+        return
+    rate, shape = _rate(SentenceTransformerEmbeddings(), chunks[:2000])
+    print(f"minilm    cpu     batch=64    {rate:10.0f} chunks/s  -> {shape}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,87 @@
+"""Ingest and query speed of the columnar api_logs.txt index.
+
+Writes a synthetic day22 log (1,000 users, 20 endpoints, about 30 calls
+per second), ingests it, appends 1% more lines and ingests again, then
+times a few aggregations against a grep-like scan of the text file.
+
+    python benchmarks/bench_log_index.py [n_lines]
+"""
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.log_index import LogIndex, format_time, parse_time
+
+START = parse_time("2025-10-01 00:00:00")
+
+
+def write_log(path, n, first=0):
+    rng = random.Random(first)
+    users = [f"user{i}" for i in range(1000)]
+    endpoints = [f"/api/v1/endpoint{i}" for i in range(20)]
+    with open(path, "a") as f:
+        batch = []
+        for i in range(first, first + n):
+            stamp = format_time(START + i // 30)
+            batch.append(f"[{stamp}] Endpoint: {rng.choice(endpoints)} | User: {rng.choice(users)}\n")
+            if len(batch) == 100000:
+                f.write("".join(batch))
+                batch = []
+        f.write("".join(batch))
+
+
+def timed(label, fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<44}: {best * 1000:9.1f} ms")
+    return result
+
+
+def main(n=2_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "api_logs.txt")
+        write_log(log, n)
+        size_mb = os.path.getsize(log) / 1e6
+        index = LogIndex(os.path.join(tmp, "idx"))
+        started = time.perf_counter()
+        index.ingest(log)
+        elapsed = time.perf_counter() - started
+        print(f"{n} lines ({size_mb:.0f} MB): full ingest {elapsed:.1f}s ({n / elapsed / 1e6:.2f}M lines/s)")
+        index_mb = sum(os.path.getsize(os.path.join(tmp, "idx", f)) for f in os.listdir(os.path.join(tmp, "idx"))) / 1e6
+        print(f"index size {index_mb:.0f} MB")
+
+        write_log(log, n // 100, first=n)
+        timed(f"incremental ingest of {n // 100} new lines", lambda: index.ingest(log), repeat=1)
+
+        day = format_time(START + n // 30 // 2)[:10]
+        timed("calls per user per hour, all time", lambda: index.aggregate(["user", "hour"]))
+        timed(f"calls per endpoint per minute on {day}", lambda: index.aggregate(
+            ["endpoint", "minute"], start=day, end=parse_time(day) + 86400))
+        timed("one user's calls per hour", lambda: index.aggregate(["hour"], user="user42"))
+
+        pattern = re.compile(r"^\[(\d{4}-\d\d-\d\d \d\d):.*\| User: (.*)$")
+
+        def scan():
+            counts = Counter()
+            with open(log) as f:
+                for line in f:
+                    m = pattern.match(line)
+                    if m:
+                        counts[m.group(2), m.group(1)] += 1
+            return counts
+
+        timed("same per-user-per-hour by scanning the text", scan, repeat=1)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,73 @@
+"""Per-request overhead of the rate limit backends in src/rate_limit.py.
+
+Times `RateLimiter` checks (5 per minute, 1,000 distinct clients) on
+each backend from the event loop. The shared-memory backend is also run
+from 4 processes at once on the same table, as uvicorn workers would.
+Redis is measured only if a server answers at `REDIS_URL`.
+
+    python benchmarks/bench_rate_limit.py [n_checks]
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.rate_limit import MemoryBackend, RedisBackend, SharedMemoryBackend
+
+KEYS = [f"10.0.{i // 256}.{i % 256}:/qa" for i in range(1000)]
+
+
+async def run_checks(backend, n):
+    started = time.perf_counter()
+    for i in range(n):
+        await backend.check(KEYS[i % len(KEYS)], 5, 60.0)
+    return (time.perf_counter() - started) / n
+
+
+def report(label, per_check):
+    print(f"{label:<28}: {per_check * 1e6:8.2f} us/check ({1 / per_check:10.0f} checks/s)")
+
+
+def _shared_worker(path, n, out):
+    backend = SharedMemoryBackend(path)
+    out.put(asyncio.run(run_checks(backend, n)))
+
+
+async def redis_available():
+    try:
+        backend = RedisBackend()
+        await asyncio.wait_for(backend.client.ping(), 1)
+        return backend
+    except Exception:
+        return None
+
+
+def main(n=200_000):
+    report("memory", asyncio.run(run_checks(MemoryBackend(), n)))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rate-limit")
+        report("shared, 1 process", asyncio.run(run_checks(SharedMemoryBackend(path), n)))
+
+        out = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_shared_worker, args=(path, n // 4, out)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        per_check = max(out.get() for _ in procs)
+        for p in procs:
+            p.join()
+        report("shared, 4 processes (each)", per_check)
+
+    backend = asyncio.run(redis_available())
+    if backend is None:
+        print(f"redis                       : skipped, no server at {os.getenv('REDIS_URL', 'redis://localhost')}")
+    else:
+        report("redis", asyncio.run(run_checks(backend, min(n, 20_000))))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,111 @@
+"""Load test: rate limiting 100k distinct clients.
+
+For the in-process (`memory`) backend and each algorithm it reports the
+memory held per client, check latency percentiles, how idle clients are
+expired, and throughput from 4 threads with 1 vs 64 shards. The shared
+memory backend is timed on a table sized for the same clients.
+
+    python benchmarks/bench_rate_limit_load.py [n_keys] [n_checks]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.rate_limit import MemoryBackend, SharedMemoryBackend
+
+LIMIT, PERIOD = 100, 60.0
+
+
+class Clock:
+    def __init__(self):
+        self.offset = 0.0
+
+    def __call__(self):
+        return time.monotonic() + self.offset
+
+
+def percentiles(samples):
+    samples.sort()
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] / 1000
+    return f"p50 {pick(0.5):5.2f} us  p99 {pick(0.99):5.2f} us  p99.9 {pick(0.999):6.2f} us"
+
+
+def timed_checks(backend, keys, n, algorithm):
+    rng = random.Random(0)
+    picks = [keys[rng.randrange(len(keys))] for _ in range(n)]
+    samples = []
+    clock = time.perf_counter_ns
+    for key in picks:
+        started = clock()
+        backend.check_now(key, LIMIT, PERIOD, algorithm)
+        samples.append(clock() - started)
+    return samples
+
+
+def memory_backend(n_keys, n_checks):
+    keys = [f"/qa|key:{i:016x}|100/60/x" for i in range(n_keys)]
+    for algorithm in ("gcra", "sliding_window"):
+        clock = Clock()
+        backend = MemoryBackend(clock=clock)
+        tracemalloc.start()
+        for key in keys:
+            backend.check_now(key, LIMIT, PERIOD, algorithm)
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"memory/{algorithm:<14}: {n_keys} clients, {held / n_keys:5.0f} bytes/client "
+              f"({held / 1e6:.1f} MB)")
+        print(f"{'':<22}  {percentiles(timed_checks(backend, keys, n_checks, algorithm))}")
+
+        clock.offset += 3 * PERIOD  # everyone goes idle
+        for i in range(n_keys // 4):
+            backend.check_now(keys[i % 100], LIMIT, PERIOD, algorithm)
+        print(f"{'':<22}  all idle, then {n_keys // 4} checks from 100 clients: {len(backend)} clients held")
+
+
+def shard_contention(n_keys, n_checks, threads=4):
+    keys = [f"client{i}" for i in range(n_keys)]
+    for shards in (1, 64):
+        backend = MemoryBackend(shards=shards)
+
+        def worker(seed):
+            rng = random.Random(seed)
+            for _ in range(n_checks // threads):
+                backend.check_now(keys[rng.randrange(n_keys)], LIMIT, PERIOD, "gcra")
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        started = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        rate = n_checks / (time.perf_counter() - started)
+        print(f"memory, {threads} threads, {shards:>2} shard(s): {rate:9.0f} checks/s")
+
+
+def shared_backend(n_keys, n_checks):
+    keys = [f"/qa|key:{i:016x}" for i in range(n_keys)]
+    slots = 1 << (2 * n_keys - 1).bit_length()  # about 2-4 slots per client
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SharedMemoryBackend(os.path.join(tmp, "rl"), slots=slots)
+        for key in keys:
+            backend.check_now(key, LIMIT, PERIOD, "gcra")
+        print(f"shared/gcra           : {slots} slots, {slots * backend.SLOT.size / 1e6:.1f} MB table")
+        print(f"{'':<22}  {percentiles(timed_checks(backend, keys, n_checks, 'gcra'))}")
+        backend.close()
+
+
+def main(n_keys=100_000, n_checks=500_000):
+    memory_backend(n_keys, n_checks)
+    shard_contention(n_keys, n_checks)
+    shared_backend(n_keys, n_checks)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,137 @@
+"""Latency of the Redis rate limit backend, against a stand-in server.
+
+The stand-in answers every request after a simulated network round trip
+(`rtt_us`) and runs the algorithms in Python. Like Redis it serves one
+request at a time, spending a fixed cost per request (reading and
+parsing it, the reply syscall) plus a little per command, so the numbers
+show what the backend saves in round trips rather than Redis' own speed.
+
+Traffic is 1,000 well-behaved clients plus 10 clients hammering far over
+their limit (half the requests), arriving at `rate` checks per second
+whether or not earlier checks have finished, as requests reach a server.
+Configurations: one round trip per check (no pipelining, no local
+cache), each of the two, then both. A real server is also measured if
+one answers at `REDIS_URL`.
+
+    python benchmarks/bench_rate_limit_redis.py [n_checks] [rate] [rtt_us]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.rate_limit import ALGORITHMS, RedisBackend
+
+LIMIT, PERIOD = 100, 60.0
+REQUEST_COST, COMMAND_COST = 20e-6, 2e-6
+
+
+class StandInRedis:
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.states = {}
+        self.round_trips = 0
+
+    async def _round_trip(self, commands):
+        self.round_trips += 1
+        await asyncio.sleep(self.rtt / 2)
+        # the server is busy (and single threaded); spin rather than sleep
+        deadline = time.perf_counter() + REQUEST_COST + COMMAND_COST * len(commands)
+        while time.perf_counter() < deadline:
+            pass
+        results = [self._eval(*args) for args in commands]
+        await asyncio.sleep(self.rtt / 2)
+        return results
+
+    async def script_load(self, script):
+        return "sha"
+
+    def _eval(self, key, limit, period, algorithm):
+        retry_after, state = ALGORITHMS[algorithm].step(self.states.get(key), time.monotonic(), int(limit), float(period))
+        if retry_after == 0:
+            self.states[key] = state
+        return repr(retry_after)
+
+    async def evalsha(self, sha, numkeys, *args):
+        return (await self._round_trip([args]))[0]
+
+    def pipeline(self, transaction=True):
+        redis, commands = self, []
+
+        class Pipeline:
+            def evalsha(self, sha, numkeys, *args):
+                commands.append(args)
+
+            async def execute(self, raise_on_error=True):
+                return await redis._round_trip(commands)
+
+        return Pipeline()
+
+
+def workload(n):
+    rng = random.Random(0)
+    return [f"abuser{rng.randrange(10)}" if rng.random() < 0.5 else f"client{rng.randrange(1000)}" for _ in range(n)]
+
+
+async def drive(backend, keys, rate):
+    samples = []
+
+    async def check(key):
+        started = time.perf_counter()
+        await backend.check(key, LIMIT, PERIOD, "gcra")
+        samples.append(time.perf_counter() - started)
+
+    per_ms = max(1, rate // 1000)
+    tasks, started = [], time.perf_counter()
+    for i in range(0, len(keys), per_ms):
+        # release each millisecond's arrivals at once
+        delay = started + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.extend(asyncio.ensure_future(check(key)) for key in keys[i:i + per_ms])
+    await asyncio.gather(*tasks)
+    return samples, time.perf_counter() - started
+
+
+def report(label, samples, elapsed, round_trips):
+    samples.sort()
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    print(f"{label:<24}: p50 {pick(0.5):6.3f} ms  p99 {pick(0.99):6.3f} ms  "
+          f"{len(samples) / elapsed:8.0f} checks/s  {round_trips:6d} round trips")
+
+
+async def real_redis():
+    try:
+        backend = RedisBackend()
+        await asyncio.wait_for(backend.client.ping(), 1)
+        return backend
+    except Exception:
+        return None
+
+
+def main(n=30_000, rate=5_000, rtt_us=200):
+    keys = workload(n)
+    print(f"{n} checks at {rate}/s, simulated rtt {rtt_us} us")
+    for label, pipeline, ttl in (("one call per check", False, 0.0),
+                                 ("local over-limit cache", False, 1.0),
+                                 ("pipelining", True, 0.0),
+                                 ("both", True, 1.0)):
+        redis = StandInRedis(rtt_us / 1e6)
+        backend = RedisBackend(client=redis, pipeline=pipeline, local_cache_ttl=ttl)
+        samples, elapsed = asyncio.run(drive(backend, keys, rate))
+        report(label, samples, elapsed, redis.round_trips)
+
+    backend = asyncio.run(real_redis())
+    if backend is None:
+        print(f"{'redis server':<24}: skipped, no server at {os.getenv('REDIS_URL', 'redis://localhost')}")
+    else:
+        samples, elapsed = asyncio.run(drive(backend, keys, rate))
+        report("redis server", samples, elapsed, -1)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
@@ -0,0 +1,56 @@
+"""Query latency of BM25, vector and hybrid retrieval (`src/retrieval.py`).
+
+Builds a synthetic corpus, indexes it with `BM25Index` and a FAISS store
+and times queries through `retrieve()` for each mode. The vector path
+uses a deterministic fake embedding, so the numbers exclude the OpenAI
+embedding round trip (typically 100-300 ms per query) that the real
+vector and hybrid modes pay and BM25 does not.
+
+    python benchmarks/bench_retrieval.py [n_chunks]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.bm25 import BM25Index
+from src.retrieval import retrieve
+
+VOCAB = [f"term{i}" for i in range(20000)]
+
+
+def make_corpus(n, words=120, seed=0):
+    rng = random.Random(seed)
+    return [
+        Document(page_content=" ".join(rng.choices(VOCAB, k=words)), metadata={"source": f"doc{i}", "page": i})
+        for i in range(n)
+    ]
+
+
+def main(n=20000, queries=200):
+    docs = make_corpus(n)
+    started = time.perf_counter()
+    index = BM25Index.from_documents(docs)
+    print(f"BM25 build: {n} chunks in {time.perf_counter() - started:.2f} s")
+    started = time.perf_counter()
+    store = FAISS.from_documents(docs, DeterministicFakeEmbedding(size=384))
+    print(f"FAISS build (fake embeddings): {time.perf_counter() - started:.2f} s")
+
+    rng = random.Random(1)
+    qs = [" ".join(rng.choices(VOCAB, k=6)) for _ in range(queries)]
+    for mode in ("bm25", "vector", "hybrid"):
+        started = time.perf_counter()
+        for q in qs:
+            retrieve(q, mode, vector_store=store, bm25_index=index, k=4)
+        per_query = (time.perf_counter() - started) / queries * 1000
+        print(f"{mode:>6}: {per_query:7.3f} ms/query (excluding embedding API)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -1,10 +1,13 @@
-from fastapi import FastAPI, Header
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Security
 from pydantic import BaseModel
 
+from src.auth import APIKeyAuth, ApiKey, KeyStore
+
 app = FastAPI()
 
 VALID_API_KEY = "MY_SECRET_KEY"
+API_KEYS = KeyStore.from_env(VALID_API_KEY)
+require_key = APIKeyAuth(API_KEYS)
 
 
 class QARequest(BaseModel):
@@ -12,9 +15,7 @@ class QARequest(BaseModel):
 
 
 @app.post("/qa")
-def qa_endpoint(payload: QARequest, x_api_key: str | None = Header(None)):
-    if x_api_key != VALID_API_KEY:
-        return JSONResponse(status_code=401, content={"message": "Invalid or missing API Key"})
+def qa_endpoint(payload: QARequest, key: ApiKey = Security(require_key)):
     # Simple deterministic response for tests
     return {"response": f"Answer generated for: {payload.query}"}
 
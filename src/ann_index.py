@@ -0,0 +1,187 @@
+"""Configurable FAISS index types for the RAG examples.
+
+`FAISS.from_documents` always builds an exact `IndexFlatL2`: query cost
+grows linearly with the corpus and memory is the full float32 matrix.
+This module builds approximate indexes instead when configured:
+
+- `flat`  : exact search (default, same as `FAISS.from_documents`)
+- `ivf`   : inverted lists over `nlist` k-means cells, `nprobe` probed per query
+- `hnsw`  : HNSW graph with `M` links per node, `ef_search` beam at query time
+- `pq`    : product quantization, `pq_m` sub-vectors of `pq_bits` bits each
+- `ivfpq` : IVF coarse quantizer with PQ-compressed residuals
+
+Trained index types are trained on a random sample of the vectors
+(`train_size`) before all vectors are added. k-means needs at least as
+many training vectors as centroids, so on small corpora the settings are
+scaled down (and logged): `nlist` to one cell per 39 training vectors
+(FAISS's own minimum) and `pq_bits` to `floor(log2(n))`; under two
+vectors PQ types fall back to flat codes.
+
+Settings come from keyword arguments or `FAISS_*` environment variables
+(`FAISS_INDEX_TYPE`, `FAISS_NLIST`, `FAISS_NPROBE`, `FAISS_HNSW_M`,
+`FAISS_EF_SEARCH`, `FAISS_PQ_M`, `FAISS_PQ_BITS`, `FAISS_TRAIN_SIZE`).
+`faiss` and `numpy` are imported lazily so importing this module stays
+cheap. See `benchmarks/bench_ann_index.py` for recall/latency/memory
+trade-offs.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import os
+import uuid
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "pq", "ivfpq")
+
+_ENV_PARAMS = {
+    "nlist": "FAISS_NLIST",
+    "nprobe": "FAISS_NPROBE",
+    "hnsw_m": "FAISS_HNSW_M",
+    "ef_search": "FAISS_EF_SEARCH",
+    "pq_m": "FAISS_PQ_M",
+    "pq_bits": "FAISS_PQ_BITS",
+    "train_size": "FAISS_TRAIN_SIZE",
+}
+
+
+def get_index_config(index_type: Optional[str] = None, **params) -> Dict[str, Any]:
+    """Merge explicit settings with `FAISS_*` environment variables.
+
+    Explicit (non-None) keyword arguments win over the environment.
+    """
+    if index_type is None:
+        index_type = os.environ.get("FAISS_INDEX_TYPE", "flat")
+    index_type = index_type.strip().lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type {index_type!r}; expected one of {', '.join(INDEX_TYPES)}")
+    config: Dict[str, Any] = {"index_type": index_type}
+    for name, env in _ENV_PARAMS.items():
+        value = params.get(name)
+        if value is None and os.environ.get(env):
+            value = int(os.environ[env])
+        config[name] = value
+    return config
+
+
+def default_nlist(n_vectors: int) -> int:
+    """Rule-of-thumb IVF cell count (~4 * sqrt(n)), at least 1."""
+    return max(1, int(4 * math.sqrt(n_vectors)))
+
+
+def factory_string(dim: int, n_vectors: int, config: Dict[str, Any]) -> str:
+    """Return the `faiss.index_factory` description for a config."""
+    index_type = config["index_type"]
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "hnsw":
+        return f"HNSW{config.get('hnsw_m') or 32}"
+
+    # the vectors k-means will actually be trained on
+    n_train = min(n_vectors, config.get("train_size") or n_vectors)
+    pq = ""
+    if index_type in ("pq", "ivfpq"):
+        pq_m = config.get("pq_m") or 8
+        pq_bits = config.get("pq_bits") or 8
+        if dim % pq_m:
+            raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {dim}")
+        # each sub-quantizer has 2**pq_bits centroids
+        max_bits = int(math.log2(n_train)) if n_train > 0 else 0
+        if pq_bits > max_bits:
+            logger.info("%d training vectors are too few for pq_bits=%d; using %s",
+                        n_train, pq_bits, f"pq_bits={max_bits}" if max_bits else "flat codes")
+            pq_bits = max_bits
+        if pq_bits:
+            pq = f"PQ{pq_m}x{pq_bits}"
+    if index_type == "pq":
+        return pq or "Flat"
+
+    nlist = config.get("nlist") or default_nlist(n_vectors)
+    max_nlist = max(1, n_train // 39)
+    if nlist > max_nlist:
+        logger.info("%d training vectors are too few for nlist=%d; using nlist=%d", n_train, nlist, max_nlist)
+        nlist = max_nlist
+    return f"IVF{nlist}," + (pq or "Flat")
+
+
+def build_faiss_index(vectors, config: Optional[Dict[str, Any]] = None, seed: int = 0):
+    """Build, train and fill a FAISS index for a `(n, dim)` float32 matrix."""
+    import faiss
+    import numpy as np
+
+    config = config or get_index_config()
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    n, dim = vectors.shape
+    index = faiss.index_factory(dim, factory_string(dim, n, config), faiss.METRIC_L2)
+
+    if not index.is_trained:
+        train_size = config.get("train_size") or max(10000, 64 * index_nlist(index))
+        if train_size < n:
+            sample = np.random.default_rng(seed).choice(n, size=train_size, replace=False)
+            index.train(vectors[np.sort(sample)])
+        else:
+            index.train(vectors)
+    index.add(vectors)
+    set_search_params(index, config)
+    return index
+
+
+def index_nlist(index) -> int:
+    """Return the IVF cell count of an index, or 1 for non-IVF indexes."""
+    import faiss
+
+    try:
+        return faiss.extract_index_ivf(index).nlist
+    except Exception:
+        return 1
+
+
+def set_search_params(index, config: Dict[str, Any]) -> None:
+    """Apply query-time parameters (`nprobe`, `ef_search`) to an index."""
+    import faiss
+
+    space = faiss.ParameterSpace()
+    if config["index_type"] in ("ivf", "ivfpq"):
+        space.set_index_parameter(index, "nprobe", config.get("nprobe") or 8)
+    if config["index_type"] == "hnsw":
+        space.set_index_parameter(index, "efSearch", config.get("ef_search") or 64)
+
+
+def build_vector_store(
+    docs: Sequence[Any],
+    embeddings: Any,
+    vectorstore_cls: Any,
+    index_type: Optional[str] = None,
+    ids: Optional[Sequence[str]] = None,
+    **params,
+):
+    """Index documents in a LangChain FAISS store using the configured index type.
+
+    `vectorstore_cls` is the FAISS vector store class of the calling
+    module, so callers (and tests) keep control over which implementation
+    is used. The flat type simply delegates to `from_documents`. `ids`
+    optionally sets the docstore id of each document.
+    """
+    config = get_index_config(index_type, **params)
+    if config["index_type"] == "flat":
+        if ids is not None:
+            return vectorstore_cls.from_documents(docs, embeddings, ids=list(ids))
+        return vectorstore_cls.from_documents(docs, embeddings)
+
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    docs = list(docs)
+    texts = [doc.page_content for doc in docs]
+    # local backends (src.embeddings) can hand over the float32 matrix directly
+    embed_array = getattr(embeddings, "embed_array", None)
+    vectors = embed_array(texts) if embed_array else embeddings.embed_documents(texts)
+    index = build_faiss_index(vectors, config)
+    ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in docs]
+    return vectorstore_cls(
+        embeddings,
+        index,
+        InMemoryDocstore(dict(zip(ids, docs))),
+        dict(enumerate(ids)),
+    )
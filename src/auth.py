@@ -0,0 +1,229 @@
+"""API key verification shared by the FastAPI examples.
+
+Keys live in a JSON file (`API_KEYS_FILE`), one entry per key with its
+metadata:
+
+    {"keys": [
+        {"sha256": "9f86d081...", "tenant": "acme", "quota": "100/minute"},
+        {"key": "dev-only-plaintext-key", "tenant": "dev"}
+    ]}
+
+An entry gives either the key itself (`key`) or, better, its SHA-256 in
+hex (`sha256`), so the file never holds usable keys; `python -m
+src.auth new --tenant acme --file keys.json` creates a key and appends
+its hashed entry. Other fields are kept as metadata; `tenant` and
+`quota` (a rate like `"100/minute"`) are the common ones. Without a file
+each app accepts its single built-in key (`VALID_API_KEY`,
+`SERVICE_API_KEY`).
+
+`KeyStore.verify()` hashes the presented key and looks the digest up in
+a dict: O(1) whatever the number of keys, and since only digests are
+compared, the time taken does not depend on how much of a wrong key
+matches a real one.
+
+The file is checked for changes (mtime, size, inode) at most every
+`API_KEYS_RELOAD` seconds (default 1) on the next verification, and a
+changed file is loaded into a new table that replaces the old one in a
+single assignment; requests in flight keep using the table they
+started with. A file that fails to load is logged and the previous keys
+stay in effect.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+from fastapi import HTTPException, Security, status
+from fastapi.security.api_key import APIKeyHeader
+
+logger = logging.getLogger("auth")
+
+
+class ApiKey(NamedTuple):
+    """A known key: its id (`key:` + start of the hash) and metadata."""
+
+    key_id: str
+    tenant: Optional[str] = None
+    quota: Optional[str] = None
+    metadata: Dict[str, Any] = {}
+
+
+def hash_key(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _parse(entries: Iterable[Dict[str, Any]]) -> Dict[bytes, ApiKey]:
+    table: Dict[bytes, ApiKey] = {}
+    for entry in entries:
+        entry = dict(entry)
+        if "sha256" in entry:
+            digest = bytes.fromhex(entry.pop("sha256"))
+            entry.pop("key", None)
+        elif "key" in entry:
+            digest = hashlib.sha256(str(entry.pop("key")).encode("utf-8")).digest()
+        else:
+            raise ValueError(f"API key entry without 'key' or 'sha256': {entry!r}")
+        if len(digest) != 32:
+            raise ValueError(f"bad sha256 for API key entry {entry!r}")
+        key_id = entry.pop("id", None) or "key:" + digest.hex()[:16]
+        table[digest] = ApiKey(key_id, entry.pop("tenant", None), entry.pop("quota", None), entry)
+    return table
+
+
+class KeyStore:
+    """A hashed lookup table of API keys, reloaded when its file changes."""
+
+    def __init__(
+        self,
+        keys: Iterable[Dict[str, Any]] = (),
+        path: Optional[str] = None,
+        reload_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.clock = clock
+        self.reloads = 0
+        self._table = _parse(keys)
+        self._signature: Optional[tuple] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        if path is not None:
+            self.reload()
+
+    @classmethod
+    def from_env(cls, default_key: Optional[str] = None) -> "KeyStore":
+        """Keys from `API_KEYS_FILE`, or just `default_key` without one."""
+        path = os.getenv("API_KEYS_FILE")
+        reload_interval = float(os.getenv("API_KEYS_RELOAD", "1.0"))
+        if path:
+            return cls(path=path, reload_interval=reload_interval)
+        return cls([{"key": default_key}] if default_key else [], reload_interval=reload_interval)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def _stat(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def reload(self) -> bool:
+        """Load the file if it changed since the last load; True if it did."""
+        with self._lock:
+            self._next_check = self.clock() + self.reload_interval
+            signature = self._stat()
+            if signature == self._signature:
+                return False
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                table = _parse(data["keys"] if isinstance(data, dict) else data)
+            except (OSError, ValueError, KeyError, TypeError) as exc:
+                logger.error("Keeping the previous API keys; could not load %s: %s", self.path, exc)
+                self._signature = signature  # do not retry until it changes again
+                return False
+            self._table = table
+            self._signature = signature
+            self.reloads += 1
+            logger.info("Loaded %d API keys from %s", len(table), self.path)
+            return True
+
+    def verify(self, key: Optional[str]) -> Optional[ApiKey]:
+        """The entry for `key`, or None if it is missing or unknown."""
+        if self.path is not None and self.clock() >= self._next_check:
+            self.reload()
+        if not key:
+            return None
+        # the table is keyed by digest, so the lookup compares hashes, never
+        # the key itself: its time says nothing about a partial match
+        return self._table.get(hashlib.sha256(key.encode("utf-8")).digest())
+
+
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+
+class APIKeyAuth:
+    """FastAPI dependency: the `ApiKey` for the `X-API-Key` header, else 401.
+
+        require_key = APIKeyAuth(KeyStore.from_env("MY_SECRET_KEY"))
+
+        @app.get("/items")
+        def items(key: ApiKey = Security(require_key)): ...
+
+    Failed attempts are logged to `log` (if given) with the first 64
+    characters of the key.
+    """
+
+    def __init__(self, store: KeyStore, detail: str = "Invalid or missing API Key", log: Optional[logging.Logger] = None):
+        self.store = store
+        self.detail = detail
+        self.log = log
+
+    def __call__(self, api_key: Optional[str] = Security(api_key_header)) -> ApiKey:
+        entry = self.store.verify(api_key)
+        if entry is None:
+            if self.log is not None:
+                self.log.error(
+                    "Unauthorized access attempt with API key: %s",
+                    api_key if api_key is None else api_key[:64],
+                    extra={"dedup_key": "unauthorized"},
+                )
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=self.detail)
+        return entry
+
+
+def add_key(path: str, tenant: Optional[str] = None, quota: Optional[str] = None) -> str:
+    """Create a key, append its hashed entry to the file at `path`, return the key."""
+    key = secrets.token_urlsafe(32)
+    data: Any = {"keys": []}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    entries = data["keys"] if isinstance(data, dict) else data
+    entry: Dict[str, Any] = {"sha256": hash_key(key)}
+    if tenant:
+        entry["tenant"] = tenant
+    if quota:
+        entry["quota"] = quota
+    entries.append(entry)
+    # write a new file and rename it over the old one, so a reload never
+    # sees a half-written file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+    return key
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the API keys file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    new = sub.add_parser("new", help="create a key and add its hash to the file")
+    new.add_argument("--file", default=os.getenv("API_KEYS_FILE", "api_keys.json"))
+    new.add_argument("--tenant")
+    new.add_argument("--quota", help="e.g. 100/minute")
+    hashed = sub.add_parser("hash", help="print the sha256 entry value of a key")
+    hashed.add_argument("key")
+    args = parser.parse_args(argv)
+
+    if args.command == "hash":
+        print(hash_key(args.key))
+    else:
+        print(add_key(args.file, args.tenant, args.quota))
+        print(f"added to {args.file}; the key is not stored, keep it now", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
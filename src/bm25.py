@@ -0,0 +1,146 @@
+"""Local BM25 keyword retrieval and reciprocal rank fusion.
+
+This module provides a small in-memory inverted index scored with Okapi
+BM25. It is built at ingestion time from the same chunks that go into the
+vector store and answers queries without any network calls, which makes
+it usable on its own as an offline retrieval mode and as the keyword half
+of hybrid retrieval.
+
+`reciprocal_rank_fusion` merges several ranked result lists (for example
+BM25 hits and FAISS `similarity_search` hits) into one ranking.
+
+Documents are only required to expose `page_content` and, optionally, a
+`metadata` dict, so LangChain `Document` objects and lightweight test
+doubles both work.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring.
+
+    Postings map each term to parallel lists of document positions and
+    term frequencies, so a query only touches documents that contain at
+    least one query term.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, tokenizer: Callable[[str], List[str]] = tokenize):
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = tokenizer
+        self.docs: List[Any] = []
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._doc_lens: List[int] = []
+        self._total_len = 0
+        # per-document length normalisation, recomputed lazily after adds
+        self._norms: Optional[List[float]] = None
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[Any], **kwargs) -> "BM25Index":
+        index = cls(**kwargs)
+        index.add_documents(docs)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add_documents(self, docs: Iterable[Any]) -> None:
+        """Tokenize and index documents; each document is tokenized once."""
+        for doc in docs:
+            pos = len(self.docs)
+            tokens = self.tokenizer(getattr(doc, "page_content", "") or "")
+            self.docs.append(doc)
+            self._doc_lens.append(len(tokens))
+            self._total_len += len(tokens)
+            for term, tf in Counter(tokens).items():
+                ids, tfs = self._postings.setdefault(term, ([], []))
+                ids.append(pos)
+                tfs.append(tf)
+        self._norms = None
+
+    def _length_norms(self) -> List[float]:
+        if self._norms is None:
+            avgdl = (self._total_len / len(self._doc_lens)) if self._doc_lens else 0.0
+            k1, b = self.k1, self.b
+            if avgdl:
+                self._norms = [k1 * (1 - b + b * n / avgdl) for n in self._doc_lens]
+            else:
+                self._norms = [k1] * len(self._doc_lens)
+        return self._norms
+
+    def idf(self, term: str) -> float:
+        postings = self._postings.get(term)
+        df = len(postings[0]) if postings else 0
+        n = len(self.docs)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search_with_scores(self, query: str, k: int = 4) -> List[Tuple[Any, float]]:
+        """Return up to `k` `(document, score)` pairs, best first."""
+        if not self.docs or k <= 0:
+            return []
+        norms = self._length_norms()
+        k1 = self.k1
+        scores: Dict[int, float] = {}
+        for term in set(self.tokenizer(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for pos, tf in zip(*postings):
+                scores[pos] = scores.get(pos, 0.0) + idf * tf * (k1 + 1) / (tf + norms[pos])
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.docs[pos], score) for pos, score in best]
+
+    def search(self, query: str, k: int = 4) -> List[Any]:
+        """Return up to `k` documents ranked by BM25 score."""
+        return [doc for doc, _ in self.search_with_scores(query, k)]
+
+
+def doc_key(doc: Any) -> Hashable:
+    """Identity used to merge the same chunk coming from different retrievers.
+
+    Vector stores usually return copies of the indexed documents, so
+    object identity is not enough; content plus source/page is.
+    """
+    meta = getattr(doc, "metadata", None)
+    if not isinstance(meta, dict):
+        meta = {}
+    return (getattr(doc, "page_content", None), str(meta.get("source")), str(meta.get("page")))
+
+
+def reciprocal_rank_fusion(
+    result_lists: Sequence[Sequence[Any]],
+    k: int = 60,
+    limit: Optional[int] = None,
+    key: Callable[[Any], Hashable] = doc_key,
+) -> List[Any]:
+    """Fuse ranked lists with reciprocal rank fusion.
+
+    Each document scores `sum(1 / (k + rank))` over the lists it appears
+    in (rank starts at 1). The first occurrence of a document is the one
+    returned.
+    """
+    scores: Dict[Hashable, float] = {}
+    first_seen: Dict[Hashable, Any] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            doc_id = key(doc)
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+            first_seen.setdefault(doc_id, doc)
+    ranked = sorted(scores, key=scores.__getitem__, reverse=True)
+    if limit is not None:
+        ranked = ranked[:limit]
+    return [first_seen[doc_id] for doc_id in ranked]
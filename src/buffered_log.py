@@ -0,0 +1,195 @@
+"""Buffered, batched append-only log file writer.
+
+`BufferedLogWriter` collects log lines in a bounded in-memory ring buffer
+and a single background thread appends them to the file in batches,
+once `flush_lines` lines are waiting or `flush_interval` seconds have
+passed, whichever comes first. Callers never touch the file, so a
+request handler pays for a deque append instead of an open/write/close.
+
+- Each batch is one `os.write` on a descriptor opened with `O_APPEND`,
+  so lines from several worker processes writing the same file never
+  interleave mid-line.
+- When the file grows past `max_bytes` it is rotated like
+  `logging.handlers.RotatingFileHandler` (`api_logs.txt.1`, `.2`, ...
+  up to `backup_count`). If another process rotated the file, the writer
+  notices the new inode and reopens it before the next batch.
+- When the buffer is full, `write()` blocks until the writer catches up
+  (the default) or, with `drop_when_full=True`, drops the line and counts
+  it in `dropped`. A batch that fails to write (disk full) is logged and
+  counted in `errors`.
+- `close()` flushes everything that was written; writers still open at
+  interpreter exit are closed by an `atexit` hook.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+import weakref
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_open_writers: "weakref.WeakSet[BufferedLogWriter]" = weakref.WeakSet()
+
+
+class BufferedLogWriter:
+    """Append lines to `path` from a background thread, in batches."""
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = 65536,
+        flush_lines: int = 1024,
+        flush_interval: float = 1.0,
+        max_bytes: int = 0,
+        backup_count: int = 5,
+        drop_when_full: bool = False,
+    ):
+        self.path = os.path.abspath(path)
+        self.capacity = capacity
+        self.flush_lines = min(flush_lines, capacity)
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.drop_when_full = drop_when_full
+        self.dropped = 0
+        self.errors = 0
+        self._buffer: deque = deque()
+        self._cond = threading.Condition()
+        self._enqueued = 0  # lines accepted so far
+        self._written = 0  # lines on disk so far
+        self._closed = False
+        self._flush_pending = False
+        self._fd: Optional[int] = None
+        self._thread = threading.Thread(target=self._run, name="buffered-log-writer", daemon=True)
+        self._thread.start()
+        _open_writers.add(self)
+
+    def write(self, line: str) -> None:
+        """Queue one line (a trailing newline is added if missing)."""
+        if not line.endswith("\n"):
+            line += "\n"
+        with self._cond:
+            if self._closed:
+                raise ValueError("write to a closed BufferedLogWriter")
+            while len(self._buffer) >= self.capacity:
+                if self.drop_when_full:
+                    self.dropped += 1
+                    return
+                self._cond.notify_all()
+                self._cond.wait()
+                if self._closed:
+                    raise ValueError("write to a closed BufferedLogWriter")
+            self._buffer.append(line)
+            self._enqueued += 1
+            if len(self._buffer) >= self.flush_lines:
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every line queued before the call is on disk.
+
+        Returns False if `timeout` expired first.
+        """
+        with self._cond:
+            target = self._enqueued
+            self._flush_pending = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target or not self._thread.is_alive(), timeout)
+
+    def close(self) -> None:
+        """Flush the buffer, stop the writer thread and close the file."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        _open_writers.discard(self)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __enter__(self) -> "BufferedLogWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(self._batch_ready, self.flush_interval)
+                    batch = list(self._buffer)
+                    self._buffer.clear()
+                    self._flush_pending = False
+                    closing = self._closed
+                    # producers blocked on a full buffer can continue
+                    self._cond.notify_all()
+                if batch:
+                    try:
+                        self._write_batch("".join(batch).encode("utf-8"))
+                    except OSError:
+                        # keep serving producers; the batch is lost
+                        logger.exception("Failed to write %d log lines to %s", len(batch), self.path)
+                        self.errors += 1
+                with self._cond:
+                    self._written += len(batch)
+                    self._cond.notify_all()
+                if closing:
+                    return
+        finally:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _batch_ready(self) -> bool:
+        return self._closed or len(self._buffer) >= self.flush_lines or (self._flush_pending and bool(self._buffer))
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _write_batch(self, data: bytes) -> None:
+        if self._fd is None:
+            self._open()
+        else:
+            # reopen if another process rotated or removed the file
+            try:
+                same = os.stat(self.path).st_ino == os.fstat(self._fd).st_ino
+            except FileNotFoundError:
+                same = False
+            if not same:
+                os.close(self._fd)
+                self._open()
+        size = os.fstat(self._fd).st_size
+        if self.max_bytes and size and size + len(data) > self.max_bytes:
+            self._rotate()
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view):]
+
+    def _rotate(self) -> None:
+        os.close(self._fd)
+        self._fd = None
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+
+@atexit.register
+def _close_open_writers() -> None:
+    for writer in list(_open_writers):
+        writer.close()
@@ -0,0 +1,90 @@
+"""Append-only JSONL files used as checkpoints and caches by the bulk runners.
+
+Each line is one JSON object carrying a key field. `JsonlCheckpoint`
+loads the existing records on start, so a run that crashed can resume
+without redoing finished work, and appends new records as they complete.
+A partially written last line (from a crash mid-write) is ignored and
+the file is repaired before the next append.
+
+Lines are flushed as they are written, which survives a process crash;
+pass `fsync=True` to also survive a power loss at the cost of one disk
+sync per record.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+
+class JsonlCheckpoint:
+    """Records keyed by `record[key]`, persisted to a JSONL file.
+
+    Later lines win when a key appears more than once. Safe to append
+    from several threads.
+    """
+
+    def __init__(self, path: str, key: str = "id", fsync: bool = False):
+        self.path = path
+        self.key = key
+        self.fsync = fsync
+        self.records: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._needs_newline = False
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+        self._needs_newline = bool(data) and not data.endswith(b"\n")
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn write
+            if isinstance(record, dict) and self.key in record:
+                self.records[record[self.key]] = record
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, key: Any, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return self.records.get(key, default)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Persist one record and remember it."""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+                if self._needs_newline:
+                    # end the torn line once; later opens append after it
+                    self._file.write("\n")
+                    self._needs_newline = False
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.records[record[self.key]] = record
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "JsonlCheckpoint":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,203 @@
+"""Token-aware chunking for the RAG examples.
+
+`CharacterTextSplitter` cuts on a character budget, so chunk sizes in
+tokens vary widely: short chunks waste embedding calls and long ones
+crowd the stuff-chain context. `TokenChunker` packs whole sentences into
+chunks up to a token budget instead:
+
+- text is segmented into sentence units (paragraph breaks preserved);
+- every unit is tokenized exactly once; chunk boundaries and the overlap
+  carried into the next chunk are computed from the per-unit counts in a
+  single linear pass, without re-tokenizing overlapping text;
+- only sentences longer than the budget are split further, on words.
+
+`split_documents` keeps chunks within one document (page), matching the
+LangChain splitter interface. `split_stream` consumes an iterable of pages
+lazily and lets chunks span page boundaries, so long PDFs can be chunked
+without materialising all pages.
+
+Tokens are counted with `tiktoken` when installed, otherwise with a
+dependency-free approximation (about four characters per token).
+`make_splitter()` picks the splitter from `RAG_SPLITTER` (`token`, the
+default, or `character`).
+"""
+from __future__ import annotations
+
+import os
+import re
+from collections import deque
+from typing import Any, Callable, Deque, Iterable, Iterator, List, NamedTuple, Optional
+
+try:
+    from langchain_core.documents import Document  # type: ignore
+except Exception:
+    class Document:  # type: ignore[no-redef]
+        """Minimal stand-in used when langchain_core is not installed."""
+
+        def __init__(self, page_content: str, metadata: Optional[dict] = None):
+            self.page_content = page_content
+            self.metadata = metadata or {}
+
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+# words are cut into pieces of at most four characters, punctuation counts once
+_APPROX_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, treating blank lines as boundaries too."""
+    return [s for paragraph in _PARAGRAPH_RE.split(text) for s in _SENTENCE_RE.split(paragraph.strip()) if s]
+
+
+def approx_token_count(text: str) -> int:
+    """Approximate BPE token count: ~4 characters per word-piece."""
+    return len(_APPROX_TOKEN_RE.findall(text))
+
+
+def default_token_counter(encoding: str = "cl100k_base") -> Callable[[str], int]:
+    """Return a tiktoken-based counter, or the approximation without tiktoken."""
+    try:
+        import tiktoken  # type: ignore
+
+        enc = tiktoken.get_encoding(encoding)
+    except Exception:
+        return approx_token_count
+    return lambda text: len(enc.encode_ordinary(text))
+
+
+class _Unit(NamedTuple):
+    text: str
+    tokens: int
+    metadata: Any
+
+
+class TokenChunker:
+    """Pack sentences into chunks of at most `chunk_tokens` tokens.
+
+    Consecutive chunks share up to `overlap_tokens` tokens of whole
+    sentences.
+    """
+
+    def __init__(self, chunk_tokens: int = 256, overlap_tokens: int = 32, count_tokens: Optional[Callable[[str], int]] = None):
+        if chunk_tokens <= 0:
+            raise ValueError("chunk_tokens must be positive")
+        if not 0 <= overlap_tokens < chunk_tokens:
+            raise ValueError("overlap_tokens must be in [0, chunk_tokens)")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = count_tokens or default_token_counter()
+
+    # -- segmentation -------------------------------------------------
+    def _units(self, text: str, metadata: Any) -> Iterator[_Unit]:
+        for paragraph in _PARAGRAPH_RE.split(text):
+            sentences = [s for s in _SENTENCE_RE.split(paragraph.strip()) if s]
+            for i, sentence in enumerate(sentences):
+                sep = "\n\n" if i == len(sentences) - 1 else " "
+                tokens = self.count_tokens(sentence)
+                if tokens <= self.chunk_tokens:
+                    yield _Unit(sentence + sep, tokens, metadata)
+                else:
+                    yield from self._split_long(sentence, sep, metadata)
+
+    def _split_long(self, sentence: str, sep: str, metadata: Any) -> Iterator[_Unit]:
+        """Split an over-long sentence into word runs that fit the budget."""
+        words = sentence.split()
+        piece: List[str] = []
+        tokens = 0
+        for word in words:
+            n = self.count_tokens(word)
+            if piece and tokens + n > self.chunk_tokens:
+                yield _Unit(" ".join(piece) + " ", tokens, metadata)
+                piece, tokens = [], 0
+            piece.append(word)
+            tokens += n
+        if piece:
+            yield _Unit(" ".join(piece) + sep, tokens, metadata)
+
+    # -- packing ------------------------------------------------------
+    def _pack(self, units: Iterable[_Unit]) -> Iterator[_Unit]:
+        """Greedily pack units into chunks in one pass over the units."""
+        window: Deque[_Unit] = deque()
+        total = 0
+        for unit in units:
+            if window and total + unit.tokens > self.chunk_tokens:
+                yield self._emit(window, total)
+                # keep a tail of whole units as overlap, using cached counts
+                kept = 0
+                keep_from = len(window)
+                for i in range(len(window) - 1, -1, -1):
+                    n = window[i].tokens
+                    if kept + n > self.overlap_tokens or kept + n + unit.tokens > self.chunk_tokens:
+                        break
+                    kept += n
+                    keep_from = i
+                for _ in range(keep_from):
+                    window.popleft()
+                total = kept
+            window.append(unit)
+            total += unit.tokens
+        # every emit is followed by an append, so a non-empty window always
+        # ends with a unit no chunk has held yet, never with overlap alone
+        if window:
+            yield self._emit(window, total)
+
+    @staticmethod
+    def _emit(window: Deque[_Unit], total: int) -> _Unit:
+        return _Unit("".join(u.text for u in window).strip(), total, window[0].metadata)
+
+    # -- public API ---------------------------------------------------
+    def split_text(self, text: str) -> List[str]:
+        return [chunk.text for chunk in self._pack(self._units(text, None))]
+
+    def _document(self, chunk: _Unit) -> Any:
+        metadata = dict(chunk.metadata or {})
+        metadata["tokens"] = chunk.tokens
+        return Document(page_content=chunk.text, metadata=metadata)
+
+    def split_documents(self, docs: Iterable[Any]) -> List[Any]:
+        """Chunk each document separately, copying its metadata."""
+        out = []
+        for doc in docs:
+            units = self._units(getattr(doc, "page_content", "") or "", getattr(doc, "metadata", None))
+            out.extend(self._document(chunk) for chunk in self._pack(units))
+        return out
+
+    def split_stream(self, pages: Iterable[Any]) -> Iterator[Any]:
+        """Lazily chunk a stream of pages; chunks may span pages.
+
+        Each chunk carries the metadata of the page it starts on.
+        """
+        def units() -> Iterator[_Unit]:
+            for page in pages:
+                yield from self._units(getattr(page, "page_content", "") or "", getattr(page, "metadata", None))
+
+        for chunk in self._pack(units()):
+            yield self._document(chunk)
+
+
+def make_splitter(
+    chunk_tokens: int,
+    overlap_tokens: int,
+    character_factory: Optional[Callable[[], Any]] = None,
+    kind: Optional[str] = None,
+):
+    """Return the splitter selected by `RAG_SPLITTER`.
+
+    `token` (default) returns a `TokenChunker`; `RAG_CHUNK_TOKENS` and
+    `RAG_CHUNK_OVERLAP_TOKENS` override the budgets. `character` calls
+    `character_factory`, the caller's configured `CharacterTextSplitter`.
+    """
+    if kind is None:
+        kind = os.environ.get("RAG_SPLITTER", "token")
+    kind = kind.strip().lower()
+    if kind == "character":
+        if character_factory is None:
+            raise ValueError("The character splitter needs a character_factory")
+        return character_factory()
+    if kind != "token":
+        raise ValueError(f"Unknown splitter {kind!r}; expected 'token' or 'character'")
+    return TokenChunker(
+        chunk_tokens=int(os.environ.get("RAG_CHUNK_TOKENS", chunk_tokens)),
+        overlap_tokens=int(os.environ.get("RAG_CHUNK_OVERLAP_TOKENS", overlap_tokens)),
+    )
@@ -0,0 +1,166 @@
+"""Post-retrieval re-ranking and context compression for the RAG examples.
+
+The stuff chains in day20/day21 paste every retrieved chunk, in full,
+into the prompt, so prompt tokens (and latency and cost) grow with `k`.
+When `RAG_COMPRESSION` is enabled the retriever is wrapped so that it:
+
+1. fetches `RAG_RERANK_FETCH_K` candidates (default `3 * k`) from the
+   underlying retriever;
+2. re-ranks them with a cheap local scorer: reciprocal rank fusion of the
+   retriever's order with BM25 over the candidates (`src.bm25`). No model
+   and no network calls are needed;
+3. keeps the best `k` and trims each one to its most query-relevant
+   sentences (BM25 over the candidates' sentences), in reading order,
+   until `RAG_CONTEXT_TOKENS` (default 1000) is spent.
+
+Every call logs the prompt tokens before and after compression and the
+time the stage took (logger `compression`).
+"""
+from __future__ import annotations
+
+import copy
+import logging
+import os
+import time
+import types
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.bm25 import BM25Index, reciprocal_rank_fusion
+from src.chunking import default_token_counter, split_sentences
+from src.retrieval import SearchRetriever
+
+logger = logging.getLogger("compression")
+
+
+def compression_enabled() -> bool:
+    return os.environ.get("RAG_COMPRESSION", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def rerank(query: str, docs: List[Any]) -> List[Any]:
+    """Fuse the incoming order of `docs` with their BM25 order for `query`."""
+    if len(docs) < 2:
+        return list(docs)
+    keyword_order = BM25Index.from_documents(docs).search(query, k=len(docs))
+    # identity keys: candidates are distinct objects, possibly with equal
+    # text; listing the BM25 order first lets it break ties
+    return reciprocal_rank_fusion([keyword_order, docs], key=id)
+
+
+def compress_documents(
+    query: str,
+    docs: List[Any],
+    top_n: int = 4,
+    budget: int = 1000,
+    count_tokens: Optional[Callable[[str], int]] = None,
+    min_score_ratio: float = 0.25,
+) -> Tuple[List[Any], Dict[str, int]]:
+    """Re-rank `docs`, keep `top_n` and trim them to `budget` tokens in total.
+
+    Within each kept document, sentences scoring at least
+    `min_score_ratio` times the best sentence score (so matches on common
+    words alone do not count) are chosen best first and emitted in their
+    original order; a document without such sentences contributes its
+    first sentence. Documents are
+    copies: the indexed originals are never modified. Returns the
+    documents and a stats dict; `tokens_before` counts the first `top_n`
+    documents as retrieved, i.e. the uncompressed prompt context.
+    """
+    count_tokens = count_tokens or default_token_counter()
+    # what the stuff chain would receive without this stage
+    tokens_before = sum(count_tokens(getattr(d, "page_content", "") or "") for d in docs[:top_n])
+    ranked = rerank(query, docs)[:top_n]
+
+    # score every sentence of the kept candidates against the query
+    sentences = []
+    for rank, doc in enumerate(ranked):
+        for pos, text in enumerate(split_sentences(getattr(doc, "page_content", "") or "")):
+            sentences.append(types.SimpleNamespace(page_content=text, rank=rank, pos=pos, tokens=count_tokens(text)))
+    scored = BM25Index.from_documents(sentences).search_with_scores(query, k=len(sentences))
+    best_by_doc: Dict[int, List[Any]] = {rank: [] for rank in range(len(ranked))}
+    cutoff = scored[0][1] * min_score_ratio if scored else 0.0
+    for sentence, score in scored:
+        if score >= cutoff:
+            best_by_doc[sentence.rank].append(sentence)
+    first_by_doc = {}
+    for sentence in sentences:
+        first_by_doc.setdefault(sentence.rank, sentence)
+
+    out: List[Any] = []
+    remaining = budget
+    for rank, doc in enumerate(ranked):
+        chosen = []
+        fallback = [first_by_doc[rank]] if rank in first_by_doc else []
+        for sentence in best_by_doc[rank] or fallback:
+            if sentence.tokens <= remaining:
+                chosen.append(sentence)
+                remaining -= sentence.tokens
+        if not chosen:
+            continue
+        chosen.sort(key=lambda s: s.pos)
+        trimmed = copy.copy(doc)
+        trimmed.page_content = " ".join(s.page_content for s in chosen)
+        meta = getattr(doc, "metadata", None)
+        if isinstance(meta, dict):
+            trimmed.metadata = dict(meta)
+        out.append(trimmed)
+
+    stats = {
+        "candidates": len(docs),
+        "docs": len(out),
+        "tokens_before": tokens_before,
+        "tokens_after": budget - remaining,
+    }
+    return out, stats
+
+
+def compression_settings(k: int) -> Tuple[int, int]:
+    """Return `(fetch_k, budget)` for `k` results from the environment."""
+    fetch_k = int(os.environ.get("RAG_RERANK_FETCH_K", 3 * k))
+    budget = int(os.environ.get("RAG_CONTEXT_TOKENS", "1000"))
+    return fetch_k, budget
+
+
+def compress_and_log(
+    query: str,
+    candidates: List[Any],
+    top_n: int,
+    budget: int,
+    count_tokens: Optional[Callable[[str], int]] = None,
+    started: Optional[float] = None,
+) -> List[Any]:
+    """`compress_documents`, logging the token counts and the time since
+    `started` (a `time.perf_counter()` value, default: now)."""
+    started = time.perf_counter() if started is None else started
+    docs, stats = compress_documents(query, candidates, top_n=top_n, budget=budget, count_tokens=count_tokens)
+    logger.info(
+        "Context tokens %d -> %d (%d docs from %d candidates) in %.1f ms",
+        stats["tokens_before"], stats["tokens_after"], stats["docs"], stats["candidates"],
+        (time.perf_counter() - started) * 1000,
+    )
+    return docs
+
+
+def _invoke(retriever: Any, query: str) -> List[Any]:
+    if hasattr(retriever, "invoke"):
+        return retriever.invoke(query)
+    return retriever.get_relevant_documents(query)
+
+
+def compressing_retriever(make_base: Callable[[int], Any], k: int = 4):
+    """Return the retriever for `k` results, compressed when enabled.
+
+    `make_base(n)` builds the underlying retriever returning `n`
+    documents. Without `RAG_COMPRESSION` this is simply `make_base(k)`.
+    """
+    if not compression_enabled():
+        return make_base(k)
+    fetch_k, budget = compression_settings(k)
+    base = make_base(fetch_k)
+    count_tokens = default_token_counter()
+
+    def search(query: str, top_k: int) -> List[Any]:
+        started = time.perf_counter()
+        candidates = _invoke(base, query)
+        return compress_and_log(query, candidates, top_k, budget, count_tokens, started)
+
+    return SearchRetriever(search=search, k=k)
@@ -1,35 +1,216 @@
+"""
+day16.py
+---------
+Two-step LLM pipeline: summarize a text, then extract keywords from the
+summary, chained with `SequentialChain`.
+
+Developer notes:
+- Importing this module does no work; build a `SummaryKeywordPipeline`
+  (optionally with your own LLM) and call `run(text)`, or use the CLI:
+  `python -m src.day16 [--text TEXT] [--file PATH ...]`.
+- The LLM comes from the shared `make_chat_llm` helper so tests can
+  monkeypatch it to return a dummy LLM.
+- `run_bulk()` processes many documents with the two stages pipelined
+  and bounded concurrency per stage, checkpointing finished documents
+  to a JSONL file so an interrupted run resumes where it stopped:
+  `python -m src.day16 --input-dir docs/ --output results.jsonl`.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from langchain.chains import LLMChain, SequentialChain
 from langchain.prompts import PromptTemplate
 
+from src.checkpoint import JsonlCheckpoint
 from src.utils import make_chat_llm
 
-# Instantiate an LLM using the shared helper so tests can monkeypatch
-# make_chat_llm to return a dummy LLM.
-llm = make_chat_llm(model_name="gpt-4o", temperature=0)
-if llm is None:
-    raise RuntimeError("ChatOpenAI is not available or OPENAI_API_KEY is missing")
+logger = logging.getLogger("day16")
+
+SUMMARY_TEMPLATE = "Summarize the following text briefly:\n\n{text}"
+KEYWORD_TEMPLATE = "Extract keywords from this summary, separated by commas:\n\n{summary}"
+
+SAMPLE_TEXT = "LangChain is an open-source framework that simplifies building applications with large language models by managing prompts, chains, agents, and integrations."
+
+
+class SummaryKeywordPipeline:
+    """Summary -> keywords chain around one LLM.
+
+    `summary_chain` and `keyword_chain` are exposed so callers can run
+    the stages separately; `run()` runs both through the sequential chain.
+    """
+
+    def __init__(self, llm=None):
+        if llm is None:
+            llm = make_chat_llm(model_name="gpt-4o", temperature=0)
+            if llm is None:
+                raise RuntimeError("ChatOpenAI is not available or OPENAI_API_KEY is missing")
+        self.llm = llm
+
+        summary_prompt = PromptTemplate(input_variables=["text"], template=SUMMARY_TEMPLATE)
+        self.summary_chain = LLMChain(llm=llm, prompt=summary_prompt, output_key="summary")
+
+        keyword_prompt = PromptTemplate(input_variables=["summary"], template=KEYWORD_TEMPLATE)
+        self.keyword_chain = LLMChain(llm=llm, prompt=keyword_prompt, output_key="keywords")
+
+        self.chain = SequentialChain(
+            chains=[self.summary_chain, self.keyword_chain],
+            input_variables=["text"],
+            output_variables=["summary", "keywords"]
+        )
+
+    def run(self, text):
+        """Return `{"summary": ..., "keywords": ...}` for one text."""
+        result = self.chain({"text": text})
+        return {"summary": result["summary"], "keywords": result["keywords"]}
+
+    def summarize(self, text):
+        """Run only the summary stage."""
+        return self.summary_chain.run(text=text)
+
+    def keywords(self, summary):
+        """Run only the keyword stage on a summary."""
+        return self.keyword_chain.run(summary=summary)
+
+
+async def run_bulk_async(
+    pipeline,
+    documents,
+    checkpoint,
+    summary_concurrency=4,
+    keyword_concurrency=4,
+    lookahead=None,
+):
+    """Summarize and extract keywords for many `(doc_id, text)` pairs.
+
+    The stages are pipelined: while keywords are extracted for one
+    document, summaries of the following documents are already running.
+    At most `summary_concurrency` summary calls and `keyword_concurrency`
+    keyword calls run at once, and at most `lookahead` documents (default:
+    both limits combined) are in flight, so `documents` can be a lazy
+    iterator over a very large corpus.
+
+    Each finished document is appended to `checkpoint` (a
+    `JsonlCheckpoint` keyed by `id`); documents already in it are
+    skipped. Failed documents are logged and not checkpointed, so a
+    rerun retries them. Returns counts of done/skipped/failed documents.
+    """
+    lookahead = lookahead or summary_concurrency + keyword_concurrency
+    loop = asyncio.get_running_loop()
+    # the chains block, so each stage call runs on its own worker thread
+    executor = ThreadPoolExecutor(max_workers=summary_concurrency + keyword_concurrency)
+    summary_slots = asyncio.Semaphore(summary_concurrency)
+    keyword_slots = asyncio.Semaphore(keyword_concurrency)
+    in_flight = asyncio.Semaphore(lookahead)
+    stats = {"done": 0, "skipped": 0, "failed": 0}
+
+    async def process(doc_id, text):
+        try:
+            async with summary_slots:
+                summary = await loop.run_in_executor(executor, pipeline.summarize, text)
+            async with keyword_slots:
+                keywords = await loop.run_in_executor(executor, pipeline.keywords, summary)
+            checkpoint.append({"id": doc_id, "summary": summary, "keywords": keywords})
+            stats["done"] += 1
+        except Exception:
+            logger.exception("Failed to process document %s", doc_id)
+            stats["failed"] += 1
+        finally:
+            in_flight.release()
+
+    tasks = set()
+    try:
+        for doc_id, text in documents:
+            if doc_id in checkpoint:
+                stats["skipped"] += 1
+                continue
+            await in_flight.acquire()
+            task = asyncio.ensure_future(process(doc_id, text))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        # let started documents finish (and checkpoint) even if reading
+        # the input failed
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        executor.shutdown(wait=False)
+    return stats
+
+
+def run_bulk(pipeline, documents, output_path, **kwargs):
+    """Synchronous wrapper around `run_bulk_async` writing to `output_path`."""
+    started = time.perf_counter()
+    with JsonlCheckpoint(output_path) as checkpoint:
+        stats = asyncio.run(run_bulk_async(pipeline, documents, checkpoint, **kwargs))
+    stats["elapsed_s"] = time.perf_counter() - started
+    return stats
+
+
+def iter_directory(directory, pattern="*.txt"):
+    """Yield `(relative path, text)` for files in `directory`, lazily."""
+    for path in sorted(glob.glob(os.path.join(directory, "**", pattern), recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            yield os.path.relpath(path, directory), f.read()
+
+
+def iter_jsonl(path):
+    """Yield `(id, text)` from a JSONL file of `{"id": ..., "text": ...}` objects."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["id"], record["text"]
+
 
-summary_prompt = PromptTemplate(
-    input_variables=["text"],
-    template="Summarize the following text briefly:\n\n{text}"
-)
-summary_chain = LLMChain(llm=llm, prompt=summary_prompt, output_key="summary")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize texts and extract keywords.")
+    parser.add_argument("--text", action="append", default=[], help="text to process (repeatable)")
+    parser.add_argument("--file", action="append", default=[], help="file whose content to process (repeatable)")
+    bulk = parser.add_argument_group("bulk mode")
+    bulk.add_argument("--input-dir", help="process every *.txt file under this directory")
+    bulk.add_argument("--input-jsonl", help='process {"id": ..., "text": ...} lines of this file')
+    bulk.add_argument("--output", help="JSONL results file, also the resume checkpoint")
+    bulk.add_argument("--summary-concurrency", type=int, default=4)
+    bulk.add_argument("--keyword-concurrency", type=int, default=4)
+    bulk.add_argument("--lookahead", type=int, default=None, help="documents in flight (default: both limits combined)")
+    args = parser.parse_args(argv)
 
-keyword_prompt = PromptTemplate(
-    input_variables=["summary"],
-    template="Extract keywords from this summary, separated by commas:\n\n{summary}"
-)
-keyword_chain = LLMChain(llm=llm, prompt=keyword_prompt, output_key="keywords")
+    if args.input_dir or args.input_jsonl:
+        if not args.output:
+            parser.error("--output is required in bulk mode")
+        documents = iter_directory(args.input_dir) if args.input_dir else iter_jsonl(args.input_jsonl)
+        stats = run_bulk(
+            SummaryKeywordPipeline(),
+            documents,
+            args.output,
+            summary_concurrency=args.summary_concurrency,
+            keyword_concurrency=args.keyword_concurrency,
+            lookahead=args.lookahead,
+        )
+        rate = stats["done"] / stats["elapsed_s"] if stats["elapsed_s"] else 0.0
+        print(f"Processed {stats['done']} documents ({stats['skipped']} already done, "
+              f"{stats['failed']} failed) in {stats['elapsed_s']:.1f}s, {rate:.1f} docs/s")
+        return
 
-combined_chain = SequentialChain(
-    chains=[summary_chain, keyword_chain],
-    input_variables=["text"],
-    output_variables=["summary", "keywords"]
-)
+    texts = list(args.text)
+    for path in args.file:
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+    if not texts:
+        texts = [SAMPLE_TEXT]
 
-input_text = "LangChain is an open-source framework that simplifies building applications with large language models by managing prompts, chains, agents, and integrations."
+    pipeline = SummaryKeywordPipeline()
+    for text in texts:
+        result = pipeline.run(text)
+        print("Summary:", result["summary"])
+        print("Keywords:", result["keywords"])
 
-result = combined_chain({"text": input_text})
 
-print("Summary:", result["summary"])
-print("Keywords:", result["keywords"])
+if __name__ == "__main__":
+    main()
@@ -5,19 +5,46 @@ Small example showing how to load a PDF and summarize its text using
 LangChain's PDF loader and an LLM.
 
 Developer notes:
-- This script expects `example.pdf` to exist in the repo root. It's a
-    minimal demo that loads, concatenates the first two pages, and runs a
-    summarization chain.
-- For testability, break this flow into functions and inject a fake
-    loader/LLM rather than calling them at import time.
+- `summarize_pdf(path)` is the minimal demo: it loads a PDF, concatenates
+    the first two pages and runs a summarization chain. Running the module
+    without arguments summarizes `example.pdf` from the repo root.
+- Batch mode summarizes every PDF under a directory with a map-reduce over
+    the whole document: page groups are summarized concurrently (map), then
+    the partial summaries are combined into one summary (reduce). Results
+    are appended to a JSONL file, which is also the resume checkpoint:
+    `python -m src.day17 --input-dir pdfs/ --output summaries.jsonl`.
+- Every LLM call in batch mode is cached by the SHA-256 of its prompt
+    input, so re-running after adding or editing a few PDFs only pays for
+    the pages that changed.
+- Importing this module does no work; tests inject a fake loader/LLM.
 """
 
+import argparse
+import asyncio
+import glob
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 
+from src.checkpoint import JsonlCheckpoint
 from src.utils import make_chat_llm
 
+logger = logging.getLogger("day17")
+
+DOCUMENT_TEMPLATE = "Summarize the following document in 2-3 sentences:\n\n{text}"
+MAP_TEMPLATE = "Summarize the following pages of a longer document in a few sentences:\n\n{text}"
+REDUCE_TEMPLATE = (
+    "The following are summaries of consecutive parts of one document. "
+    "Combine them into a summary of the whole document in 2-3 sentences:\n\n{text}"
+)
+TEMPLATES = {"document": DOCUMENT_TEMPLATE, "map": MAP_TEMPLATE, "reduce": REDUCE_TEMPLATE}
+
 
 def summarize_pdf(path: str):
     loader = PyPDFLoader(path)
@@ -31,13 +58,200 @@ def summarize_pdf(path: str):
 
     prompt = PromptTemplate(
         input_variables=["text"],
-        template="Summarize the following document in 2-3 sentences:\n\n{text}",
+        template=DOCUMENT_TEMPLATE,
     )
     chain = LLMChain(llm=llm, prompt=prompt)
     return chain.run(text)
 
 
-if __name__ == "__main__":
-    s = summarize_pdf("example.pdf")
+class PDFSummarizer:
+    """One LLM chain per prompt kind: `document`, `map` and `reduce`."""
+
+    def __init__(self, llm=None):
+        if llm is None:
+            llm = make_chat_llm(model_name="gpt-4o", temperature=0)
+            if llm is None:
+                raise RuntimeError("ChatOpenAI is not available or OPENAI_API_KEY missing")
+        self.chains = {
+            kind: LLMChain(llm=llm, prompt=PromptTemplate(input_variables=["text"], template=template))
+            for kind, template in TEMPLATES.items()
+        }
+
+    def summarize(self, kind, text):
+        return self.chains[kind].run(text=text)
+
+
+def extract_pages(path):
+    """Return the text of every page of `path`.
+
+    Module-level so it can run in a worker process: PDF parsing is pure
+    Python and would otherwise hold the GIL.
+    """
+    return [page.page_content for page in PyPDFLoader(path).load()]
+
+
+def iter_pdfs(directory):
+    """Yield the PDF paths under `directory`, recursively and in order."""
+    yield from sorted(glob.glob(os.path.join(directory, "**", "*.pdf"), recursive=True))
+
+
+def cache_key(kind, text):
+    return hashlib.sha256(f"{TEMPLATES[kind]}\0{text}".encode("utf-8")).hexdigest()
+
+
+async def summarize_directory_async(
+    summarizer,
+    paths,
+    checkpoint,
+    cache,
+    root=".",
+    pages_per_group=4,
+    reduce_fanout=8,
+    concurrency=4,
+    lookahead=None,
+    extract=None,
+    extract_executor=None,
+):
+    """Map-reduce summarize many PDFs.
+
+    For each path, pages are extracted by `extract` (default:
+    `extract_pages`) on `extract_executor` (a process pool by default)
+    while earlier documents are being summarized. A document that fits
+    in one group of `pages_per_group` pages gets a single `document`
+    call; longer ones have each group summarized (`map`), then the
+    partial summaries combined `reduce_fanout` at a time until one summary
+    is left (`reduce`). At most `concurrency` LLM calls
+    run at once across all documents, and at most `lookahead` documents
+    (default: `2 * concurrency`) are in flight, so `paths` can be a lazy
+    walk over a large tree.
+
+    LLM results are looked up in and added to `cache` (a `JsonlCheckpoint`
+    keyed by `sha256`). Finished documents are appended to `checkpoint`
+    (keyed by `id`, the path relative to `root`) and skipped when already
+    there; failed documents are logged and retried on the next run.
+    """
+    if reduce_fanout < 2:
+        # fewer than two summaries per reduce call never gets down to one
+        raise ValueError(f"reduce_fanout must be at least 2, got {reduce_fanout}")
+    lookahead = lookahead or 2 * concurrency
+    extract = extract or extract_pages
+    loop = asyncio.get_running_loop()
+    owns_extract_executor = extract_executor is None
+    if owns_extract_executor:
+        extract_executor = ProcessPoolExecutor(max_workers=min(lookahead, os.cpu_count() or 1))
+    llm_executor = ThreadPoolExecutor(max_workers=concurrency)
+    llm_slots = asyncio.Semaphore(concurrency)
+    in_flight = asyncio.Semaphore(lookahead)
+    stats = {"done": 0, "skipped": 0, "failed": 0, "pages": 0, "llm_calls": 0, "cache_hits": 0}
+
+    async def call(kind, text):
+        key = cache_key(kind, text)
+        cached = cache.get(key)
+        if cached is not None:
+            stats["cache_hits"] += 1
+            return cached["summary"]
+        async with llm_slots:
+            summary = await loop.run_in_executor(llm_executor, summarizer.summarize, kind, text)
+        stats["llm_calls"] += 1
+        cache.append({"sha256": key, "summary": summary})
+        return summary
+
+    async def summarize_pages(pages):
+        groups = ["\n".join(pages[i:i + pages_per_group]) for i in range(0, len(pages), pages_per_group)]
+        if len(groups) == 1:
+            return await call("document", groups[0]), 1
+        summaries = await asyncio.gather(*(call("map", group) for group in groups))
+        while len(summaries) > 1:
+            batches = ["\n\n".join(summaries[i:i + reduce_fanout]) for i in range(0, len(summaries), reduce_fanout)]
+            summaries = await asyncio.gather(*(call("reduce", batch) for batch in batches))
+        return summaries[0], len(groups)
+
+    async def process(doc_id, path):
+        try:
+            pages = await loop.run_in_executor(extract_executor, extract, path)
+            pages = [page for page in pages if page.strip()]
+            if not pages:
+                raise ValueError("no extractable text (scanned PDF?)")
+            summary, groups = await summarize_pages(pages)
+            checkpoint.append({"id": doc_id, "pages": len(pages), "groups": groups, "summary": summary})
+            stats["pages"] += len(pages)
+            stats["done"] += 1
+        except Exception:
+            logger.exception("Failed to summarize %s", path)
+            stats["failed"] += 1
+        finally:
+            in_flight.release()
+
+    tasks = set()
+    try:
+        for path in paths:
+            doc_id = os.path.relpath(path, root)
+            if doc_id in checkpoint:
+                stats["skipped"] += 1
+                continue
+            await in_flight.acquire()
+            task = asyncio.ensure_future(process(doc_id, path))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        llm_executor.shutdown(wait=False)
+        if owns_extract_executor:
+            extract_executor.shutdown()
+    return stats
+
+
+def summarize_directory(summarizer, directory, output_path, cache_path=None, **kwargs):
+    """Summarize every PDF under `directory` into the JSONL `output_path`.
+
+    The LLM cache defaults to `<output>.cache.jsonl` next to the output.
+    Returns the stats of `summarize_directory_async` plus `elapsed_s` and
+    `docs_per_min`.
+    """
+    if cache_path is None:
+        cache_path = os.path.splitext(output_path)[0] + ".cache.jsonl"
+    started = time.perf_counter()
+    with JsonlCheckpoint(output_path) as checkpoint, JsonlCheckpoint(cache_path, key="sha256") as cache:
+        stats = asyncio.run(summarize_directory_async(
+            summarizer, iter_pdfs(directory), checkpoint, cache, root=directory, **kwargs
+        ))
+    stats["elapsed_s"] = time.perf_counter() - started
+    stats["docs_per_min"] = 60 * stats["done"] / stats["elapsed_s"] if stats["elapsed_s"] else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize PDF documents.")
+    parser.add_argument("--pdf", default="example.pdf", help="single PDF to summarize (first two pages)")
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument("--input-dir", help="summarize every *.pdf under this directory")
+    batch.add_argument("--output", help="JSONL results file, also the resume checkpoint")
+    batch.add_argument("--cache", help="LLM result cache (default: <output>.cache.jsonl)")
+    batch.add_argument("--pages-per-group", type=int, default=4)
+    batch.add_argument("--concurrency", type=int, default=4, help="LLM calls in flight")
+    args = parser.parse_args(argv)
+
+    if args.input_dir:
+        if not args.output:
+            parser.error("--output is required in batch mode")
+        stats = summarize_directory(
+            PDFSummarizer(),
+            args.input_dir,
+            args.output,
+            cache_path=args.cache,
+            pages_per_group=args.pages_per_group,
+            concurrency=args.concurrency,
+        )
+        print(f"Summarized {stats['done']} documents, {stats['pages']} pages ({stats['skipped']} already done, "
+              f"{stats['failed']} failed) in {stats['elapsed_s']:.1f}s, {stats['docs_per_min']:.1f} docs/min; "
+              f"{stats['llm_calls']} LLM calls, {stats['cache_hits']} cached")
+        return
+
+    s = summarize_pdf(args.pdf)
     print("Document Summary:")
     print(s)
+
+
+if __name__ == "__main__":
+    main()
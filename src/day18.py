@@ -4,40 +4,134 @@ day18.py
 Example that builds a FAISS index from a set of text files and queries it.
 
 Developer notes:
-- Expects files `file1.txt`..`file10.txt` to exist in the repository root
-    (tests create lightweight sample files when needed).
+- Importing this module does no work. `TextFileIndex` wraps the
+    load -> embed -> index -> query steps: call `build()` once, then
+    `search(query)` as often as needed. The CLI runs one query:
+    `python -m src.day18 [--query Q] [--k N] [--dir DIR] [--watch]`.
+- Expects files `file1.txt`..`file10.txt` to exist in the directory
+    (tests create lightweight sample files when needed). Any `file*.txt`
+    is indexed.
+- Indexing is incremental: a manifest in `DAY18_INDEX_DIR` (default
+    `day18_index/`) tracks each file's mtime and content hash, so only
+    added or changed files are re-embedded. `--watch` keeps polling for
+    changes after the query (see `src/dir_indexer.py`).
 - Uses OpenAIEmbeddings by default; for offline tests inject a fake
-    embeddings implementation.
+    embeddings implementation, or set `EMBEDDINGS_BACKEND=hashing` (or
+    `sentence-transformers`) to embed locally (see `src/embeddings.py`).
+- `RAG_RETRIEVAL_MODE=bm25` queries a local BM25 index only and skips
+    embeddings entirely; `hybrid` fuses BM25 and FAISS results.
+- `FAISS_INDEX_TYPE` switches the exact flat index for an approximate
+    one (see `src/ann_index.py`).
 """
 
+import argparse
+import glob
+import os
+
 from langchain_community.document_loaders import TextLoader # type: ignore
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 
-# 1. Load files and add filename as metadata
-file_paths = [f"file{i}.txt" for i in range(1, 11)]
-documents = []
-for path in file_paths:
-        loader = TextLoader(path)
-        for doc in loader.load():
-                doc.metadata['source'] = path
-                documents.append(doc)
-
-# 2. (Optional) Split long documents into smaller chunks
-# from langchain_text_splitters import CharacterTextSplitter
-# chunker = CharacterTextSplitter(chunk_size=512)
-# docs = chunker.split_documents(documents)
-# (Or just use documents directly)
-
-# 3. Build FAISS vector store
-embeddings = OpenAIEmbeddings()
-vector_store = FAISS.from_documents(documents, embeddings)
-
-# 4. Query the store for AI content
-query = "Which file talks about AI?"
-results = vector_store.similarity_search(query, k=3)
-
-# 5. Print result filenames and excerpts
-for result in results:
-        print(result.metadata['source'])
-        print(result.page_content[:160])
+from src.bm25 import BM25Index
+from src.dir_indexer import DirectoryIndexer
+from src.embeddings import make_embeddings
+from src.retrieval import get_retrieval_mode, retrieve
+
+FILE_PATTERN = "file*.txt"
+DEFAULT_QUERY = "Which file talks about AI?"
+
+
+def load_text_file(path):
+        return TextLoader(path).load()
+
+
+class TextFileIndex:
+        """Searchable index over the text files matching `pattern` in `directory`.
+
+        `mode` defaults to `RAG_RETRIEVAL_MODE`, `index_dir` to
+        `DAY18_INDEX_DIR` and `embeddings` to the configured backend.
+        """
+
+        def __init__(self, directory=".", pattern=FILE_PATTERN, index_dir=None, mode=None, embeddings=None):
+                self.directory = directory
+                self.pattern = pattern
+                self.index_dir = index_dir or os.environ.get("DAY18_INDEX_DIR", "day18_index")
+                self.mode = get_retrieval_mode(mode)
+                self.embeddings = embeddings
+                self.indexer = None
+                self.vector_store = None
+                self.bm25_index = None
+
+        def build(self):
+                """Load and index the files; return the sync report, or None in BM25 mode.
+
+                Outside of BM25-only mode the DirectoryIndexer only re-embeds
+                files added or changed since the last run and drops vectors of
+                deleted files (state lives in `index_dir`).
+                """
+                report = None
+                if self.mode == "bm25":
+                        documents = []
+                        for path in sorted(glob.glob(os.path.join(self.directory, self.pattern))):
+                                for doc in load_text_file(path):
+                                        doc.metadata['source'] = os.path.relpath(path, self.directory)
+                                        documents.append(doc)
+                else:
+                        if self.embeddings is None:
+                                self.embeddings = make_embeddings(openai_factory=OpenAIEmbeddings)
+                        self.indexer = DirectoryIndexer(
+                                self.directory, self.pattern, self.index_dir, self.embeddings, FAISS, load_text_file
+                        )
+                        report = self.indexer.sync()
+                        self.vector_store = self.indexer.vector_store
+                        documents = self.indexer.documents() if self.mode == "hybrid" else []
+
+                # Build the local BM25 index when keyword retrieval is used
+                if self.mode != "vector":
+                        self.bm25_index = BM25Index.from_documents(documents)
+                return report
+
+        def search(self, query, k=3):
+                """Return the top `k` documents for `query`."""
+                return retrieve(query, self.mode, vector_store=self.vector_store, bm25_index=self.bm25_index, k=k)
+
+        def watch(self, interval=2.0, stop=None):
+                """Keep the index in sync with the directory (not in BM25 mode).
+
+                In hybrid mode the BM25 index is rebuilt after every change so
+                both halves answer from the same files.
+                """
+                if self.indexer is not None:
+                        self.indexer.watch(interval=interval, stop=stop, on_change=self._refresh)
+
+        def _refresh(self, report=None):
+                self.vector_store = self.indexer.vector_store
+                if self.mode == "hybrid":
+                        self.bm25_index = BM25Index.from_documents(self.indexer.documents())
+
+
+def main(argv=None):
+        parser = argparse.ArgumentParser(description="Index file*.txt and query it.")
+        parser.add_argument("--query", default=DEFAULT_QUERY)
+        parser.add_argument("--k", type=int, default=3)
+        parser.add_argument("--dir", default=".", help="directory holding the text files")
+        parser.add_argument("--watch", action="store_true", help="keep the index in sync after the query")
+        args = parser.parse_args(argv)
+
+        index = TextFileIndex(directory=args.dir)
+        report = index.build()
+        if report is not None:
+                print(f"Index sync: {len(report['added'])} added, {len(report['changed'])} changed, "
+                      f"{len(report['removed'])} removed, {report['unchanged']} unchanged")
+
+        # Print result filenames and excerpts
+        for result in index.search(args.query, k=args.k):
+                print(result.metadata['source'])
+                print(result.page_content[:160])
+
+        if args.watch:
+                index.watch()
+
+
+if __name__ == "__main__":
+        main()
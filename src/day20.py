@@ -1,19 +1,37 @@
 """
 day20.py
 ---------
-Example pipeline that builds a retrieval QA chain from a PDF and runs a
-single query.
+Example pipeline that builds a retrieval QA chain from a PDF and answers
+queries against it.
 
 Developer notes & cautions:
-- This is an example script intended to be executed locally. It expects
-  `example.pdf` to exist and will raise a FileNotFoundError otherwise.
-- The flow demonstrates common steps: load PDF -> split -> embed ->
-  index -> create retriever -> combine with an LLM chain -> query.
-- For unit tests, break this into functions and inject test doubles for
-  the heavy components (loader, embeddings, FAISS, LLM).
+- Importing this module does no work. `PDFQAPipeline(pdf_path)` runs the
+  common steps once: load PDF -> split -> embed -> index -> create
+  retriever -> combine with an LLM chain; `ask(query)` then answers
+  queries. The CLI answers one or more queries:
+  `python -m src.day20 [--pdf PATH] [--query Q ...]`.
+- A missing PDF raises FileNotFoundError.
+- The steps are also available as functions (`load_pages`,
+  `split_pages`, `build_indexes`, `build_chain`) and the pipeline
+  accepts an `llm`, so tests can inject test doubles for the heavy
+  components (loader, embeddings, FAISS, LLM).
+- `RAG_RETRIEVAL_MODE` selects `vector` (default), `bm25` (local keyword
+  index, no embedding calls) or `hybrid` retrieval.
+- `FAISS_INDEX_TYPE` switches the exact flat index for an approximate
+  one (see `src/ann_index.py`).
+- `EMBEDDINGS_BACKEND=hashing` (or `sentence-transformers`) embeds
+  locally without network calls (see `src/embeddings.py`).
+- Chunks are packed by token budget on sentence boundaries
+  (`src/chunking.py`); `RAG_SPLITTER=character` restores the
+  fixed-size `CharacterTextSplitter`.
+- `RAG_COMPRESSION=1` re-ranks the retrieved chunks and keeps only their
+  most query-relevant sentences under a token budget before the stuff
+  chain (see `src/compression.py`).
 """
 
+import argparse
 import os
+import time
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import CharacterTextSplitter
 from langchain_community.embeddings import OpenAIEmbeddings
@@ -23,55 +41,102 @@ from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.prompts import PromptTemplate
 from langchain_community.llms import ChatOpenAI
 
-# 1. Load and preprocess the PDF (example)
-pdf_path = "example.pdf"
-if not os.path.exists(pdf_path):
-    raise FileNotFoundError(f"PDF not found: {pdf_path}")
-
-loader = PyPDFLoader(pdf_path)
-pages = loader.load()
-
-# 2. Split text into chunks
-splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-docs = splitter.split_documents(pages)
-
-# 3. Create embeddings and vector store
-embeddings = OpenAIEmbeddings(openai_api_key=os.environ.get("OPENAI_API_KEY"))
-vector_store = FAISS.from_documents(docs, embeddings)
-
-# 4. Create retriever
-retriever = vector_store.as_retriever()
-
+from src.ann_index import build_vector_store
+from src.bm25 import BM25Index
+from src.chunking import make_splitter
+from src.compression import compressing_retriever
+from src.embeddings import make_embeddings
+from src.retrieval import get_retrieval_mode, make_retriever
 from src.utils import make_chat_llm
 
-# 5. Initialize LLM using shared helper
-llm = make_chat_llm(model_name="gpt-4o", temperature=0)
-if llm is None:
-  raise RuntimeError("ChatOpenAI is not available or OPENAI_API_KEY missing")
-
-# 6. Define the summarization prompt
-prompt = PromptTemplate.from_template(
-    "Summarize the following content clearly and concisely:\n\n{context}"
-)
-
-# 7. Create the chain
-combine_docs_chain = create_stuff_documents_chain(llm, prompt)
-qa_chain = create_retrieval_chain(retriever, combine_docs_chain)
-
-# 8. Run a query (must use 'input', not 'query')
-query = "What is the main topic of the document?"
-
-# Note: create_retrieval_chain expects input key = 'input'
-result = qa_chain.invoke({
-    "input": query,  # ✅ fixed key
-    "return_source_documents": True
-})
-
-# 9. Display the results
-print("\n=== Query ===")
-print(query)
-
-print("\n=== Answer ===")
-print(result.get("answer") or result.get("result") or "No answer returned.")
-
-
+DEFAULT_QUERY = "What is the main topic of the document?"
+SUMMARY_TEMPLATE = "Summarize the following content clearly and concisely:\n\n{context}"
+
+
+def load_pages(pdf_path):
+    """Load the pages of a PDF; raise FileNotFoundError if it is missing."""
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+    return PyPDFLoader(pdf_path).load()
+
+
+def split_pages(pages):
+    """Split pages into chunks with the configured splitter."""
+    splitter = make_splitter(
+        chunk_tokens=250,
+        overlap_tokens=25,
+        character_factory=lambda: CharacterTextSplitter(chunk_size=1000, chunk_overlap=100),
+    )
+    return splitter.split_documents(pages)
+
+
+def build_indexes(docs, mode):
+    """Return `(vector_store, bm25_index)` for the chunks.
+
+    The BM25 index is always built (it is cheap and local); embeddings
+    and the vector store are skipped when retrieval is keyword-only.
+    """
+    bm25_index = BM25Index.from_documents(docs)
+    vector_store = None
+    if mode != "bm25":
+        embeddings = make_embeddings(
+            openai_factory=lambda: OpenAIEmbeddings(openai_api_key=os.environ.get("OPENAI_API_KEY"))
+        )
+        vector_store = build_vector_store(docs, embeddings, FAISS)
+    return vector_store, bm25_index
+
+
+def build_chain(retriever, llm=None):
+    """Combine a retriever and an LLM into a stuff-documents retrieval chain."""
+    if llm is None:
+        llm = make_chat_llm(model_name="gpt-4o", temperature=0)
+        if llm is None:
+            raise RuntimeError("ChatOpenAI is not available or OPENAI_API_KEY missing")
+    prompt = PromptTemplate.from_template(SUMMARY_TEMPLATE)
+    combine_docs_chain = create_stuff_documents_chain(llm, prompt)
+    return create_retrieval_chain(retriever, combine_docs_chain)
+
+
+class PDFQAPipeline:
+    """Retrieval QA over one PDF, built once and queried many times."""
+
+    def __init__(self, pdf_path="example.pdf", mode=None, llm=None, k=4):
+        self.mode = get_retrieval_mode(mode)
+        self.docs = split_pages(load_pages(pdf_path))
+        self.vector_store, self.bm25_index = build_indexes(self.docs, self.mode)
+        # Retriever, re-ranked and trimmed to a token budget when RAG_COMPRESSION=1
+        self.retriever = compressing_retriever(
+            lambda n: make_retriever(self.mode, vector_store=self.vector_store, bm25_index=self.bm25_index, k=n), k=k
+        )
+        self.chain = build_chain(self.retriever, llm)
+
+    def ask(self, query):
+        """Return `(answer, elapsed_ms)` for one query."""
+        started = time.perf_counter()
+        # Note: create_retrieval_chain expects input key = 'input'
+        result = self.chain.invoke({
+            "input": query,
+            "return_source_documents": True
+        })
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return result.get("answer") or result.get("result") or "No answer returned.", elapsed_ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer queries about a PDF.")
+    parser.add_argument("--pdf", default="example.pdf")
+    parser.add_argument("--query", action="append", default=[], help="query to answer (repeatable)")
+    args = parser.parse_args(argv)
+
+    pipeline = PDFQAPipeline(args.pdf)
+    for query in args.query or [DEFAULT_QUERY]:
+        answer, elapsed_ms = pipeline.ask(query)
+        print("\n=== Query ===")
+        print(query)
+        print("\n=== Answer ===")
+        print(answer)
+        print(f"\n(answered in {elapsed_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,72 @@
 """
 day21.py
 ---------
-FastAPI example with two endpoints:
+FastAPI example with three endpoints:
 
 - `/upload_pdf` : Accepts a PDF upload, extracts pages, creates embeddings,
-  and stores a FAISS vector index in the module-level `vector_store`.
+  and stores a FAISS vector index in the module-level `vector_store`. A
+  local BM25 keyword index (`bm25_index`) is built alongside it.
 - `/ask` : Runs a RetrievalQA chain against the uploaded document index.
+- `/ask_batch` : Answers a list of questions with shared, batched
+  retrieval and concurrent LLM calls, streaming NDJSON answers.
 
 Developer notes:
 - This example stores vectors in a module-level variable for simplicity.
   In a production application, persist indexes to disk or a managed
   vector database and scope them per user or tenant as appropriate.
+- The retriever, LLM and QA chain are built once per index and reused by
+  `/ask`; a new upload invalidates them.
+- `RAG_RETRIEVAL_MODE` selects `vector` (default), `bm25` (offline, no
+  embedding calls) or `hybrid` retrieval; see `src/retrieval.py`.
+- `FAISS_INDEX_TYPE` selects an approximate index (ivf, hnsw, pq, ivfpq)
+  for large documents; see `src/ann_index.py`.
+- `EMBEDDINGS_BACKEND` selects `openai` (default), `hashing` or
+  `sentence-transformers` embeddings; see `src/embeddings.py`.
+- Pages are split into sentence-aligned chunks of up to 250 tokens
+  (`src/chunking.py`); `RAG_SPLITTER=character` selects the fixed-size
+  `CharacterTextSplitter` instead.
+- Near-duplicate chunks (repeated headers, footers, boilerplate) are
+  dropped before embedding (`src/dedup.py`, `RAG_DEDUP=0` disables);
+  `/upload_pdf` reports the number of embeddings saved.
+- `RAG_COMPRESSION=1` re-ranks retrieved chunks locally and trims them
+  to their most relevant sentences under `RAG_CONTEXT_TOKENS` before the
+  stuff chain (`src/compression.py`); prompt tokens and `/ask` latency
+  are logged.
 - For tests, inject fake `PyPDFLoader`, `OpenAIEmbeddings`, `FAISS`, and
   `RetrievalQA` implementations to avoid network and heavy dependencies.
 """
 
 from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import CharacterTextSplitter
 from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_community.llms import ChatOpenAI
 from src.utils import make_chat_llm, get_openai_api_key
+from src.ann_index import build_vector_store
+from src.bm25 import BM25Index
+from src.chunking import default_token_counter, make_splitter
+from src.compression import compress_and_log, compression_enabled, compression_settings, compressing_retriever
+from src.dedup import deduplicate_documents
+from src.embeddings import make_embeddings
+from src.retrieval import batch_retrieve, get_retrieval_mode, make_retriever
 from langchain.chains import RetrievalQA
+import asyncio
+import json
+import logging
 import os
+import time
+
+logger = logging.getLogger("day21")
 
 app = FastAPI()
 vector_store = None  # Store your vector index here (can be refined for multiple users/docs)
+bm25_index = None  # Local keyword index over the same chunks, built at upload time
+# QA chain built for the current indexes; see `_get_qa_chain`.
+_qa_cache = {"key": None, "chain": None}
 
 
 def _get_page_from_meta(meta):
@@ -55,75 +94,23 @@ def _get_page_from_meta(meta):
     return "N/A"
 
 
-@app.post("/upload_pdf")
-async def upload_pdf(file: UploadFile = File(...)):
-    """Upload a PDF, index its content, and store a FAISS index in memory.
+def _invalidate_qa_cache():
+    """Drop the cached QA chain so the next `/ask` rebuilds it."""
+    _qa_cache["key"] = None
+    _qa_cache["chain"] = None
 
-    Notes:
-    - For simplicity the temporary file is always removed in a finally
-      block to avoid leaking temp files during tests or errors.
-    - In production, consider streaming to the loader instead of writing
-      to disk.
-    """
-    temp_path = "temp.pdf"
-    try:
-        with open(temp_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-
-        # Load and split PDF into documents
-        loader = PyPDFLoader(temp_path)
-        docs = loader.load()
-        splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        split_docs = splitter.split_documents(docs)
-
-        # Build embeddings and index
-        embeddings = OpenAIEmbeddings()
-        global vector_store
-        vector_store = FAISS.from_documents(split_docs, embeddings)
-
-        return {"msg": f"PDF '{file.filename}' uploaded and indexed."}
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
 
+def _build_qa_chain(retriever, llm):
+    """Build a RetrievalQA chain, tolerating different langchain versions.
 
-class QuestionReq(BaseModel):
-    question: str
-
-
-@app.post("/ask")
-async def ask(question_req: QuestionReq):
-    """Answer a question against the previously uploaded PDF index.
+    Different langchain versions expose different factory helpers. Try
+    to use from_chain_type when available, otherwise fall back to
+    constructing RetrievalQA directly. This keeps the example compatible
+    with test doubles used in unit tests.
 
-    Raises HTTPException if no index is available or configuration is missing.
+    Returns a `(chain, cacheable)` pair; the last-resort adapter is not
+    cacheable so a later request gets another chance to build a real chain.
     """
-    global vector_store
-
-    if vector_store is None:
-        raise HTTPException(status_code=400, detail="No PDF uploaded yet. Please upload a file first.")
-
-    # create a retriever and ensure we have an API key for the LLM
-    # Some vectorstore implementations accept `search_kwargs`; others
-    # do not — try both to maximize compatibility and support lightweight
-    # test doubles that may not implement the kwarg.
-    try:
-        retriever = vector_store.as_retriever(search_kwargs={"k": 3})
-    except TypeError:
-        retriever = vector_store.as_retriever()
-    openai_api_key = get_openai_api_key()
-    if not openai_api_key:
-        raise HTTPException(status_code=500, detail="Missing OpenAI API key.")
-
-    llm = make_chat_llm(openai_api_key=openai_api_key, model_name="gpt-4o", temperature=0)
-    if llm is None:
-        raise HTTPException(status_code=500, detail="ChatOpenAI not available or failed to initialize.")
-
-    # Build a retrieval QA chain and run the query.
-    # Different langchain versions expose different factory helpers. Try
-    # to use from_chain_type when available, otherwise fall back to
-    # constructing RetrievalQA directly. This keeps the example compatible
-    # with test doubles used in unit tests.
     try:
         if hasattr(RetrievalQA, "from_chain_type"):
             qa_chain = RetrievalQA.from_chain_type(
@@ -150,18 +137,75 @@ async def ask(question_req: QuestionReq):
                 def run(self, q):
                     return None
 
-            qa_chain = _SimpleQA()
+            return _SimpleQA(), False
+    return qa_chain, True
+
+
+def _get_qa_chain(mode):
+    """Return the QA chain for the current index, building it on first use.
+
+    The retriever, LLM and chain only depend on the index, so they are
+    built once per `vector_store`/`bm25_index` pair and retrieval mode and
+    reused across requests. The cache holds references to the indexes it
+    was built for; uploading a new PDF (or swapping `vector_store` in
+    tests) invalidates it.
 
-    # Run the chain. Some implementations expect .run(question) while
-    # others are callable or accept a dict; handle common patterns.
+    Raises HTTPException if configuration is missing.
+    """
+    stores = (vector_store, bm25_index)
+    config = (mode, compression_enabled())
+    cached = _qa_cache["key"]
+    if (
+        _qa_cache["chain"] is not None
+        and cached[0] == config
+        and all(a is b for a, b in zip(cached[1], stores))
+    ):
+        return _qa_cache["chain"]
+
+    started = time.perf_counter()
+    # create a retriever and ensure we have an API key for the LLM
+    retriever = compressing_retriever(
+        lambda n: make_retriever(mode, vector_store=vector_store, bm25_index=bm25_index, k=n), k=3
+    )
+    openai_api_key = get_openai_api_key()
+    if not openai_api_key:
+        raise HTTPException(status_code=500, detail="Missing OpenAI API key.")
+
+    llm = make_chat_llm(openai_api_key=openai_api_key, model_name="gpt-4o", temperature=0)
+    if llm is None:
+        raise HTTPException(status_code=500, detail="ChatOpenAI not available or failed to initialize.")
+
+    qa_chain, cacheable = _build_qa_chain(retriever, llm)
+    if cacheable:
+        _qa_cache["key"] = (config, stores)
+        _qa_cache["chain"] = qa_chain
+    logger.debug("Built QA chain in %.2f ms", (time.perf_counter() - started) * 1000)
+    return qa_chain
+
+
+def _run_chain(qa_chain, question):
+    """Run the chain for one question.
+
+    Some implementations expect .run(question) while others are callable
+    or accept a dict; handle common patterns.
+    """
     if hasattr(qa_chain, "run"):
-        result = qa_chain.run(question_req.question)
-    else:
         try:
-            result = qa_chain({"query": question_req.question})
-        except Exception:
-            result = {"result": None, "source_documents": []}
+            return qa_chain.run(question)
+        except ValueError:
+            # RetrievalQA with return_source_documents has two output
+            # keys and refuses run(); invoke returns both.
+            if not hasattr(qa_chain, "invoke"):
+                raise
+            return qa_chain.invoke({"query": question})
+    try:
+        return qa_chain({"query": question})
+    except Exception:
+        return {"result": None, "source_documents": []}
+
 
+def _format_answer(question, result):
+    """Normalize a chain result into the `/ask` response shape."""
     # Normalize different result shapes:
     # - string: assume it's the answer
     # - dict-like: extract 'result' and 'source_documents'
@@ -180,7 +224,7 @@ async def ask(question_req: QuestionReq):
         sources = []
 
     return {
-        "question": question_req.question,
+        "question": question,
         "answer": answer,
         "sources": [
             {
@@ -190,3 +234,161 @@ async def ask(question_req: QuestionReq):
             for doc in sources
         ],
     }
+
+
+@app.post("/upload_pdf")
+async def upload_pdf(file: UploadFile = File(...)):
+    """Upload a PDF, index its content, and store a FAISS index in memory.
+
+    Notes:
+    - For simplicity the temporary file is always removed in a finally
+      block to avoid leaking temp files during tests or errors.
+    - In production, consider streaming to the loader instead of writing
+      to disk.
+    """
+    temp_path = "temp.pdf"
+    try:
+        with open(temp_path, "wb") as f:
+            content = await file.read()
+            f.write(content)
+
+        # Load and split PDF into documents
+        loader = PyPDFLoader(temp_path)
+        docs = loader.load()
+        # Token-budget chunks by default; RAG_SPLITTER=character restores
+        # the fixed-size CharacterTextSplitter.
+        splitter = make_splitter(
+            chunk_tokens=250,
+            overlap_tokens=50,
+            character_factory=lambda: CharacterTextSplitter(chunk_size=1000, chunk_overlap=200),
+        )
+        split_docs = splitter.split_documents(docs)
+        # Drop repeated headers, footers and boilerplate before indexing;
+        # kept chunks list the locations of their dropped copies.
+        dedup = deduplicate_documents(split_docs)
+        if dedup.saved:
+            logger.info("Dropped %d near-duplicate chunks of %d", dedup.saved, len(split_docs))
+        chunks = dedup.kept
+
+        # Build the local keyword index, then embeddings and the vector
+        # index unless retrieval is BM25-only (no embedding API calls).
+        global vector_store, bm25_index
+        bm25_index = BM25Index.from_documents(chunks)
+        if get_retrieval_mode() == "bm25":
+            vector_store = None
+        else:
+            embeddings = make_embeddings(openai_factory=OpenAIEmbeddings)
+            vector_store = build_vector_store(chunks, embeddings, FAISS)
+        _invalidate_qa_cache()
+
+        return {
+            "msg": f"PDF '{file.filename}' uploaded and indexed.",
+            "chunks": len(chunks),
+            "embeddings_saved": dedup.saved,
+        }
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class QuestionReq(BaseModel):
+    question: str
+
+
+class BatchQuestionReq(BaseModel):
+    questions: List[str]
+    concurrency: Optional[int] = None
+
+
+def _require_index():
+    """Return the retrieval mode, or raise 400 if its index was not built."""
+    mode = get_retrieval_mode()
+    index = bm25_index if mode == "bm25" else vector_store
+    if index is None:
+        raise HTTPException(status_code=400, detail="No PDF uploaded yet. Please upload a file first.")
+    return mode
+
+
+def _batch_documents(mode, questions):
+    """Retrieve the context of every question with one batched vector search."""
+    k = 3
+    if not compression_enabled():
+        return batch_retrieve(questions, mode, vector_store=vector_store, bm25_index=bm25_index, k=k)
+    fetch_k, budget = compression_settings(k)
+    candidates = batch_retrieve(questions, mode, vector_store=vector_store, bm25_index=bm25_index, k=fetch_k)
+    count_tokens = default_token_counter()
+    return [compress_and_log(q, docs, k, budget, count_tokens) for q, docs in zip(questions, candidates)]
+
+
+@app.post("/ask")
+async def ask(question_req: QuestionReq):
+    """Answer a question against the previously uploaded PDF index.
+
+    Raises HTTPException if no index is available or configuration is missing.
+    The QA chain is cached per index, see `_get_qa_chain`.
+    """
+    started = time.perf_counter()
+    mode = _require_index()
+    qa_chain = _get_qa_chain(mode)
+    response = _format_answer(question_req.question, _run_chain(qa_chain, question_req.question))
+    logger.info(
+        "Answered in %.1f ms (compression %s)",
+        (time.perf_counter() - started) * 1000, "on" if compression_enabled() else "off",
+    )
+    return response
+
+
+@app.post("/ask_batch")
+async def ask_batch(batch_req: BatchQuestionReq):
+    """Answer many questions against the uploaded PDF index.
+
+    Retrieval is shared: all questions are embedded in one call and
+    searched as one matrix query (see `src.retrieval.batch_retrieve`).
+    LLM calls then run concurrently, at most `concurrency` (default
+    `ASK_BATCH_CONCURRENCY`, 4) at a time. Answers stream back as NDJSON
+    in completion order; each line has the question's `index` and the
+    same fields as `/ask`, or an `error`.
+
+    Chains without a `combine_documents_chain` (such as test doubles)
+    retrieve per question through the cached QA chain instead.
+    """
+    questions = batch_req.questions
+    if not questions:
+        raise HTTPException(status_code=400, detail="No questions given.")
+    limit = batch_req.concurrency or int(os.environ.get("ASK_BATCH_CONCURRENCY", "4"))
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="concurrency must be at least 1.")
+    mode = _require_index()
+    qa_chain = _get_qa_chain(mode)
+    started = time.perf_counter()
+
+    combine = getattr(qa_chain, "combine_documents_chain", None)
+    if combine is not None:
+        contexts = await asyncio.to_thread(_batch_documents, mode, questions)
+        logger.info("Retrieved context for %d questions in %.1f ms", len(questions), (time.perf_counter() - started) * 1000)
+
+        def answer(i):
+            output = combine.invoke({"input_documents": contexts[i], "question": questions[i]})
+            text = output.get("output_text") if isinstance(output, dict) else output
+            return {"result": text, "source_documents": contexts[i]}
+    else:
+        def answer(i):
+            return _run_chain(qa_chain, questions[i])
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def answer_one(i):
+        async with semaphore:
+            try:
+                result = await asyncio.to_thread(answer, i)
+            except Exception as e:
+                logger.exception("Batch question %d failed", i)
+                return {"index": i, "question": questions[i], "error": str(e)}
+        return {"index": i, **_format_answer(questions[i], result)}
+
+    async def stream():
+        for next_done in asyncio.as_completed([answer_one(i) for i in range(len(questions))]):
+            yield json.dumps(await next_done) + "\n"
+        logger.info("Answered %d questions in %.1f ms", len(questions), (time.perf_counter() - started) * 1000)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
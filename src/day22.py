@@ -1,13 +1,65 @@
-from fastapi import FastAPI, BackgroundTasks
+import os
+import threading
 from datetime import datetime
 
-app = FastAPI()
+from fastapi import FastAPI, BackgroundTasks
+
+from src.buffered_log import BufferedLogWriter
+
+# Lines are queued in memory and appended by one background writer per
+# file, in batches. API_LOG_MAX_BYTES > 0 turns on size-based rotation
+# (keeping API_LOG_BACKUPS old files); API_LOG_FLUSH_INTERVAL bounds how
+# long (in seconds) a line may wait in memory.
+LOG_FILE = "api_logs.txt"
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_log_writer(path: str = LOG_FILE) -> BufferedLogWriter:
+    """Return the shared writer for `path`, starting it on first use."""
+    path = os.path.abspath(path)
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None or writer.closed:
+            writer = BufferedLogWriter(
+                path,
+                flush_interval=float(os.getenv("API_LOG_FLUSH_INTERVAL", "1.0")),
+                max_bytes=int(os.getenv("API_LOG_MAX_BYTES", "0")),
+                backup_count=int(os.getenv("API_LOG_BACKUPS", "5")),
+            )
+            _writers[path] = writer
+        return writer
+
+
+def flush_logs():
+    """Write every queued log line to disk."""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.flush()
+
+
+def close_logs():
+    """Flush and stop all log writers (called on application shutdown)."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
 
 def log_api_call(endpoint: str, user: str):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_entry = f"[{timestamp}] Endpoint: {endpoint} | User: {user}\n"
-    with open("api_logs.txt", "a") as f:
-        f.write(log_entry)
+    get_log_writer().write(log_entry)
+
+
+async def lifespan(app: FastAPI):
+    yield
+    close_logs()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.post("/some-endpoint")
 async def some_endpoint(
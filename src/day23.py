@@ -1,41 +1,34 @@
-from fastapi import FastAPI, Security, HTTPException, status, Depends, Request
-from fastapi.security.api_key import APIKeyHeader
-from fastapi_limiter import FastAPILimiter
-from fastapi_limiter.depends import RateLimiter
-import secrets
-import redis.asyncio as redis
+from fastapi import FastAPI, Security, Depends, Request
 import uvicorn
 
+from src.auth import APIKeyAuth, ApiKey, KeyStore
+from src.rate_limit import RateLimiter, api_key_identifier, make_backend, set_backend
+
 app = FastAPI()
 
 #-------------------------------
 # API Key Authentication
 #-------------------------------
-api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 VALID_API_KEY = "MY_SECRET_QA_KEY"
-
-def verify_api_key(api_key: str = Security(api_key_header)):
-    if api_key is None or not secrets.compare_digest(api_key, VALID_API_KEY):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or missing API Key",
-        )
-    return api_key
+API_KEYS = KeyStore.from_env(VALID_API_KEY)
+verify_api_key = APIKeyAuth(API_KEYS)
 
 #-------------------------------
 # Initialize Rate Limiter
 #-------------------------------
+# RATE_LIMIT_BACKEND picks where limits are counted: `memory` (default,
+# per worker), `shared` (all workers on this host) or `redis`.
 @app.on_event("startup")
 async def startup():
-    redis_client = await redis.from_url("redis://localhost", encoding="utf-8", decode_responses=True)
-    await FastAPILimiter.init(redis_client)
+    set_backend(make_backend())
 
 #-------------------------------
 # Protected and Rate Limited Endpoint
 #-------------------------------
-@app.post("/qa", dependencies=[Depends(RateLimiter(times=5, seconds=60))])
+# counted per verified API key; bad or missing keys count against the client's IP
+@app.post("/qa", dependencies=[Depends(RateLimiter(times=5, seconds=60, identifier=api_key_identifier(API_KEYS.verify)))])
 async def qa_endpoint(
-    request: Request, query: str, api_key: str = Security(verify_api_key)
+    request: Request, query: str, api_key: ApiKey = Security(verify_api_key)
 ):
     return {"response": f"Answer generated for: {query}"}
 
@@ -1,68 +1,143 @@
 import logging
+import os
 from logging.config import dictConfig
 from fastapi import FastAPI, Security, HTTPException, Request, status
 from fastapi.responses import JSONResponse
-from fastapi.security.api_key import APIKeyHeader
 from fastapi.exceptions import RequestValidationError
-import secrets
+
+from src.auth import APIKeyAuth, ApiKey, KeyStore
+from src.log_queue import DedupFilter
 
 # Logging configuration
-LOGGING_CONFIG = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "default": {
-            "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            "datefmt": "%Y-%m-%d %H:%M:%S",
-        },
-    },
-    "handlers": {
+LOG_FILE = "app_errors.log"
+
+
+def logging_config(json_lines=None, use_queue=None):
+    """Build the `dictConfig` for the app.
+
+    Handlers write from a listener thread behind a queue, so logging in
+    the async endpoints never blocks the event loop on I/O
+    (`LOG_QUEUE=0` writes synchronously instead). `LOG_JSON=1` writes
+    the file as JSON lines. Repeated warnings and errors are sampled:
+    `LOG_DEDUP_BURST` (default 5) of a kind per `LOG_DEDUP_INTERVAL`
+    seconds (default 60), then one summary line with the count.
+    """
+    if json_lines is None:
+        json_lines = os.getenv("LOG_JSON", "0") == "1"
+    if use_queue is None:
+        use_queue = os.getenv("LOG_QUEUE", "1") != "0"
+    targets = ["console", "file"]
+    handlers = {
         "console": {
             "class": "logging.StreamHandler",
             "formatter": "default",
         },
         "file": {
             "class": "logging.FileHandler",
-            "filename": "app_errors.log",
-            "formatter": "default",
-        }
-    },
-    "loggers": {
-        "app": {
-            "handlers": ["console", "file"],
+            "filename": LOG_FILE,
+            "formatter": "json" if json_lines else "default",
+        },
+    }
+    if use_queue:
+        # named to sort after its targets, which dictConfig creates first
+        handlers["queue"] = {"()": "src.log_queue.queue_handler", "handlers": targets}
+        targets = ["queue"]
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {
+            "default": {
+                "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                "datefmt": "%Y-%m-%d %H:%M:%S",
+            },
+            "json": {
+                "()": "src.log_queue.JsonFormatter",
+            },
+        },
+        "filters": {
+            "dedup": {
+                "()": "src.log_queue.DedupFilter",
+                "interval": float(os.getenv("LOG_DEDUP_INTERVAL", "60")),
+                "burst": int(os.getenv("LOG_DEDUP_BURST", "5")),
+            },
+        },
+        "handlers": handlers,
+        "loggers": {
+            "app": {
+                "handlers": targets,
+                "filters": ["dedup"],
+                "level": "INFO",
+                "propagate": False,
+            },
+        },
+        "root": {
+            "handlers": targets,
             "level": "INFO",
-            "propagate": False,
         },
-    },
-    "root": {
-        "handlers": ["console", "file"],
-        "level": "INFO",
-    },
-}
-
-dictConfig(LOGGING_CONFIG)
+    }
+
+
+def configure_logging(config=None):
+    """Apply `config` (default `LOGGING_CONFIG`) with `dictConfig`.
+
+    `dictConfig` replaces a logger's handlers but adds its filters to
+    the existing ones, so the previous sampling filter is removed first.
+    """
+    app_logger = logging.getLogger("app")
+    for log_filter in list(app_logger.filters):
+        if isinstance(log_filter, DedupFilter):
+            app_logger.removeFilter(log_filter)
+    dictConfig(LOGGING_CONFIG if config is None else config)
+
+
+LOGGING_CONFIG = logging_config()
+
+configure_logging()
 logger = logging.getLogger("app")
 
+
+def _will_log(key):
+    """Whether an error logged with `dedup_key=key` would be written."""
+    if not logger.isEnabledFor(logging.ERROR):
+        return False
+    for log_filter in logger.filters:
+        if isinstance(log_filter, DedupFilter) and not log_filter.allows(key):
+            return False
+    return True
+
+
+def _body_for_log(raw_body: bytes) -> str:
+    """The request body as text, cut to `LOG_BODY_LIMIT` bytes (default 1024)."""
+    limit = int(os.getenv("LOG_BODY_LIMIT", "1024"))
+    text = raw_body[:limit].decode("utf-8", errors="ignore")
+    if len(raw_body) > limit:
+        text += f"... ({len(raw_body)} bytes)"
+    return text
+
+
 app = FastAPI()
 
 # API Key Authentication Setup
-api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 VALID_API_KEY = "MY_SECRET_KEY"
-
-def verify_api_key(api_key: str = Security(api_key_header)):
-    if api_key is None or not secrets.compare_digest(api_key, VALID_API_KEY):
-        logger.error(f"Unauthorized access attempt with API key: {api_key}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or missing API Key",
-        )
-    return api_key
+API_KEYS = KeyStore.from_env(VALID_API_KEY)
+verify_api_key = APIKeyAuth(API_KEYS, log=logger)
 
 # Exception handler for request validation errors (invalid requests)
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    raw_body = await request.body()
-    logger.error(f"Validation error for request: {raw_body.decode('utf-8', errors='ignore')} - Errors: {exc.errors()}")
+    # the same mistake on the same route is one kind of error, whatever the
+    # body; once it is being sampled out the body is not even read
+    key = ("validation", request.url.path, tuple((e["type"], tuple(e["loc"])) for e in exc.errors()))
+    if _will_log(key):
+        body = _body_for_log(await request.body())
+    else:
+        body = "(not read)"
+    logger.error(
+        "Validation error for request: %s - Errors: %s",
+        body,
+        exc.errors(),
+        extra={"dedup_key": key},
+    )
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={"detail": exc.errors(), "body": exc.body},
@@ -71,7 +146,13 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 # Exception handler for HTTP exceptions (e.g. unauthorized)
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
-    logger.error(f"HTTP error {exc.status_code} at {request.url}: {exc.detail}")
+    logger.error(
+        "HTTP error %s at %s: %s",
+        exc.status_code,
+        request.url,
+        exc.detail,
+        extra={"dedup_key": ("http", exc.status_code, request.url.path, str(exc.detail))},
+    )
     return JSONResponse(
         status_code=exc.status_code,
         content={"message": exc.detail},
@@ -79,7 +160,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 
 # Example secured API endpoint that requires the API key
 @app.post("/qa")
-async def qa_endpoint(query: str, api_key: str = Security(verify_api_key)):
+async def qa_endpoint(query: str, api_key: ApiKey = Security(verify_api_key)):
     logger.info(f"QA query received: {query}")
     response_text = f"Answer generated for: {query}"
     return {"response": response_text}
@@ -13,6 +13,7 @@ Features:
 
 Environment variables:
 - SERVICE_API_KEY : required to call /predict (for this example)
+- API_KEYS_FILE   : optional JSON file of keys replacing SERVICE_API_KEY
 - OPENAI_API_KEY  : optional, used by make_chat_llm if present
 - HF_INFERENCE_API_TOKEN : optional, used to call hosted HF inference
 - HF_INFERENCE_API_URL : optional override for HF endpoint
@@ -29,9 +30,10 @@ import logging
 from typing import Optional, Dict, Any
 
 import requests
-from fastapi import FastAPI, Header, HTTPException, Request, status
+from fastapi import FastAPI, HTTPException, Request, Security
 from pydantic import BaseModel
 
+from src.auth import APIKeyAuth, ApiKey, KeyStore
 from src.utils import make_chat_llm, invoke_llm_safely, get_openai_api_key
 
 
@@ -42,6 +44,7 @@ if not logger.handlers:
 
 
 SERVICE_API_KEY = os.environ.get("SERVICE_API_KEY", "dev-key")
+API_KEYS = KeyStore.from_env(SERVICE_API_KEY)
 HF_TOKEN = os.environ.get("HF_INFERENCE_API_TOKEN")
 HF_URL = os.environ.get("HF_INFERENCE_API_URL")
 
@@ -64,10 +67,7 @@ class PredictResponse(BaseModel):
 METRICS: Dict[str, int] = {"requests": 0, "llm_calls": 0, "hf_calls": 0}
 
 
-def require_api_key(x_api_key: Optional[str]):
-    if not x_api_key or x_api_key != SERVICE_API_KEY:
-        logger.warning("Unauthorized access attempt")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API Key")
+require_api_key = APIKeyAuth(API_KEYS, detail="Invalid API Key", log=logger)
 
 
 @app.get("/health")
@@ -82,7 +82,7 @@ def ready():
 
 
 @app.post("/predict", response_model=PredictResponse)
-def predict(req: PredictRequest, x_api_key: Optional[str] = Header(None)):
+def predict(req: PredictRequest, key: ApiKey = Security(require_api_key)):
     """Return a text completion/answer.
 
     The endpoint requires a service API key in the `X-API-KEY` header.
@@ -90,7 +90,6 @@ def predict(req: PredictRequest, x_api_key: Optional[str] = Header(None)):
     `make_chat_llm`, and falls back to calling the Hugging Face
     Inference API when `HF_INFERENCE_API_TOKEN` is set.
     """
-    require_api_key(x_api_key)
     METRICS["requests"] += 1
 
     prompt = req.prompt
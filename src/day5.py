@@ -1,13 +1,24 @@
-from fastapi import FastAPI, HTTPException
+import os
+from typing import List
+
+from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel
 
+from src.user_store import UserStore
+
 app = FastAPI()
 
 class User(BaseModel):
     name: str
     age: int
 
-users_db = {}
+class UserPage(BaseModel):
+    users: List[User]
+    total: int
+    next_offset: int | None = None
+
+# USER_STORE_PATH keeps users on disk (an append-only JSON lines file)
+users_db = UserStore(User, path=os.getenv("USER_STORE_PATH") or None)
 
 @app.post(
     "/user",
@@ -22,9 +33,39 @@ async def create_user(user: User):
     - **Request Body:** User object (name, age)
     - **Response:** The created user object
     """
-    users_db[user.name] = user
+    users_db.put(user)
     return user
 
+@app.post(
+    "/users",
+    status_code=201,
+    summary="Create several users",
+    response_description="The number of users created"
+)
+async def create_users(users: List[User]):
+    """
+    Create (or replace, by name) many users in one request.
+    - **Request Body:** list of User objects
+    - **Response:** {"created": count}
+    """
+    return {"created": users_db.put_many(users)}
+
+@app.get(
+    "/users",
+    response_model=UserPage,
+    summary="List users",
+    response_description="A page of users in creation order"
+)
+async def list_users(offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """
+    List users in the order they were created.
+    - **Query Parameters:** offset, limit (at most 1000)
+    - **Response:** users, total and next_offset (null on the last page)
+    """
+    users = users_db.page(offset, limit)
+    next_offset = offset + limit if offset + limit < len(users_db) else None
+    return {"users": users, "total": len(users_db), "next_offset": next_offset}
+
 @app.get(
     "/user/{name}",
     response_model=User,
@@ -37,7 +78,7 @@ async def get_user(name: str):
     - **Path Parameter:** name (str)
     - **Response:** The user object if found, 404 if not found
     """
-    user = next((v for k, v in users_db.items() if k.lower() == name.lower()), None)
+    user = users_db.find(name)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -1,14 +1,29 @@
-from fastapi import FastAPI, Depends
-from sqlmodel import SQLModel, Session, Field, create_engine, select
+from fastapi import FastAPI, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel import SQLModel, Session, Field, select
 from typing import Optional, List
 
+from src.db import (
+    NDJSON_MEDIA_TYPE, bulk_insert, keyset_page, make_engine, next_link, parse_rows, stream_ndjson,
+)
+
 
 class Task(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     description: str
 
+
+class TaskCreate(SQLModel):
+    description: str
+
+
+class BulkCreated(SQLModel):
+    created: int
+    ids: List[int]
+
 sqlite_file = "tasks.db"
-engine = create_engine(f"sqlite:///{sqlite_file}", echo=False)
+engine = make_engine(sqlite_file)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
@@ -40,15 +55,54 @@ def create_task(task: Task, session: Session = Depends(get_session)):
     session.refresh(task)
     return task
 
+@app.post(
+    "/tasks/bulk",
+    response_model=BulkCreated,
+    status_code=201,
+    summary="Create many tasks",
+    response_description="The number of tasks created and their ids"
+)
+async def create_tasks_bulk(request: Request):
+    """
+    Create many tasks in one transaction.
+    - **Request Body:** a JSON array of task objects (description), or
+      one task object per line with Content-Type: application/x-ndjson
+    - **Response:** the number of tasks created and their ids, in the
+      order given; 422 (nothing created) if any task is invalid
+    """
+    rows = parse_rows(await request.body(), request.headers.get("content-type", ""), TaskCreate)
+    ids = await run_in_threadpool(bulk_insert, engine, Task, rows)
+    return {"created": len(ids), "ids": ids}
+
 @app.get(
     "/tasks",
     response_model=List[Task],
     summary="Get all tasks",
     response_description="List of all tasks"
 )
-def read_tasks(session: Session = Depends(get_session)):
+def read_tasks(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[int] = Query(None, ge=0),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    session: Session = Depends(get_session),
+):
     """
-    Retrieve all tasks from the database.
-    - **Response:** List of all task objects
+    Retrieve tasks from the database, ordered by id.
+    - **Query Parameters:** limit and after (return up to `limit` tasks
+      with an id greater than `after`; a `Link` header points at the next
+      page), or format=ndjson to stream every task as one JSON object per
+      line. Without any of them, all tasks are returned in one list.
+    - **Response:** List of task objects
     """
-    return session.exec(select(Task)).all()
+    if format == "ndjson":
+        return StreamingResponse(stream_ndjson(engine, Task), media_type=NDJSON_MEDIA_TYPE)
+    if limit is None and after is None:
+        return session.exec(select(Task)).all()
+    limit = limit or 100
+    tasks = keyset_page(session, Task, after, limit)
+    link = next_link(request, tasks, limit)
+    if link:
+        response.headers["Link"] = link
+    return tasks
@@ -1,7 +1,14 @@
-from fastapi import FastAPI, HTTPException, Depends
-from sqlmodel import SQLModel, Session, Field, create_engine, select
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel import SQLModel, Session, Field, select
 from typing import Optional, List
 
+from src.db import (
+    NDJSON_MEDIA_TYPE, bulk_insert, create_fts5, fts5_search, keyset_page, make_engine, next_link, parse_rows,
+    stream_ndjson,
+)
+
 
 class Book(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -9,15 +16,26 @@ class Book(SQLModel, table=True):
     author: str
 
 
+class BookCreate(SQLModel):
+    title: str
+    author: str
+
+
+class BulkCreated(SQLModel):
+    created: int
+    ids: List[int]
+
+
 class BookUpdate(SQLModel):
     title: Optional[str] = None
     author: Optional[str] = None
 
 sqlite_file = "books.db"
-engine = create_engine(f"sqlite:///{sqlite_file}", echo=True)
+engine = make_engine(sqlite_file)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    create_fts5(engine, Book, ["title", "author"])
 
 def get_session():
     with Session(engine) as session:
@@ -37,12 +55,62 @@ app = FastAPI(lifespan=lifespan)
     summary="Get all books",
     response_description="List of all books"
 )
-def get_books(session: Session = Depends(get_session)):
+def get_books(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[int] = Query(None, ge=0),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    session: Session = Depends(get_session),
+):
     """
-    Retrieve all books from the database.
-    - **Response:** List of all book objects
+    Retrieve books from the database, ordered by id.
+    - **Query Parameters:** limit and after (return up to `limit` books
+      with an id greater than `after`; a `Link` header points at the next
+      page), or format=ndjson to stream every book as one JSON object per
+      line. Without any of them, all books are returned in one list.
+    - **Response:** List of book objects
     """
-    return session.exec(select(Book)).all()
+    if format == "ndjson":
+        return StreamingResponse(stream_ndjson(engine, Book), media_type=NDJSON_MEDIA_TYPE)
+    if limit is None and after is None:
+        return session.exec(select(Book)).all()
+    limit = limit or 100
+    books = keyset_page(session, Book, after, limit)
+    link = next_link(request, books, limit)
+    if link:
+        response.headers["Link"] = link
+    return books
+
+# declared before /books/{id}, which would otherwise take "search" as an id
+@app.get(
+    "/books/search",
+    response_model=List[Book],
+    summary="Search books",
+    response_description="Matching books, best match first"
+)
+def search_books(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    session: Session = Depends(get_session),
+):
+    """
+    Full-text search over titles and authors, ranked by BM25.
+    - **Query Parameters:** q (words that must all appear; end a word with
+      `*` to match it as a prefix, e.g. `tolk*`, at least 3 letters),
+      limit and offset (a `Link` header points at the next page)
+    - **Response:** List of matching book objects, 422 for a shorter prefix
+    """
+    try:
+        books = fts5_search(session, Book, q, limit, offset)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    if len(books) == limit:
+        response.headers["Link"] = f'<{request.url.include_query_params(offset=offset + limit)}>; rel="next"'
+    return books
 
 @app.post(
     "/books",
@@ -62,6 +130,25 @@ def add_book(book: Book, session: Session = Depends(get_session)):
     session.refresh(book)
     return book
 
+@app.post(
+    "/books/bulk",
+    response_model=BulkCreated,
+    status_code=201,
+    summary="Add many books",
+    response_description="The number of books created and their ids"
+)
+async def add_books_bulk(request: Request):
+    """
+    Add many books in one transaction.
+    - **Request Body:** a JSON array of book objects (title, author), or
+      one book object per line with Content-Type: application/x-ndjson
+    - **Response:** the number of books created and their ids, in the
+      order given; 422 (nothing created) if any book is invalid
+    """
+    rows = parse_rows(await request.body(), request.headers.get("content-type", ""), BookCreate)
+    ids = await run_in_threadpool(bulk_insert, engine, Book, rows)
+    return {"created": len(ids), "ids": ids}
+
 @app.delete(
     "/books/{id}",
     response_model=Book,
@@ -0,0 +1,245 @@
+"""SQLModel helpers shared by the database examples (day6 tasks, day7 books).
+
+`make_engine(path)` opens a SQLite file with settings suited to FastAPI's
+threaded handlers, instead of SQLite's defaults (rollback journal,
+`synchronous=FULL`, a 2 MB page cache):
+
+- `journal_mode=WAL`: readers no longer block the writer or each other;
+- `synchronous=NORMAL`: in WAL mode a commit no longer waits for an fsync
+  (the WAL is synced at checkpoints); a power cut can lose the last
+  commits but never corrupts the file;
+- `cache_size` (8 MB per connection), `mmap_size` (256 MB, shared through
+  the OS page cache) and `temp_store=MEMORY`;
+- `busy_timeout` (5 s): a writer waits for the lock instead of failing
+  with "database is locked";
+- a `QueuePool` of `DB_POOL_SIZE` (16) connections plus `DB_MAX_OVERFLOW`
+  (24), 40 in all like FastAPI's thread pool, so pragmas are applied and
+  caches warmed once per kept connection rather than per request.
+
+Each pragma can be overridden with a keyword argument or a
+`SQLITE_<PRAGMA>` environment variable (`SQLITE_SYNCHRONOUS=FULL`); None
+leaves SQLite's default. SQL echo is off unless `echo=True` or `SQL_ECHO=1`.
+
+Listing a table with `.all()` loads every row and serializes one JSON
+array, so memory grows with the table. These helpers page by primary
+key instead (keyset pagination):
+
+- `keyset_page(session, model, after, limit)`: the `limit` rows with
+  `id > after`, in id order. Each page is an index range scan, so page
+  1,000 costs the same as page 1, unlike `OFFSET`.
+- `next_link(request, rows, limit)`: an RFC 8288 `Link` header value
+  pointing at the next page, or None after the last one.
+- `stream_ndjson(engine, model, batch_size)`: an iterator of
+  newline-delimited JSON, fetched `batch_size` rows at a time, each
+  batch in its own short session, for `StreamingResponse`. Memory stays
+  at one batch whatever the table size.
+
+Creating rows one request at a time costs a round trip and a commit
+(an fsync) per row. For bulk loads:
+
+- `parse_rows(body, content_type, schema)`: validates a JSON array, or
+  NDJSON (one object per line) when the content type says so, against
+  `schema` and returns plain dicts. Errors are raised as a
+  `RequestValidationError` whose `loc` gives the row (or line) index.
+- `bulk_insert(engine, model, rows, batch_size)`: inserts the rows in a
+  single transaction, `batch_size` rows per multi-row `INSERT ...
+  RETURNING id`, and returns the assigned ids in input order. A failure
+  rolls back the whole load.
+
+Full-text search uses an FTS5 index over some text columns:
+
+- `create_fts5(engine, model, columns)`: creates `<table>_fts`, an
+  external-content FTS5 table (the text is stored once, in the model's
+  table), plus triggers that keep it in step with every insert, update
+  and delete, and indexes the rows already there. Does nothing if the
+  index exists.
+- `fts5_query(text)`: turns user input into a safe MATCH expression:
+  every word must appear (quoted, so FTS5 operators and stray quotes are
+  just text), and a word ending in `*` matches as a prefix (`tolk*`).
+  Prefixes need `MIN_PREFIX` (3) characters; shorter ones match so much
+  of the index that they raise `ValueError`.
+- `fts5_search(session, model, query, limit, offset, max_candidates)`:
+  the matching rows, best first by BM25. BM25 scores every candidate, so
+  the cost grows with the number of matches; only the first
+  `max_candidates` matches (in rowid order) are ranked, which bounds a
+  query for a very common word at the price of ranking only part of its
+  matches. None ranks them all.
+"""
+from __future__ import annotations
+
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.pool import QueuePool
+from sqlmodel import Session, select
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MIN_PREFIX = 3
+
+SQLITE_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -8000,  # negative: KiB
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,  # ms
+}
+
+
+def sqlite_pragmas(**overrides: Any) -> Dict[str, Any]:
+    """`SQLITE_PRAGMAS`, then `SQLITE_<PRAGMA>` variables, then `overrides`."""
+    pragmas = {name: os.environ.get(f"SQLITE_{name.upper()}", value) for name, value in SQLITE_PRAGMAS.items()}
+    pragmas.update(overrides)
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def make_engine(
+    path: str,
+    echo: Optional[bool] = None,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+    **pragmas: Any,
+) -> Any:
+    if echo is None:
+        echo = os.environ.get("SQL_ECHO", "0").strip().lower() in ("1", "true", "yes", "on")
+    statements = [f"PRAGMA {name}={value}" for name, value in sqlite_pragmas(**pragmas).items()]
+    engine = create_engine(
+        f"sqlite:///{path}",
+        echo=echo,
+        poolclass=QueuePool,
+        pool_size=pool_size if pool_size is not None else int(os.environ.get("DB_POOL_SIZE", "16")),
+        max_overflow=max_overflow if max_overflow is not None else int(os.environ.get("DB_MAX_OVERFLOW", "24")),
+        connect_args={"check_same_thread": False},
+    )
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+    return engine
+
+
+def keyset_page(session: Session, model: Type[Any], after: Optional[int], limit: int) -> List[Any]:
+    query = select(model)
+    if after is not None:
+        query = query.where(model.id > after)
+    return session.exec(query.order_by(model.id).limit(limit)).all()
+
+
+def next_link(request: Any, rows: List[Any], limit: int) -> Optional[str]:
+    if len(rows) < limit:
+        return None
+    url = request.url.include_query_params(after=rows[-1].id, limit=limit)
+    return f'<{url}>; rel="next"'
+
+
+def stream_ndjson(engine: Any, model: Type[Any], batch_size: int = 1000) -> Iterator[bytes]:
+    after = None
+    while True:
+        with Session(engine) as session:
+            rows = keyset_page(session, model, after, batch_size)
+            # one chunk per batch keeps the number of writes low
+            chunk = b"".join(row.model_dump_json().encode("utf-8") + b"\n" for row in rows)
+        if chunk:
+            yield chunk
+        if len(rows) < batch_size:
+            return
+        after = rows[-1].id
+
+
+def parse_rows(body: bytes, content_type: str, schema: Type[Any]) -> List[Dict[str, Any]]:
+    adapter = TypeAdapter(List[schema])
+    if content_type.split(";")[0].strip().lower() == NDJSON_MEDIA_TYPE:
+        items, errors = [], []
+        for number, line in enumerate(body.splitlines()):
+            if not line.strip():
+                continue
+            try:
+                items.append(schema.model_validate_json(line))
+            except ValidationError as exc:
+                errors.extend({**error, "loc": ("body", number, *error["loc"])} for error in exc.errors())
+        if errors:
+            raise RequestValidationError(errors)
+    else:
+        try:
+            items = adapter.validate_json(body)
+        except ValidationError as exc:
+            raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in exc.errors()])
+    # one dump for the whole list is several times faster than model_dump() per row
+    return adapter.dump_python(items)
+
+
+def bulk_insert(engine: Any, model: Type[Any], rows: List[Dict[str, Any]], batch_size: int = 1000) -> List[int]:
+    table = model.__table__
+    statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    ids: List[int] = []
+    with engine.begin() as connection:
+        for start in range(0, len(rows), batch_size):
+            ids.extend(connection.execute(statement, rows[start:start + batch_size]).scalars())
+    return ids
+
+
+def create_fts5(engine: Any, model: Type[Any], columns: List[str]) -> bool:
+    table = model.__tablename__
+    fts = f"{table}_fts"
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    with engine.begin() as connection:
+        if connection.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = ?", (fts,)).first():
+            return False
+        # prefix='3 4' adds small indexes that make short prefix queries (`tol*`) cheap
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='3 4')")
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END")
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END")
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER {fts}_update AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END")
+        connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    return True
+
+
+def fts5_query(query: str) -> str:
+    terms = re.findall(r"(\w+)(\*?)", query)
+    for word, star in terms:
+        if star and len(word) < MIN_PREFIX:
+            raise ValueError(f"a prefix search needs at least {MIN_PREFIX} characters before '*': {word}*")
+    return " ".join(f'"{word}"{star}' for word, star in terms)
+
+
+def fts5_search(
+    session: Session,
+    model: Type[Any],
+    query: str,
+    limit: int,
+    offset: int = 0,
+    max_candidates: Optional[int] = 20000,
+) -> List[Any]:
+    match = fts5_query(query)
+    if not match:
+        return []
+    table = model.__tablename__
+    fts = f"{table}_fts"
+    candidates = f"SELECT rowid, rank FROM {fts} WHERE {fts} MATCH :match"
+    if max_candidates is not None:
+        candidates = f"SELECT rowid, rank FROM ({candidates} LIMIT :candidates)"
+    # rank and cut inside the FTS table first, so only one page of rows is joined
+    statement = text(
+        f"SELECT {table}.* FROM ({candidates} ORDER BY rank LIMIT :limit OFFSET :offset) AS hit "
+        f"JOIN {table} ON {table}.id = hit.rowid ORDER BY hit.rank")
+    params = {"match": match, "limit": limit, "offset": offset, "candidates": max_candidates}
+    return list(session.execute(select(model).from_statement(statement), params).scalars())
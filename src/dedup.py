@@ -0,0 +1,168 @@
+"""Near-duplicate chunk elimination for RAG ingestion.
+
+Extracted PDFs repeat headers, footers, disclaimers and boilerplate
+pages. Every copy costs an embedding call and a slot in the index, and
+duplicates crowd the top-k. `MinHashDeduplicator` drops chunks whose
+word-shingle Jaccard similarity with an already kept chunk is at least
+`threshold`:
+
+- each chunk is reduced to the hashes of its word `shingle_size`-grams;
+- a `num_perm`-value MinHash signature is computed with NumPy;
+- the signature is cut into `bands` bands, and chunks that share a band
+  bucket with a kept chunk (LSH) are candidates;
+- candidates are confirmed with the exact Jaccard similarity of the
+  shingle sets, so LSH only prunes comparisons and never merges chunks
+  on its own.
+
+The first copy of a chunk is kept. Its metadata gains a `duplicates`
+list with the `source`/`page` of every copy dropped in its favour, so
+answers can still cite all locations.
+
+Work is linear in the number of chunks (plus the candidate checks).
+`numpy` is imported lazily.
+"""
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from src.bm25 import tokenize
+
+_PRIME = (1 << 31) - 1
+
+
+class DedupResult(NamedTuple):
+    """Outcome of `MinHashDeduplicator.deduplicate`.
+
+    `duplicate_of` maps the input position of each dropped chunk to the
+    document kept in its place.
+    """
+
+    kept: List[Any]
+    duplicate_of: Dict[int, Any]
+
+    @property
+    def saved(self) -> int:
+        """Number of embeddings avoided."""
+        return len(self.duplicate_of)
+
+
+class MinHashDeduplicator:
+    """Drop near-duplicate documents using MinHash signatures and LSH.
+
+    With the defaults (64 permutations in 16 bands of 4 rows) a pair with
+    Jaccard similarity 0.8 becomes a candidate with probability > 0.999.
+    Pairs near 0.3 are still candidates about 12% of the time, which only
+    costs an exact check.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16, shingle_size: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        import numpy as np
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        # one bucket table per band: band bytes -> kept positions
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._shingles: List[frozenset] = []
+        self._docs: List[Any] = []
+
+    def shingles(self, text: str) -> frozenset:
+        """Return the CRC32 hashes of the word shingles of `text`."""
+        words = tokenize(text)
+        k = self.shingle_size
+        if len(words) <= k:
+            grams = [" ".join(words)]
+        else:
+            grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+        return frozenset(zlib.crc32(g.encode("utf-8")) % _PRIME for g in grams)
+
+    def signature(self, shingles: frozenset):
+        """Return the MinHash signature (uint64 array of `num_perm`) of a set."""
+        import numpy as np
+
+        x = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        # a * x + b < 2**62 for 31-bit a, b and x, so uint64 never overflows
+        return ((self._a * x + self._b) % _PRIME).min(axis=1)
+
+    @staticmethod
+    def jaccard(a: frozenset, b: frozenset) -> float:
+        if not a and not b:
+            return 1.0
+        return len(a & b) / len(a | b)
+
+    def add(self, doc: Any) -> Optional[int]:
+        """Offer a document; return the kept position it duplicates, or None.
+
+        Kept documents are numbered in the order they were accepted.
+        """
+        shingles = self.shingles(getattr(doc, "page_content", "") or "")
+        sig = self.signature(shingles)
+        band_keys = [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+        checked = set()
+        for band, key in enumerate(band_keys):
+            for pos in self._buckets[band].get(key, ()):
+                if pos in checked:
+                    continue
+                checked.add(pos)
+                if self.jaccard(shingles, self._shingles[pos]) >= self.threshold:
+                    return pos
+
+        pos = len(self._docs)
+        self._docs.append(doc)
+        self._shingles.append(shingles)
+        for band, key in enumerate(band_keys):
+            self._buckets[band].setdefault(key, []).append(pos)
+        return None
+
+    def deduplicate(self, docs: List[Any]) -> DedupResult:
+        """Keep the first copy of each group of near-duplicate documents.
+
+        Documents offered in earlier calls count as already kept.
+        """
+        kept: List[Any] = []
+        duplicate_of: Dict[int, Any] = {}
+        for i, doc in enumerate(docs):
+            pos = self.add(doc)
+            if pos is None:
+                kept.append(doc)
+            else:
+                duplicate_of[i] = self._docs[pos]
+                _record_duplicate(self._docs[pos], doc)
+        return DedupResult(kept, duplicate_of)
+
+
+def _record_duplicate(kept: Any, dropped: Any) -> None:
+    """Append the location of `dropped` to `kept.metadata["duplicates"]`."""
+    meta = getattr(kept, "metadata", None)
+    if not isinstance(meta, dict):
+        return
+    dropped_meta = getattr(dropped, "metadata", None) or {}
+    if not isinstance(dropped_meta, dict):
+        return
+    location = {k: dropped_meta[k] for k in ("source", "page") if k in dropped_meta}
+    meta.setdefault("duplicates", []).append(location)
+
+
+def deduplicate_documents(docs: List[Any], threshold: Optional[float] = None) -> DedupResult:
+    """Deduplicate `docs` using the `RAG_DEDUP*` environment settings.
+
+    `RAG_DEDUP=0` disables the stage (everything is kept);
+    `RAG_DEDUP_THRESHOLD` sets the Jaccard threshold (default 0.8).
+    """
+    if os.environ.get("RAG_DEDUP", "1").strip().lower() in ("0", "false", "no", "off"):
+        return DedupResult(list(docs), {})
+    if threshold is None:
+        threshold = float(os.environ.get("RAG_DEDUP_THRESHOLD", "0.8"))
+    return MinHashDeduplicator(threshold=threshold).deduplicate(list(docs))
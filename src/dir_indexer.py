@@ -0,0 +1,217 @@
+"""Incremental directory indexer with change detection.
+
+`DirectoryIndexer` keeps a FAISS vector store for the files matching a
+glob pattern in sync with the directory, without re-embedding files that
+did not change. A JSON manifest stored next to the saved index records,
+for each file, its mtime, size, SHA-256 and the docstore ids of its
+vectors. On each `sync()`:
+
+- files whose mtime and size match the manifest are skipped without
+  being read;
+- files whose metadata changed but whose content hash did not only get
+  their manifest entry refreshed;
+- added and changed files are loaded and embedded, and the vectors of
+  changed and deleted files are removed by id.
+
+The manifest also records the index configuration: the embeddings
+class and its model / dimension attributes, and the FAISS index type.
+Vectors from another model (or of another size) cannot share an index,
+so when the configuration differs from the one the index was built with,
+or is missing, everything is reindexed.
+
+`watch()` polls the directory and applies changes continuously.
+
+The vector store must support `add_documents(..., ids=...)`, `delete(ids)`,
+`save_local()` and `load_local()`, as LangChain's FAISS does. Note that
+FAISS HNSW indexes do not support removal; use `flat` or `ivf` index types
+(see `src/ann_index.py`) when files can change or disappear.
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from src.ann_index import build_vector_store, get_index_config
+
+logger = logging.getLogger("dir_indexer")
+
+MANIFEST_NAME = "manifest.json"
+
+
+def index_config(embeddings: Any) -> Dict[str, Any]:
+    """What an index's vectors depend on: the embeddings class, its
+    model and dimension settings, and the FAISS index type."""
+    cls = type(embeddings)
+    config: Dict[str, Any] = {"embeddings": f"{cls.__module__}.{cls.__qualname__}"}
+    for attr in ("model", "model_name", "dim", "dimensions"):
+        value = getattr(embeddings, attr, None)
+        if isinstance(value, (str, int)):
+            config[attr] = value
+    config["index_type"] = get_index_config()["index_type"]
+    return config
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class DirectoryIndexer:
+    """Keep a persisted vector store in sync with files in a directory.
+
+    `load` turns a file path into a list of documents; the indexer sets
+    `metadata["source"]` to the path relative to `directory`.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        pattern: str,
+        index_dir: str,
+        embeddings: Any,
+        vectorstore_cls: Any,
+        load: Callable[[str], List[Any]],
+    ):
+        self.directory = directory
+        self.pattern = pattern
+        self.index_dir = index_dir
+        self.embeddings = embeddings
+        self.vectorstore_cls = vectorstore_cls
+        self.load = load
+        self.manifest_path = os.path.join(index_dir, MANIFEST_NAME)
+        self.config = index_config(embeddings)
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.vector_store = None
+        self._load_state()
+
+    def _load_state(self) -> None:
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get("config") != self.config:
+            logger.warning("Index in %s was built with %s, not %s; reindexing everything",
+                           self.index_dir, manifest.get("config"), self.config)
+            return
+        files = manifest.get("files", {})
+        has_vectors = any(entry["ids"] for entry in files.values())
+        if has_vectors:
+            try:
+                self.vector_store = self.vectorstore_cls.load_local(
+                    self.index_dir, self.embeddings, allow_dangerous_deserialization=True
+                )
+            except Exception:
+                # manifest without a readable index: start over
+                logger.warning("Could not load index from %s; reindexing everything", self.index_dir)
+                return
+        self.files = files
+
+    def _save_state(self) -> None:
+        os.makedirs(self.index_dir, exist_ok=True)
+        if self.vector_store is not None:
+            self.vector_store.save_local(self.index_dir)
+        # write the manifest last and atomically so it never describes
+        # vectors that were not saved
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"config": self.config, "files": self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def current_files(self) -> List[str]:
+        """Return matching file paths relative to `directory`, sorted."""
+        paths = glob.glob(os.path.join(self.directory, self.pattern))
+        return sorted(os.path.relpath(p, self.directory) for p in paths if os.path.isfile(p))
+
+    def documents(self) -> List[Any]:
+        """Return all indexed documents, in index order."""
+        store = self.vector_store
+        if store is None:
+            return []
+        return [store.docstore.search(doc_id) for doc_id in store.index_to_docstore_id.values()]
+
+    def sync(self) -> Dict[str, Any]:
+        """Apply directory changes to the index and return a change report."""
+        report: Dict[str, Any] = {"added": [], "changed": [], "removed": [], "unchanged": 0}
+        new_entries: Dict[str, Dict[str, Any]] = {}
+        new_docs: List[Any] = []
+        new_ids: List[str] = []
+        stale_ids: List[str] = []
+        dirty = False
+
+        current = self.current_files()
+        for rel in list(current):
+            full = os.path.join(self.directory, rel)
+            entry = self.files.get(rel)
+            try:
+                st = os.stat(full)
+                if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                    report["unchanged"] += 1
+                    continue
+                digest = file_digest(full)
+                if entry and entry["sha256"] == digest:
+                    entry.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                    report["unchanged"] += 1
+                    dirty = True
+                    continue
+                docs = self.load(full)
+            except FileNotFoundError:
+                # deleted or renamed since the glob: removed on this pass
+                current.remove(rel)
+                continue
+
+            report["changed" if entry else "added"].append(rel)
+            if entry:
+                stale_ids.extend(entry["ids"])
+            for doc in docs:
+                doc.metadata["source"] = rel
+            ids = [str(uuid.uuid4()) for _ in docs]
+            new_docs.extend(docs)
+            new_ids.extend(ids)
+            new_entries[rel] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest, "ids": ids}
+
+        for rel in sorted(set(self.files) - set(current)):
+            report["removed"].append(rel)
+            stale_ids.extend(self.files.pop(rel)["ids"])
+
+        if stale_ids and self.vector_store is not None:
+            self.vector_store.delete(stale_ids)
+        if new_docs:
+            if self.vector_store is None:
+                self.vector_store = build_vector_store(new_docs, self.embeddings, self.vectorstore_cls, ids=new_ids)
+            else:
+                self.vector_store.add_documents(new_docs, ids=new_ids)
+        self.files.update(new_entries)
+
+        if dirty or new_entries or report["removed"]:
+            self._save_state()
+        report["embedded"] = len(new_docs)
+        return report
+
+    def watch(self, interval: float = 2.0, stop: Optional[Any] = None, on_change: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        """Poll the directory every `interval` seconds and apply changes.
+
+        Runs until `stop` (a `threading.Event`) is set, or forever.
+        """
+        while stop is None or not stop.is_set():
+            report = self.sync()
+            if report["added"] or report["changed"] or report["removed"]:
+                logger.info(
+                    "Index updated: %d added, %d changed, %d removed",
+                    len(report["added"]), len(report["changed"]), len(report["removed"]),
+                )
+                if on_change is not None:
+                    on_change(report)
+            if stop is not None:
+                stop.wait(interval)
+            else:
+                time.sleep(interval)
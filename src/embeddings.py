@@ -0,0 +1,193 @@
+"""Embedding backends for the RAG examples.
+
+`make_embeddings()` returns the embeddings object used to index and query
+documents, selected with the `EMBEDDINGS_BACKEND` environment variable:
+
+- `openai` (default): the caller's `OpenAIEmbeddings`; needs network and
+  an API key.
+- `hashing`: `HashingEmbeddings`, a deterministic hashed n-gram
+  vectorizer. No model download, no network, stable across processes.
+- `sentence-transformers`: `SentenceTransformerEmbeddings`, a small local
+  model on CPU (`EMBEDDINGS_MODEL`, default `all-MiniLM-L6-v2`).
+
+Local backends produce fixed-dimension float32 vectors in batches and
+implement the LangChain `Embeddings` interface, so they plug into FAISS
+unchanged. `embed_array()` returns the NumPy matrix directly for callers
+that want to skip list conversion.
+"""
+from __future__ import annotations
+
+import os
+import re
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    from langchain_core.embeddings import Embeddings as _EmbeddingsBase  # type: ignore
+except Exception:
+    _EmbeddingsBase = object
+
+
+BACKENDS = ("openai", "hashing", "sentence-transformers")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class HashingEmbeddings(_EmbeddingsBase):
+    """Deterministic hashed n-gram embeddings computed with NumPy.
+
+    Each text is represented by its lowercase words plus the byte
+    trigrams of the normalised text. Words are hashed with CRC32 (cached
+    per word); trigrams are packed and hashed for the whole batch at once
+    with a vectorised integer mix, so no per-character Python work is
+    done. Features land in `dim` signed buckets, are counted with a
+    single `np.bincount`, and rows are L2-normalised so inner product and
+    L2 distance rank alike.
+    """
+
+    def __init__(self, dim: int = 384, batch_size: int = 256, max_cache: int = 1 << 20):
+        self.dim = dim
+        self.batch_size = batch_size
+        self.max_cache = max_cache
+        # word -> signed (slot + 1); avoids re-hashing frequent words
+        self._codes: Dict[str, int] = {}
+
+    def _code(self, word: str) -> int:
+        h = zlib.crc32(word.encode("utf-8"))
+        code = h % self.dim + 1
+        code = -code if h & 0x80000000 else code
+        if len(self._codes) >= self.max_cache:
+            self._codes.clear()
+        self._codes[word] = code
+        return code
+
+    @staticmethod
+    def _mix32(h):
+        """murmur3 finaliser on a uint64 array holding 32-bit values."""
+        h = h ^ (h >> 16)
+        h = (h * 0x85EBCA6B) & 0xFFFFFFFF
+        h = h ^ (h >> 13)
+        h = (h * 0xC2B2AE35) & 0xFFFFFFFF
+        return h ^ (h >> 16)
+
+    def _embed_batch(self, texts: Sequence[str]):
+        import numpy as np
+
+        dim = self.dim
+        codes_cache = self._codes
+        word_rows: List[int] = []
+        word_codes: List[int] = []
+        normalised = []
+        for row, text in enumerate(texts):
+            words = _WORD_RE.findall(text.lower())
+            normalised.append(" ".join(words))
+            word_codes.extend([codes_cache.get(w) or self._code(w) for w in words])
+            word_rows.extend([row] * len(words))
+        word_codes_arr = np.asarray(word_codes, dtype=np.int64)
+        word_flat = np.asarray(word_rows, dtype=np.int64) * dim + (np.abs(word_codes_arr) - 1)
+        word_sign = np.sign(word_codes_arr).astype(np.float64)
+
+        # byte trigrams of all texts, separated by NUL so none spans two texts
+        buf = np.frombuffer("\0".join(normalised).encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        if len(buf) >= 3:
+            a, b, c = buf[:-2], buf[1:-1], buf[2:]
+            keep = (a != 0) & (b != 0) & (c != 0)
+            h = self._mix32(((a << 16) | (b << 8) | c)[keep])
+            # the row of position p is the number of NULs before it
+            rows = np.cumsum(buf == 0)[:-2][keep].astype(np.int64)
+            gram_flat = rows * dim + (h >> 1).astype(np.int64) % dim
+            gram_sign = np.where(h & 1, -1.0, 1.0)
+        else:
+            gram_flat = np.zeros(0, dtype=np.int64)
+            gram_sign = np.zeros(0)
+
+        out = np.bincount(
+            np.concatenate([word_flat, gram_flat]),
+            weights=np.concatenate([word_sign, gram_sign]),
+            minlength=len(texts) * dim,
+        )
+        out = out.reshape(len(texts), dim).astype(np.float32)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+    def embed_array(self, texts: Sequence[str]):
+        """Return a `(len(texts), dim)` float32 matrix."""
+        import numpy as np
+
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        batches = [self._embed_batch(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        return np.vstack(batches)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+
+class SentenceTransformerEmbeddings(_EmbeddingsBase):
+    """Small sentence-transformer model run locally on CPU.
+
+    The model is loaded on first use so constructing the backend is cheap.
+    Requires the optional `sentence-transformers` package.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 64, device: str = "cpu"):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.device = device
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer  # type: ignore
+
+            self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def embed_array(self, texts: Sequence[str]):
+        import numpy as np
+
+        vectors = self._get_model().encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+
+def get_embeddings_backend(backend: Optional[str] = None) -> str:
+    """Return the configured embeddings backend, validating its value."""
+    if backend is None:
+        backend = os.environ.get("EMBEDDINGS_BACKEND", "openai")
+    backend = backend.strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embeddings backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    return backend
+
+
+def make_embeddings(backend: Optional[str] = None, openai_factory: Optional[Callable[[], Any]] = None):
+    """Create the embeddings object for the configured backend.
+
+    `openai_factory` builds the OpenAI embeddings for the `openai` backend;
+    callers pass their own `OpenAIEmbeddings` so the import (and test
+    doubles) stay under their control.
+    """
+    backend = get_embeddings_backend(backend)
+    if backend == "hashing":
+        return HashingEmbeddings(dim=int(os.environ.get("EMBEDDINGS_DIM", "384")))
+    if backend == "sentence-transformers":
+        return SentenceTransformerEmbeddings(os.environ.get("EMBEDDINGS_MODEL", "all-MiniLM-L6-v2"))
+    if openai_factory is None:
+        raise ValueError("The openai embeddings backend needs an openai_factory")
+    return openai_factory()
@@ -0,0 +1,356 @@
+"""Compact columnar index over the API call log written by `day22`.
+
+`day22` appends lines like
+
+    [2025-10-24 10:01:58] Endpoint: /some-endpoint | User: JohnDoe
+
+to `api_logs.txt`. `LogIndex` ingests them incrementally into a
+directory of fixed-width column files, so questions such as "calls per
+user per hour" become array operations instead of a grep over the text:
+
+- `ts.i8`: int64 seconds since 1970-01-01 of the log's wall-clock time
+  (the log has no timezone, so none is applied);
+- `user.u4`, `endpoint.u4`: uint32 codes into the `users` / `endpoints`
+  dictionaries kept in `meta.json`.
+
+`meta.json` also records the byte offset and inode of the log after the
+last ingest. `ingest()` only parses lines appended since then, and only
+complete ones, so it is safe to run while the server is writing. When
+the log was rotated (`api_logs.txt.1`, see `src/buffered_log.py`) the
+rest of the old file is read before the new one. The meta file is
+replaced atomically after the columns are written, and rows past its
+count are truncated on open, so an interrupted ingest leaves no
+half-counted data.
+
+Rows stay in log order. While timestamps are non-decreasing (the normal
+case for an append-only log), time ranges are found by binary search.
+`numpy` is imported lazily.
+
+    python -m src.log_index --by user,hour --start "2025-10-24 00:00:00"
+"""
+from __future__ import annotations
+
+import argparse
+import calendar
+import gc
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+LINE_RE = re.compile(rb"^\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] Endpoint: ([^\n|]*) \| User: ([^\r\n]*)\r?$", re.M)
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+BUCKETS = {"minute": 60, "hour": 3600, "day": 86400}
+COLUMNS = {"ts": ("ts.i8", "<i8"), "user": ("user.u4", "<u4"), "endpoint": ("endpoint.u4", "<u4")}
+READ_CHUNK = 16 * 1024 * 1024
+
+TimeLike = Union[None, int, float, str]
+
+
+def parse_time(value: TimeLike) -> Optional[int]:
+    """`"YYYY-mm-dd[ HH:MM:SS]"` or seconds -> int seconds, in log time."""
+    if value is None or isinstance(value, (int, float)):
+        return None if value is None else int(value)
+    fmt = TIME_FORMAT if " " in value.strip() else "%Y-%m-%d"
+    return calendar.timegm(time.strptime(value.strip(), fmt))
+
+
+def format_time(seconds: int) -> str:
+    return time.strftime(TIME_FORMAT, time.gmtime(int(seconds)))
+
+
+class _Dictionary(dict):
+    """bytes -> code, appending unseen values to `names` (the meta list)."""
+
+    def __init__(self, names: List[str]):
+        super().__init__((name.encode("utf-8"), i) for i, name in enumerate(names))
+        self.names = names
+
+    def __missing__(self, value: bytes) -> int:
+        code = self[value] = len(self.names)
+        self.names.append(value.decode("utf-8", "replace"))
+        return code
+
+
+class _Timestamps(dict):
+    """Log timestamp bytes -> seconds, parsed once per distinct second."""
+
+    def __init__(self):
+        super().__init__()
+        self._days: Dict[bytes, int] = {}
+
+    def __missing__(self, stamp: bytes) -> int:
+        if len(self) > 1_000_000:
+            self.clear()
+        day = self._days.get(stamp[:10])
+        if day is None:
+            day = self._days[stamp[:10]] = calendar.timegm(time.strptime(stamp[:10].decode(), "%Y-%m-%d"))
+        seconds = self[stamp] = day + int(stamp[11:13]) * 3600 + int(stamp[14:16]) * 60 + int(stamp[17:19])
+        return seconds
+
+
+class LogIndex:
+    """Columnar store for one log file, kept in `directory`."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.meta: Dict[str, Any] = {
+            "rows": 0, "offset": 0, "inode": None, "users": [], "endpoints": [],
+            "last_ts": None, "sorted": True, "skipped": 0,
+        }
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                self.meta.update(json.load(f))
+        self._codes = {"users": _Dictionary(self.meta["users"]), "endpoints": _Dictionary(self.meta["endpoints"])}
+        self._seconds = _Timestamps()
+        self._columns = None
+        self._truncate_columns()
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    def _path(self, column: str) -> str:
+        return os.path.join(self.directory, COLUMNS[column][0])
+
+    def _truncate_columns(self) -> None:
+        # drop rows written by an ingest that did not get to save its meta
+        for column, (_, dtype) in COLUMNS.items():
+            path = self._path(column)
+            size = self.meta["rows"] * int(dtype[-1])
+            if not os.path.exists(path):
+                open(path, "wb").close()
+            elif os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def _save_meta(self) -> None:
+        path = os.path.join(self.directory, "meta.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, path)
+
+    # ingestion
+
+    def ingest(self, log_path: str) -> Dict[str, int]:
+        """Add the lines appended to `log_path` since the last call.
+
+        Returns `{"rows": new rows, "skipped": unparseable lines}`.
+        """
+        stats = {"rows": 0, "skipped": 0}
+        if not os.path.exists(log_path):
+            return stats
+        inode = os.stat(log_path).st_ino
+        if self.meta["inode"] is not None and self.meta["inode"] != inode:
+            rotated = log_path + ".1"
+            if os.path.exists(rotated) and os.stat(rotated).st_ino == self.meta["inode"]:
+                self._ingest_file(rotated, stats)
+            self.meta["offset"] = 0
+        elif os.path.getsize(log_path) < self.meta["offset"]:
+            self.meta["offset"] = 0  # truncated in place
+        self.meta["inode"] = inode
+        self._ingest_file(log_path, stats)
+        self._save_meta()
+        return stats
+
+    def _ingest_file(self, path: str, stats: Dict[str, int]) -> None:
+        with open(path, "rb") as f:
+            f.seek(self.meta["offset"])
+            pending = b""
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                data = pending + chunk
+                end = data.rfind(b"\n") + 1
+                data, pending = data[:end], data[end:]
+                if data:
+                    self._ingest_lines(data, stats)
+                    self.meta["offset"] += len(data)
+
+    def _ingest_lines(self, data: bytes, stats: Dict[str, int]) -> None:
+        import numpy as np
+
+        # millions of small tuples: the cyclic GC only slows their creation
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            matches = LINE_RE.findall(data)
+            skipped = data.count(b"\n") - len(matches)
+            stats["skipped"] += skipped
+            self.meta["skipped"] += skipped
+            if not matches:
+                return
+            n = len(matches)
+            stamps, endpoint_names, user_names = zip(*matches)
+            del matches
+            ts = np.fromiter(map(self._seconds.__getitem__, stamps), dtype="<i8", count=n)
+            endpoints = np.fromiter(map(self._codes["endpoints"].__getitem__, endpoint_names), dtype="<u4", count=n)
+            users = np.fromiter(map(self._codes["users"].__getitem__, user_names), dtype="<u4", count=n)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        last = self.meta["last_ts"]
+        if self.meta["sorted"] and ((last is not None and ts[0] < last) or bool(np.any(ts[1:] < ts[:-1]))):
+            self.meta["sorted"] = False
+        self.meta["last_ts"] = int(ts.max()) if last is None else max(last, int(ts.max()))
+        for column, values in (("ts", ts), ("user", users), ("endpoint", endpoints)):
+            with open(self._path(column), "ab") as f:
+                values.tofile(f)
+        self.meta["rows"] += len(ts)
+        stats["rows"] += len(ts)
+        self._columns = None
+
+    # queries
+
+    def columns(self):
+        """`{"ts", "user", "endpoint"}` arrays, memory-mapped read-only."""
+        import numpy as np
+
+        if self._columns is None or len(self._columns["ts"]) != self.meta["rows"]:
+            rows = self.meta["rows"]
+            self._columns = {
+                column: (np.memmap(self._path(column), dtype=dtype, mode="r", shape=(rows,))
+                         if rows else np.empty(0, dtype=dtype))
+                for column, (_, dtype) in COLUMNS.items()
+            }
+        return self._columns
+
+    def _select(self, start: TimeLike, end: TimeLike, user: Optional[str], endpoint: Optional[str]):
+        import numpy as np
+
+        cols = self.columns()
+        start, end = parse_time(start), parse_time(end)
+        ts, users, endpoints = cols["ts"], cols["user"], cols["endpoint"]
+        if self.meta["sorted"]:
+            lo = 0 if start is None else int(np.searchsorted(ts, start, "left"))
+            hi = len(ts) if end is None else int(np.searchsorted(ts, end, "left"))
+            ts, users, endpoints = ts[lo:hi], users[lo:hi], endpoints[lo:hi]
+            mask = None
+        else:
+            mask = np.ones(len(ts), dtype=bool)
+            if start is not None:
+                mask &= ts >= start
+            if end is not None:
+                mask &= ts < end
+        for name, values, dictionary in ((user, users, "users"), (endpoint, endpoints, "endpoints")):
+            if name is None:
+                continue
+            code = self._codes[dictionary].get(name.encode("utf-8"))
+            match = values == code if code is not None else np.zeros(len(values), dtype=bool)
+            mask = match if mask is None else mask & match
+        if mask is not None:
+            ts, users, endpoints = ts[mask], users[mask], endpoints[mask]
+        return ts, users, endpoints
+
+    def count(self, start: TimeLike = None, end: TimeLike = None,
+              user: Optional[str] = None, endpoint: Optional[str] = None) -> int:
+        """Number of calls in `[start, end)`, optionally for one user/endpoint."""
+        return len(self._select(start, end, user, endpoint)[0])
+
+    def aggregate(
+        self,
+        by: Sequence[str] = ("user", "hour"),
+        start: TimeLike = None,
+        end: TimeLike = None,
+        user: Optional[str] = None,
+        endpoint: Optional[str] = None,
+    ) -> List[Tuple]:
+        """Count calls grouped by `by` within `[start, end)`.
+
+        `by` lists `user`, `endpoint` and at most one of `minute`, `hour`,
+        `day`. Returns `(key..., count)` tuples sorted by key, with time
+        buckets formatted as their start time.
+        """
+        import numpy as np
+
+        ts, users, endpoints = self._select(start, end, user, endpoint)
+        if not len(ts):
+            return []
+        keys, labels = [], []
+        for field in by:
+            if field == "user":
+                keys.append((users, len(self.meta["users"])))
+                labels.append(lambda v: self.meta["users"][v])
+            elif field == "endpoint":
+                keys.append((endpoints, len(self.meta["endpoints"])))
+                labels.append(lambda v: self.meta["endpoints"][v])
+            elif field in BUCKETS:
+                size = BUCKETS[field]
+                buckets = ts // size
+                if self.meta["sorted"]:
+                    first, last = int(buckets[0]), int(buckets[-1])
+                else:
+                    first, last = int(buckets.min()), int(buckets.max())
+                buckets -= first
+                keys.append((buckets, last - first + 1))
+                labels.append(lambda v, size=size, first=first: format_time((v + first) * size))
+            else:
+                raise ValueError(f"cannot group by {field!r}; use user, endpoint, {', '.join(BUCKETS)}")
+        if not keys:
+            return [(len(ts),)]
+
+        # one int64 key per row, mixed-radix over the grouped columns
+        combined = keys[0][0].astype(np.int64)
+        cardinality = keys[0][1]
+        for values, n in keys[1:]:
+            combined *= n
+            combined += values
+            cardinality *= n
+        if cardinality <= 4 * len(ts) + (1 << 20):
+            counts = np.bincount(combined, minlength=cardinality)
+            groups = np.flatnonzero(counts)
+            counts = counts[groups]
+        else:
+            groups, counts = np.unique(combined, return_counts=True)
+
+        # split the combined keys back into their parts, column-wise
+        parts = []
+        for _, size in reversed(keys):
+            groups, part = np.divmod(groups, size)
+            parts.append(part)
+        parts.reverse()
+        columns = []
+        for label, part in zip(labels, parts):
+            distinct, inverse = np.unique(part, return_inverse=True)
+            names = [label(v) for v in distinct.tolist()]
+            columns.append([names[i] for i in inverse.reshape(-1).tolist()])
+        result = list(zip(*columns, counts.tolist()))
+        result.sort()
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index api_logs.txt and count calls.")
+    parser.add_argument("--log", default="api_logs.txt")
+    parser.add_argument("--index", default="api_logs.idx", help="index directory")
+    parser.add_argument("--no-ingest", action="store_true", help="query without reading new log lines")
+    parser.add_argument("--by", default="user,hour", help="comma-separated: user, endpoint, minute/hour/day")
+    parser.add_argument("--start", help='inclusive, "YYYY-mm-dd[ HH:MM:SS]"')
+    parser.add_argument("--end", help="exclusive")
+    parser.add_argument("--user")
+    parser.add_argument("--endpoint")
+    args = parser.parse_args(argv)
+
+    index = LogIndex(args.index)
+    if not args.no_ingest:
+        started = time.perf_counter()
+        stats = index.ingest(args.log)
+        print(f"Ingested {stats['rows']} new lines ({stats['skipped']} unparseable) "
+              f"in {(time.perf_counter() - started) * 1000:.0f} ms; {len(index)} rows indexed")
+
+    by = [field.strip() for field in args.by.split(",") if field.strip()]
+    started = time.perf_counter()
+    rows = index.aggregate(by, start=args.start, end=args.end, user=args.user, endpoint=args.endpoint)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print("\t".join(by + ["calls"]))
+    for row in rows:
+        print("\t".join(str(v) for v in row))
+    print(f"{len(rows)} groups in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
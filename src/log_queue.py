@@ -0,0 +1,235 @@
+"""Non-blocking logging for async servers, configured through `dictConfig`.
+
+A `logging.FileHandler` or `StreamHandler` writes (and takes a lock)
+inside every `logger.info()` call, so in an async endpoint each log line
+blocks the event loop on I/O. `queue_handler()` is a `dictConfig`
+factory for a `QueueHandler`: the calling code only puts the record on a
+queue, and a `QueueListener` thread passes it on to the real handlers.
+
+    "handlers": {
+        "file": {"class": "logging.FileHandler", "filename": "app.log"},
+        "queue": {"()": "src.log_queue.queue_handler", "handlers": ["file"]},
+    },
+    "loggers": {"app": {"handlers": ["queue"]}},
+
+`dictConfig` creates handlers in name order and the targets must exist
+first, so give the queue handler a name that sorts after them (Python
+3.12's own `"handlers"` key on `QueueHandler` lifts this restriction).
+
+- Records are formatted (message `%` args, exception text) when queued,
+  so they are safe to hand to another thread.
+- With `maxsize` the queue is bounded; records that do not fit are
+  dropped and counted in `dropped` instead of blocking the caller.
+- Closing the handler, as `logging.shutdown()` does at exit and
+  `dictConfig` does when it is reconfigured, stops the listener after
+  the queued records have been written.
+
+`JsonFormatter` emits one JSON object per line, for log shippers.
+
+`DedupFilter` keeps a client that triggers the same error over and over
+from flooding the log: repeats beyond a small burst are counted and
+logged as one summary line per interval.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+# attributes every LogRecord has; anything else came from `extra=`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as JSON lines: time, level, logger, message.
+
+    Values passed with `extra=` are included as extra keys; an exception
+    is added as `"exc_info"`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}"
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # wait for room rather than fail on a full bounded queue
+        self.queue.put(self._sentinel)
+
+
+class ListenerQueueHandler(logging.handlers.QueueHandler):
+    """A `QueueHandler` that owns the `QueueListener` draining its queue."""
+
+    def __init__(self, log_queue, handlers: Iterable[logging.Handler], respect_handler_level: bool = True):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.listener = _Listener(
+            log_queue, *handlers, respect_handler_level=respect_handler_level
+        )
+        self.listener.start()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Wait until every record queued so far has been handled."""
+        if self.listener._thread is not None:
+            self.queue.join()
+        for handler in self.listener.handlers:
+            handler.flush()
+
+    def close(self) -> None:
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
+
+
+def queue_handler(
+    handlers: Iterable[str] = (),
+    maxsize: int = 0,
+    respect_handler_level: bool = True,
+) -> ListenerQueueHandler:
+    """`dictConfig` factory: a queue handler feeding the named handlers.
+
+    `maxsize` bounds the queue (0, the default, for unbounded).
+    """
+    targets = []
+    for name in handlers:
+        target = logging._handlers.get(name)  # type: ignore[attr-defined]
+        if target is None:
+            raise ValueError(f"handler {name!r} is not configured; name the queue handler so it sorts after it")
+        targets.append(target)
+    return ListenerQueueHandler(queue.Queue(maxsize), targets, respect_handler_level=respect_handler_level)
+
+
+class DedupFilter(logging.Filter):
+    """Sample repeated records: `burst` per key per `interval`, then a count.
+
+    Records at or above `level` are grouped by their `dedup_key` (passed
+    with `extra=`) or, without one, by logger, level and message. The
+    first `burst` records of a group in each `interval` seconds pass;
+    the rest are dropped and counted, and once the interval is over one
+    summary record with the count is logged in their place. Summaries of
+    groups that went quiet are logged by the next record through the
+    filter, or by `flush()`.
+
+    Attach it to a logger (`"filters": [...]` in `dictConfig`), so the
+    summaries can be logged through that logger. At most `max_keys`
+    groups are tracked; past that, new groups are not sampled.
+    """
+
+    def __init__(
+        self,
+        interval: float = 60.0,
+        burst: int = 5,
+        level: int | str = logging.WARNING,
+        max_keys: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.level = logging._checkLevel(level)  # type: ignore[attr-defined]
+        self.max_keys = max_keys
+        self.clock = clock
+        self.suppressed = 0
+        self._lock = threading.Lock()
+        # key -> [window start, records in window, dropped in window, first record]
+        self._groups: Dict[Hashable, list] = {}
+        self._next_sweep = clock() + interval
+
+    def _key(self, record: logging.LogRecord) -> Hashable:
+        key = getattr(record, "dedup_key", None)
+        return key if key is not None else (record.name, record.levelno, record.getMessage())
+
+    def allows(self, key: Hashable) -> bool:
+        """Whether a record with `dedup_key=key` would be logged now.
+
+        Lets callers skip building an expensive message that would be
+        dropped anyway.
+        """
+        with self._lock:
+            group = self._groups.get(key)
+            return group is None or group[1] < self.burst or self.clock() - group[0] >= self.interval
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level or getattr(record, "dedup_summary", False):
+            return True
+        now = self.clock()
+        due = []
+        with self._lock:
+            if now >= self._next_sweep:
+                due = self._sweep(now)
+            key = self._key(record)
+            group = self._groups.get(key)
+            if group is not None and now - group[0] >= self.interval:
+                if group[2]:
+                    due.append(self._summary(group))
+                group = None
+            if group is None:
+                if len(self._groups) < self.max_keys or key in self._groups:
+                    self._groups[key] = [now, 1, 0, record]
+                keep = True
+            elif group[1] < self.burst:
+                group[1] += 1
+                keep = True
+            else:
+                group[2] += 1
+                self.suppressed += 1
+                keep = False
+        for summary in due:
+            logging.getLogger(summary.name).handle(summary)
+        return keep
+
+    def _sweep(self, now: float) -> list:
+        self._next_sweep = now + self.interval
+        due = []
+        for key, group in list(self._groups.items()):
+            if now - group[0] >= self.interval:
+                if group[2]:
+                    due.append(self._summary(group))
+                del self._groups[key]
+        return due
+
+    def _summary(self, group: list) -> logging.LogRecord:
+        first = group[3]
+        summary = logging.makeLogRecord(first.__dict__)
+        summary.msg = "%s [%d more like this in %gs]"
+        summary.args = (first.getMessage(), group[2], self.interval)
+        summary.exc_info = summary.exc_text = None
+        summary.created = time.time()
+        summary.dedup_summary = True
+        return summary
+
+    def flush(self) -> None:
+        """Log the summaries of every group with dropped records now."""
+        with self._lock:
+            due = [self._summary(group) for group in self._groups.values() if group[2]]
+            self._groups.clear()
+        for summary in due:
+            logging.getLogger(summary.name).handle(summary)
@@ -0,0 +1,721 @@
+"""Rate limiting for the FastAPI examples, with pluggable storage.
+
+`RateLimiter(times=5, seconds=60)` is a FastAPI dependency with the same
+signature as `fastapi_limiter`'s. It answers 429 with a `Retry-After`
+header once a client is over its limit.
+
+Clients are identified by IP address (`X-Forwarded-For` only counts
+when the connection comes from a proxy in `TRUSTED_PROXIES`). With
+`identifier=api_key_identifier(verify)` a request whose `X-API-Key` is
+accepted by `verify` is counted under that key instead (stored hashed);
+unknown keys stay in their IP's bucket, so cycling made-up keys does not
+buy fresh limits. Limits can be set per route and per client
+with `RATE_LIMIT_POLICIES`, a JSON object (or the path of a JSON file):
+
+    {"/qa": {"default": "5/minute", "keys": {"key:3f2a...": "100/minute"}},
+     "*": {"keys": {"ip:10.0.0.1": "1000/hour"}}}
+
+A client's limit on a route is, in order: its entry under the route, its
+entry under `"*"`, the route's `default`, then the `RateLimiter`'s own
+`times` per period. `client_id()` gives the `key:...` id of an API key.
+
+Algorithms (`RATE_LIMIT_ALGORITHM`, or `"algorithm"` in a policy), all
+with O(1) state per client:
+
+- `gcra` (default): the generic cell rate algorithm. One timestamp per
+  client; allows a burst of `times` requests, then one every
+  `period / times`. Equivalent to a token bucket.
+- `token_bucket`: the same limit kept as (tokens, last update).
+- `sliding_window`: counts in the current and previous fixed windows,
+  the previous one weighted by its overlap with the sliding window.
+- `fixed_window`: `fastapi_limiter`'s counter; lets up to twice the limit
+  through around a window edge.
+
+Storage is selected with `RATE_LIMIT_BACKEND`:
+
+- `memory` (default): a dict per shard (`RATE_LIMIT_SHARDS`, default 64),
+  each with its own lock, in this process. Clients are dropped once idle
+  long enough that their state equals a new client's.
+- `shared`: a memory-mapped hash table shared by every worker on the host
+  (`RATE_LIMIT_SHM_PATH`, default `/dev/shm/fastapi-rate-limit` or the temp
+  directory, `RATE_LIMIT_SHM_SLOTS` slots). It is split into stripes
+  guarded by `fcntl` byte-range locks, so workers only contend on the same
+  stripe; idle slots are reused.
+- `redis`: counted on the Redis server at `REDIS_URL` (default
+  `redis://localhost`); the choice for several hosts. Each check is one
+  server-side script call, concurrent checks share a pipeline, and
+  clients just rejected are rejected locally for up to
+  `RATE_LIMIT_LOCAL_CACHE_TTL` seconds (default 1, 0 disables).
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import ipaddress
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows
+    fcntl = None
+
+State = Tuple[float, ...]
+
+
+def gcra(state: Optional[State], now: float, limit: int, period: float) -> Tuple[float, State]:
+    """GCRA; `state` is `(theoretical arrival time,)`.
+
+    Like every algorithm here it takes the client's state (None for a new
+    client) and returns `(retry_after, new_state)`, where a zero
+    `retry_after` means the request is allowed.
+    """
+    interval = period / limit
+    tat = now if state is None else max(state[0], now)
+    new_tat = tat + interval
+    if new_tat - now > period:
+        return new_tat - period - now, (tat,)
+    return 0.0, (new_tat,)
+
+
+def token_bucket(state: Optional[State], now: float, limit: int, period: float) -> Tuple[float, State]:
+    """Token bucket; `state` is `(tokens, updated)`."""
+    rate = limit / period
+    tokens = float(limit) if state is None else min(limit, state[0] + (now - state[1]) * rate)
+    if tokens >= 1:
+        return 0.0, (tokens - 1, now)
+    return (1 - tokens) / rate, (tokens, now)
+
+
+def sliding_window(state: Optional[State], now: float, limit: int, period: float) -> Tuple[float, State]:
+    """Sliding window counter; `state` is `(window index, previous count, current count)`."""
+    window = math.floor(now / period)
+    previous = current = 0.0
+    if state is not None:
+        if state[0] == window:
+            previous, current = state[1], state[2]
+        elif state[0] == window - 1:
+            previous = state[2]
+    elapsed = now - window * period
+    weight = 1 - elapsed / period
+    if previous * weight + current + 1 <= limit:
+        return 0.0, (window, previous, current + 1)
+    if current + 1 > limit:
+        retry_after = period - elapsed + period * (1 - (limit - 1) / current if current else 0)
+    else:
+        # the previous window's share must shrink to limit - 1 - current
+        retry_after = period * (1 - (limit - 1 - current) / previous) - elapsed
+    return max(retry_after, 1e-3), (window, previous, current)
+
+
+def fixed_window(state: Optional[State], now: float, limit: int, period: float) -> Tuple[float, State]:
+    """Fixed window counter; `state` is `(window index, count)`."""
+    window = math.floor(now / period)
+    count = state[1] if state is not None and state[0] == window else 0
+    if count + 1 > limit:
+        return (window + 1) * period - now, (window, count)
+    return 0.0, (window, count + 1)
+
+
+class Algorithm(NamedTuple):
+    step: Callable[[Optional[State], float, int, float], Tuple[float, State]]
+    # after this many idle periods a client's state equals a new client's
+    idle_periods: float
+
+
+ALGORITHMS: Dict[str, Algorithm] = {
+    "gcra": Algorithm(gcra, 1),
+    "token_bucket": Algorithm(token_bucket, 1),
+    "sliding_window": Algorithm(sliding_window, 2),
+    "fixed_window": Algorithm(fixed_window, 1),
+}
+
+
+def default_algorithm() -> str:
+    return os.getenv("RATE_LIMIT_ALGORITHM", "gcra").strip().lower()
+
+
+def _algorithm(name: Optional[str]) -> Algorithm:
+    name = name or default_algorithm()
+    try:
+        return ALGORITHMS[name]
+    except KeyError:
+        raise ValueError(f"unknown rate limit algorithm {name!r}; expected one of {', '.join(ALGORITHMS)}")
+
+
+class MemoryBackend:
+    """Per-process client states, sharded by key hash.
+
+    Each shard is an `OrderedDict` in least-recently-used order with its
+    own lock, so threads rarely wait on each other. Every check also
+    drops up to eight idle clients from the front of its shard, and every
+    `sweep_every` checks one more shard is swept in turn, so shards no
+    active client hashes to are emptied too. Memory stays proportional to
+    the number of recently active clients.
+    """
+
+    def __init__(self, shards: int = 64, clock: Callable[[], float] = time.monotonic, sweep_every: int = 256):
+        shards = 1 << max(0, (shards - 1).bit_length())  # power of two
+        self.clock = clock
+        self.sweep_every = sweep_every
+        self._mask = shards - 1
+        self._shards = [OrderedDict() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._checks = 0
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def check_now(self, key: str, limit: int, period: float, algorithm: Optional[str] = None) -> float:
+        step, idle_periods = _algorithm(algorithm)
+        index = hash(key) & self._mask
+        shard = self._shards[index]
+        with self._locks[index]:
+            now = self.clock()
+            entry = shard.get(key)
+            state = entry[1] if entry is not None and entry[0] > now else None
+            retry_after, state = step(state, now, limit, period)
+            shard[key] = (now + idle_periods * period, state)
+            shard.move_to_end(key)
+            self._expire(shard, now, 8)
+        self._checks += 1
+        if self._checks % self.sweep_every == 0:
+            self.sweep((self._checks // self.sweep_every) & self._mask)
+        return retry_after
+
+    @staticmethod
+    def _expire(shard: OrderedDict, now: float, limit: Optional[int] = None) -> None:
+        dropped = 0
+        while shard and (limit is None or dropped < limit):
+            if next(iter(shard.values()))[0] > now:
+                break
+            shard.popitem(last=False)
+            dropped += 1
+
+    def sweep(self, shard: Optional[int] = None) -> None:
+        """Drop the idle clients of one shard, or of all of them."""
+        for index in range(len(self._shards)) if shard is None else (shard,):
+            with self._locks[index]:
+                self._expire(self._shards[index], self.clock())
+
+    async def check(self, key: str, limit: int, period: float, algorithm: Optional[str] = None) -> float:
+        return self.check_now(key, limit, period, algorithm)
+
+
+class SharedMemoryBackend:
+    """Client states in a memory-mapped file shared by processes on one host.
+
+    Each slot holds `(key hash, expires, state...)`. A key hashes to a
+    stripe of `stripe_slots` slots and is probed linearly within it.
+    Expired slots are reused; if every probed slot is live, the one
+    expiring first is taken over, which only ever lets that client
+    through early. `time.monotonic` is the same system-wide clock in
+    every process.
+    """
+
+    SLOT = struct.Struct("<Qdddd")
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        slots: int = 1 << 16,
+        stripe_slots: int = 64,
+        probes: int = 8,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if fcntl is None:
+            raise RuntimeError("the shared rate limit backend needs fcntl (POSIX)")
+        if path is None:
+            directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            path = os.path.join(directory, "fastapi-rate-limit")
+        self.path = path
+        self.stripe_slots = stripe_slots
+        self.slots = max(stripe_slots, slots - slots % stripe_slots)
+        self.probes = min(probes, stripe_slots)
+        self.clock = clock
+        size = self.slots * self.SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        # fcntl locks belong to the process; threads of one process also
+        # need to exclude each other
+        self._thread_locks = [threading.Lock() for _ in range(self.slots // stripe_slots)]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+    def check_now(self, key: str, limit: int, period: float, algorithm: Optional[str] = None) -> float:
+        step, idle_periods = _algorithm(algorithm)
+        tag = self._hash(key)
+        stripe = (tag % self.slots) // self.stripe_slots
+        base = stripe * self.stripe_slots
+        first = tag % self.stripe_slots
+        size = self.SLOT.size
+        with self._thread_locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.stripe_slots * size, base * size)
+            try:
+                now = self.clock()
+                chosen, state, soonest = None, None, None
+                for i in range(self.probes):
+                    offset = (base + (first + i) % self.stripe_slots) * size
+                    slot_tag, expires, *values = self.SLOT.unpack_from(self._map, offset)
+                    if slot_tag == tag:
+                        chosen = offset
+                        state = tuple(values) if expires > now else None
+                        break
+                    if chosen is None and (slot_tag == 0 or expires <= now):
+                        chosen = offset
+                    if soonest is None or expires < soonest[1]:
+                        soonest = (offset, expires)
+                if chosen is None:
+                    chosen = soonest[0]
+                retry_after, state = step(state, now, limit, period)
+                values = tuple(state) + (0.0,) * (3 - len(state))
+                self.SLOT.pack_into(self._map, chosen, tag, now + idle_periods * period, *values)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.stripe_slots * size, base * size)
+        return retry_after
+
+    async def check(self, key: str, limit: int, period: float, algorithm: Optional[str] = None) -> float:
+        return self.check_now(key, limit, period, algorithm)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+# One round trip per check: the script reads the client's state, runs the
+# same step as the Python functions above on the server clock and writes
+# the new state back with an expiry of its idle time. State is stored as
+# space-separated numbers.
+REDIS_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local algorithm = ARGV[3]
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = {}
+local raw = redis.call('GET', key)
+if raw then
+  for value in string.gmatch(raw, '%S+') do state[#state + 1] = tonumber(value) end
+end
+local retry = 0
+local new_state = nil
+local idle_periods = 1
+if algorithm == 'gcra' then
+  local tat = math.max(state[1] or now, now)
+  local new_tat = tat + period / limit
+  if new_tat - now > period then
+    retry = new_tat - period - now
+  else
+    new_state = {new_tat}
+  end
+elseif algorithm == 'token_bucket' then
+  local rate = limit / period
+  local tokens = limit
+  if state[1] then tokens = math.min(limit, state[1] + (now - state[2]) * rate) end
+  if tokens >= 1 then
+    new_state = {tokens - 1, now}
+  else
+    retry = (1 - tokens) / rate
+    new_state = {tokens, now}
+  end
+elseif algorithm == 'sliding_window' then
+  idle_periods = 2
+  local window = math.floor(now / period)
+  local previous, current = 0, 0
+  if state[1] == window then
+    previous, current = state[2], state[3]
+  elseif state[1] == window - 1 then
+    previous = state[3]
+  end
+  local elapsed = now - window * period
+  if previous * (1 - elapsed / period) + current + 1 <= limit then
+    new_state = {window, previous, current + 1}
+  else
+    if current + 1 > limit then
+      retry = period - elapsed
+      if current > 0 then retry = retry + period * (1 - (limit - 1) / current) end
+    else
+      retry = period * (1 - (limit - 1 - current) / previous) - elapsed
+    end
+    retry = math.max(retry, 0.001)
+  end
+elseif algorithm == 'fixed_window' then
+  local window = math.floor(now / period)
+  local count = 0
+  if state[1] == window then count = state[2] end
+  if count + 1 > limit then
+    retry = (window + 1) * period - now
+  else
+    new_state = {window, count + 1}
+  end
+else
+  return redis.error_reply('unknown rate limit algorithm ' .. tostring(algorithm))
+end
+if new_state then
+  local parts = {}
+  for i, value in ipairs(new_state) do parts[i] = string.format('%.17g', value) end
+  redis.call('SET', key, table.concat(parts, ' '), 'PX', math.ceil(idle_periods * period * 1000))
+end
+return string.format('%.17g', retry)
+"""
+
+
+class RedisBackend:
+    """Client states in Redis, checked with one server-side script call.
+
+    Every check is a single `EVALSHA` of `REDIS_SCRIPT`, which reads,
+    updates and expires the state atomically on the server. With
+    `pipeline=True` at most one pipeline is in flight: checks issued while
+    it waits on Redis are queued and sent together as the next one when
+    it returns, so under load there is one round trip per RTT whatever
+    the request rate.
+
+    Rejected clients are remembered locally until their `retry_after`
+    (at most `local_cache_ttl` seconds): a rejected request does not
+    change its state and other workers can only add requests, so such a
+    client is definitely still over its limit and is rejected without
+    asking Redis. At most `local_cache_size` clients are remembered; the
+    oldest entries make way for new ones.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        url: Optional[str] = None,
+        prefix: str = "rate-limit",
+        pipeline: bool = True,
+        local_cache_ttl: float = 1.0,
+        local_cache_size: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.from_url(url or os.getenv("REDIS_URL", "redis://localhost"), encoding="utf-8", decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self.pipeline = pipeline
+        self.local_cache_ttl = local_cache_ttl
+        self.local_cache_size = local_cache_size
+        self.clock = clock
+        self.local_rejects = 0
+        self._sha: Optional[str] = None
+        self._over_limit: "OrderedDict[str, float]" = OrderedDict()
+        self._pending: list = []
+        self._sender: Any = None
+
+    async def check(self, key: str, limit: int, period: float, algorithm: Optional[str] = None) -> float:
+        algorithm = algorithm or default_algorithm()
+        _algorithm(algorithm)
+        now = self.clock()
+        blocked_until = self._over_limit.get(key)
+        if blocked_until is not None:
+            if blocked_until > now:
+                self.local_rejects += 1
+                return blocked_until - now
+            del self._over_limit[key]
+
+        args = (f"{self.prefix}:{key}", str(limit), repr(float(period)), algorithm)
+        if self.pipeline:
+            retry_after = await self._queue(args)
+        else:
+            retry_after = await self._evalsha(args)
+
+        if retry_after > 0 and self.local_cache_ttl > 0:
+            self._over_limit[key] = now + min(retry_after, self.local_cache_ttl)
+            self._over_limit.move_to_end(key)
+            if len(self._over_limit) > self.local_cache_size:
+                self._over_limit.popitem(last=False)
+        return retry_after
+
+    async def _load_script(self) -> str:
+        self._sha = await self.client.script_load(REDIS_SCRIPT)
+        return self._sha
+
+    async def _evalsha(self, args) -> float:
+        from redis.exceptions import NoScriptError
+
+        sha = self._sha or await self._load_script()
+        try:
+            return float(await self.client.evalsha(sha, 1, *args))
+        except NoScriptError:  # the server was restarted or flushed
+            return float(await self.client.evalsha(await self._load_script(), 1, *args))
+
+    async def _queue(self, args) -> float:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((args, future))
+        if self._sender is None:
+            self._sender = loop.create_task(self._send())
+        return await future
+
+    async def _send(self) -> None:
+        import asyncio
+
+        try:
+            # let the other requests of this event loop iteration join the first batch
+            await asyncio.sleep(0)
+            while self._pending:
+                # checks queued while this round trip is in flight form the next batch
+                await self._flush()
+        finally:
+            self._sender = None
+
+    async def _flush(self) -> None:
+        from redis.exceptions import NoScriptError
+
+        # a check whose caller went away (cancelled) is not sent at all
+        batch = [(args, future) for args, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+        try:
+            if len(batch) == 1:
+                args, future = batch[0]
+                result = await self._evalsha(args)
+                if not future.done():
+                    future.set_result(result)
+                return
+            sha = self._sha or await self._load_script()
+            pipe = self.client.pipeline(transaction=False)
+            for args, _ in batch:
+                pipe.evalsha(sha, 1, *args)
+            results = await pipe.execute(raise_on_error=False)
+            for (args, future), result in zip(batch, results):
+                if future.done():  # cancelled while the pipeline was in flight
+                    continue
+                if isinstance(result, NoScriptError):
+                    try:
+                        result = await self._evalsha(args)
+                    except Exception as exc:
+                        result = exc
+                    if future.done():
+                        continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(float(result))
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+
+
+BACKENDS = ("memory", "shared", "redis")
+
+
+def make_backend(kind: Optional[str] = None):
+    """Build the backend named by `kind` or `RATE_LIMIT_BACKEND`."""
+    kind = (kind or os.getenv("RATE_LIMIT_BACKEND", "memory")).strip().lower()
+    if kind == "memory":
+        return MemoryBackend(shards=int(os.getenv("RATE_LIMIT_SHARDS", "64")))
+    if kind == "shared":
+        return SharedMemoryBackend(
+            path=os.getenv("RATE_LIMIT_SHM_PATH") or None,
+            slots=int(os.getenv("RATE_LIMIT_SHM_SLOTS", str(1 << 16))),
+        )
+    if kind == "redis":
+        return RedisBackend(local_cache_ttl=float(os.getenv("RATE_LIMIT_LOCAL_CACHE_TTL", "1.0")))
+    raise ValueError(f"unknown RATE_LIMIT_BACKEND {kind!r}; expected one of {', '.join(BACKENDS)}")
+
+
+_backend = None
+
+
+def get_backend():
+    """The process-wide backend, built from the environment on first use."""
+    global _backend
+    if _backend is None:
+        _backend = make_backend()
+    return _backend
+
+
+def set_backend(backend) -> None:
+    global _backend
+    _backend = backend
+
+
+# policies
+
+_PERIODS = {"s": 1, "second": 1, "m": 60, "minute": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+_SPEC_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d+(?:\.\d+)?)?\s*([a-z]*)\s*$")
+
+
+class Policy(NamedTuple):
+    limit: int
+    period: float
+    algorithm: Optional[str] = None
+
+
+def parse_policy(spec: Any) -> Policy:
+    """`"5/minute"`, `"100/10s"`, `"5/60"` (seconds) or `{"limit", "period", "algorithm"}`."""
+    if isinstance(spec, dict):
+        policy = Policy(int(spec["limit"]), float(spec["period"]), spec.get("algorithm"))
+    else:
+        match = _SPEC_RE.match(str(spec).lower())
+        unit = (match.group(3) or "s") if match else ""
+        if unit not in _PERIODS and unit.endswith("s"):
+            unit = unit[:-1]  # "minutes"
+        if not match or unit not in _PERIODS:
+            raise ValueError(f"bad rate limit {spec!r}; expected e.g. '5/minute' or '100/10s'")
+        policy = Policy(int(match.group(1)), float(match.group(2) or 1) * _PERIODS[unit])
+    if policy.limit < 1 or policy.period <= 0:
+        raise ValueError(f"bad rate limit {spec!r}: needs a limit >= 1 and a positive period")
+    if policy.algorithm is not None:
+        _algorithm(policy.algorithm)
+    return policy
+
+
+class PolicyTable:
+    """Per-route, per-client limits (see the module docstring for the format)."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.defaults: Dict[str, Policy] = {}
+        self.clients: Dict[str, Dict[str, Policy]] = {}
+        for route, entry in (config or {}).items():
+            if "default" in entry:
+                self.defaults[route] = parse_policy(entry["default"])
+            self.clients[route] = {client: parse_policy(spec) for client, spec in entry.get("keys", {}).items()}
+
+    @classmethod
+    def from_env(cls) -> "PolicyTable":
+        raw = os.getenv("RATE_LIMIT_POLICIES", "").strip()
+        if raw and not raw.startswith("{"):
+            with open(raw, encoding="utf-8") as f:
+                raw = f.read()
+        return cls(json.loads(raw) if raw else None)
+
+    def lookup(self, route: str, client: str, default: Policy) -> Policy:
+        for scope in (route, "*"):
+            policy = self.clients.get(scope, {}).get(client)
+            if policy is not None:
+                return policy
+        return self.defaults.get(route, default)
+
+
+_policies: Optional[PolicyTable] = None
+
+
+def get_policies() -> PolicyTable:
+    global _policies
+    if _policies is None:
+        _policies = PolicyTable.from_env()
+    return _policies
+
+
+def set_policies(policies: Optional[PolicyTable]) -> None:
+    """Replace the policy table (None: reload `RATE_LIMIT_POLICIES` on next use)."""
+    global _policies
+    _policies = policies
+
+
+def client_id(api_key: str) -> str:
+    """The id a policy uses for an API key; the key itself is never stored."""
+    return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+@functools.lru_cache(maxsize=8)
+def _trusted_networks(spec: str) -> Tuple[Any, ...]:
+    return tuple(ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip())
+
+
+def _is_trusted(address: str, networks: Tuple[Any, ...]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_ip(request: Request) -> str:
+    """The client's address. `X-Forwarded-For` is only believed when the
+    connection comes from a proxy listed in `TRUSTED_PROXIES` (addresses
+    or CIDR ranges, comma-separated); the client is then the last
+    address in it not added by a trusted proxy."""
+    host = request.client.host if request.client else "unknown"
+    networks = _trusted_networks(os.getenv("TRUSTED_PROXIES", ""))
+    forwarded = request.headers.get("X-Forwarded-For")
+    if not forwarded or not _is_trusted(host, networks):
+        return host
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, networks):
+            return hop
+    return hops[0] if hops else host
+
+
+async def default_identifier(request: Request) -> str:
+    """`ip:<client IP>`, see `client_ip()`."""
+    return "ip:" + client_ip(request)
+
+
+def api_key_identifier(verify: Callable[[str], Any]) -> Callable:
+    """An identifier giving `key:<hash>` for API keys `verify` accepts
+    (returns non-None for), else `default_identifier`'s IP bucket.
+
+    The limiter runs before the route's own key check, so keying on an
+    unchecked header would give every guessed key a bucket of its own.
+    """
+    async def identifier(request: Request) -> str:
+        api_key = request.headers.get("X-API-Key")
+        if api_key and verify(api_key) is not None:
+            return client_id(api_key)
+        return await default_identifier(request)
+
+    return identifier
+
+
+class RateLimiter:
+    """FastAPI dependency allowing `times` requests per period per client."""
+
+    def __init__(
+        self,
+        times: int = 1,
+        milliseconds: int = 0,
+        seconds: int = 0,
+        minutes: int = 0,
+        hours: int = 0,
+        identifier: Optional[Callable] = None,
+        backend: Any = None,
+        algorithm: Optional[str] = None,
+        policies: Optional[PolicyTable] = None,
+    ):
+        period = (milliseconds + 1000 * seconds + 60000 * minutes + 3600000 * hours) / 1000
+        if times < 1 or period <= 0:
+            raise ValueError("RateLimiter needs times >= 1 and a positive period")
+        if algorithm is not None:
+            _algorithm(algorithm)
+        self.policy = Policy(times, period, algorithm)
+        self.identifier = identifier or default_identifier
+        self.backend = backend
+        self.policies = policies
+
+    async def __call__(self, request: Request, response: Response):
+        route = getattr(request.scope.get("route"), "path", None) or request.scope["path"]
+        client = await self.identifier(request)
+        policy = (self.policies or get_policies()).lookup(route, client, self.policy)
+        algorithm = policy.algorithm or default_algorithm()
+        key = f"{route}|{client}|{policy.limit}/{policy.period:g}/{algorithm}"
+        retry_after = await (self.backend or get_backend()).check(key, policy.limit, policy.period, algorithm)
+        if retry_after > 0:
+            raise HTTPException(429, "Too Many Requests", headers={"Retry-After": str(math.ceil(retry_after))})
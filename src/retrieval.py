@@ -0,0 +1,159 @@
+"""Retrieval helpers shared by the RAG examples (day18, day20, day21).
+
+Three retrieval modes are supported, selected with the
+`RAG_RETRIEVAL_MODE` environment variable:
+
+- `vector` (default): FAISS `similarity_search` over embeddings.
+- `bm25`: the local `src.bm25.BM25Index` only. Needs no embeddings and
+  makes no API calls, so indexing and querying work offline.
+- `hybrid`: BM25 and vector results fused with reciprocal rank fusion,
+  which recovers exact keyword matches that embeddings miss.
+
+`make_retriever` wraps any of these as a LangChain retriever so it can be
+passed to `RetrievalQA` / `create_retrieval_chain`. `batch_retrieve`
+answers many queries at once with a single embedding call and a single
+FAISS matrix search.
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Callable, List, Optional, Sequence
+
+from src.bm25 import reciprocal_rank_fusion
+
+try:
+    from langchain_core.retrievers import BaseRetriever  # type: ignore
+except Exception:
+    BaseRetriever = None
+
+
+RETRIEVAL_MODES = ("vector", "bm25", "hybrid")
+
+
+def get_retrieval_mode(mode: Optional[str] = None) -> str:
+    """Return the configured retrieval mode, validating its value."""
+    if mode is None:
+        mode = os.environ.get("RAG_RETRIEVAL_MODE", "vector")
+    mode = mode.strip().lower()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode {mode!r}; expected one of {', '.join(RETRIEVAL_MODES)}")
+    return mode
+
+
+def retrieve(
+    query: str,
+    mode: str,
+    vector_store: Any = None,
+    bm25_index: Any = None,
+    k: int = 4,
+    fetch_k: Optional[int] = None,
+) -> List[Any]:
+    """Return the top `k` documents for `query` using the given mode.
+
+    In hybrid mode each retriever contributes `fetch_k` candidates
+    (default `4 * k`) before fusion. Hybrid degrades to whichever index is
+    available when only one of them was built.
+    """
+    if mode == "bm25" or (mode == "hybrid" and vector_store is None):
+        return bm25_index.search(query, k=k)
+    if mode == "vector" or bm25_index is None:
+        return vector_store.similarity_search(query, k=k)
+    fetch_k = fetch_k or 4 * k
+    keyword_hits = bm25_index.search(query, k=fetch_k)
+    vector_hits = vector_store.similarity_search(query, k=fetch_k)
+    return reciprocal_rank_fusion([vector_hits, keyword_hits], limit=k)
+
+
+def batch_similarity_search(vector_store: Any, queries: Sequence[str], k: int = 4) -> List[List[Any]]:
+    """Vector search for many queries with one embedding call and one index query.
+
+    Uses the LangChain FAISS internals (`embedding_function`, `index`,
+    `index_to_docstore_id`, `docstore`) to embed all queries in a single
+    `embed_documents` call and search the FAISS index with the whole
+    query matrix. Stores without those attributes fall back to one
+    `similarity_search` per query.
+    """
+    embedder = getattr(vector_store, "embedding_function", None)
+    index = getattr(vector_store, "index", None)
+    id_map = getattr(vector_store, "index_to_docstore_id", None)
+    docstore = getattr(vector_store, "docstore", None)
+    if not (hasattr(embedder, "embed_documents") and hasattr(index, "search") and id_map is not None and docstore is not None):
+        return [vector_store.similarity_search(q, k=k) for q in queries]
+    if not queries:
+        return []
+
+    import numpy as np
+
+    vectors = np.asarray(embedder.embed_documents(list(queries)), dtype=np.float32)
+    if getattr(vector_store, "_normalize_L2", False):
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    _, positions = index.search(vectors, k)
+    return [
+        [docstore.search(id_map[int(pos)]) for pos in row if pos != -1 and int(pos) in id_map]
+        for row in positions
+    ]
+
+
+def batch_retrieve(
+    queries: Sequence[str],
+    mode: str,
+    vector_store: Any = None,
+    bm25_index: Any = None,
+    k: int = 4,
+    fetch_k: Optional[int] = None,
+) -> List[List[Any]]:
+    """`retrieve` for many queries, sharing one batched vector search."""
+    if mode == "bm25" or (mode == "hybrid" and vector_store is None):
+        return [bm25_index.search(q, k=k) for q in queries]
+    if mode == "vector" or bm25_index is None:
+        return batch_similarity_search(vector_store, queries, k=k)
+    fetch_k = fetch_k or 4 * k
+    vector_hits = batch_similarity_search(vector_store, queries, k=fetch_k)
+    return [
+        reciprocal_rank_fusion([hits, bm25_index.search(q, k=fetch_k)], limit=k)
+        for q, hits in zip(queries, vector_hits)
+    ]
+
+
+if BaseRetriever is not None:
+
+    class SearchRetriever(BaseRetriever):
+        """LangChain retriever backed by a plain `search(query, k)` callable."""
+
+        search: Callable[..., List[Any]]
+        k: int = 4
+
+        def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Any]:
+            return self.search(query, self.k)
+
+else:
+
+    class SearchRetriever:  # type: ignore[no-redef]
+        """Minimal retriever used when langchain_core is not installed."""
+
+        def __init__(self, search: Callable[..., List[Any]], k: int = 4):
+            self.search = search
+            self.k = k
+
+        def invoke(self, query: str, *args, **kwargs) -> List[Any]:
+            return self.search(query, self.k)
+
+        get_relevant_documents = invoke
+
+
+def make_retriever(mode: str, vector_store: Any = None, bm25_index: Any = None, k: int = 4):
+    """Build a retriever for `mode`.
+
+    Plain vector mode keeps using the store's own `as_retriever()` so
+    existing behaviour (and test doubles) are unchanged.
+    """
+    if mode == "vector":
+        try:
+            return vector_store.as_retriever(search_kwargs={"k": k})
+        except TypeError:
+            return vector_store.as_retriever()
+
+    def search(query: str, top_k: int) -> List[Any]:
+        return retrieve(query, mode, vector_store=vector_store, bm25_index=bm25_index, k=top_k)
+
+    return SearchRetriever(search=search, k=k)
@@ -0,0 +1,144 @@
+"""In-memory record store keyed by name, with a case-insensitive index.
+
+`UserStore` keeps pydantic records (anything with a `name` field) in a
+dict by exact name, the way `day5.users_db` did, plus:
+
+- a secondary index from `name.casefold()` to the names that fold to it,
+  so `find()` is a dict lookup instead of a scan; when several names
+  fold alike ("Ann", "ann") the first one created wins, as the scan did;
+- insertion order in a list, so `page(offset, limit)` slices instead of
+  walking the dict;
+- `put_many()` for bulk creation.
+
+With a `path` every write is also appended to that file as a JSON line,
+and the file is replayed when the store is opened. Overwriting a name
+leaves its old line behind; once the file holds `compact_ratio` times
+more lines than there are records (and at least `compact_min`), it is
+rewritten with one line per record (a new file renamed over the old
+one, so a crash leaves either the old or the new file, never a mix).
+"""
+from __future__ import annotations
+
+import gc
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+
+class UserStore:
+    """Records by exact name, found case-insensitively, optionally on disk."""
+
+    def __init__(
+        self,
+        model: Type[Any],
+        path: Optional[str] = None,
+        compact_ratio: float = 2.0,
+        compact_min: int = 10000,
+        fsync: bool = False,
+    ):
+        self.model = model
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.compact_min = compact_min
+        self.fsync = fsync
+        self._records: Dict[str, Any] = {}
+        self._folded: Dict[str, List[str]] = {}
+        self._order: List[str] = []
+        self._lines = 0
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+        if path is not None:
+            self._load()
+            self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        validate = self.model.model_validate_json
+        good = 0
+        # millions of new objects would set off the cyclic GC over and over
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # a write cut short by a crash; it was never acknowledged
+                    self._insert(validate(line))
+                    self._lines += 1
+                    good += len(line)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        if good < os.path.getsize(self.path):
+            os.truncate(self.path, good)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _insert(self, record: Any) -> None:
+        name = record.name
+        if name not in self._records:
+            self._order.append(name)
+            self._folded.setdefault(name.casefold(), []).append(name)
+        self._records[name] = record
+
+    def get(self, name: str) -> Optional[Any]:
+        """The record named exactly `name`."""
+        return self._records.get(name)
+
+    def find(self, name: str) -> Optional[Any]:
+        """The record whose name matches `name` ignoring case."""
+        names = self._folded.get(name.casefold())
+        return self._records[names[0]] if names else None
+
+    def put(self, record: Any) -> Any:
+        self.put_many([record])
+        return record
+
+    def put_many(self, records: Iterable[Any]) -> int:
+        """Create or replace several records with one write to disk."""
+        records = list(records)
+        with self._lock:
+            if self._fd is not None:
+                data = b"".join(r.model_dump_json().encode("utf-8") + b"\n" for r in records)
+                os.write(self._fd, data)
+                if self.fsync:
+                    os.fsync(self._fd)
+                self._lines += len(records)
+            for record in records:
+                self._insert(record)
+            if self._fd is not None and self._lines >= max(self.compact_min, self.compact_ratio * len(self._records)):
+                self._compact()
+        return len(records)
+
+    def page(self, offset: int = 0, limit: int = 100) -> List[Any]:
+        """Records `offset` to `offset + limit` in creation order."""
+        records = self._records
+        return [records[name] for name in self._order[offset:offset + limit]]
+
+    def compact(self) -> None:
+        """Rewrite the file with one line per record."""
+        with self._lock:
+            if self._fd is not None:
+                self._compact()
+
+    def _compact(self) -> None:
+        tmp = self.path + ".compact"
+        with open(tmp, "wb") as f:
+            records = self._records
+            for start in range(0, len(self._order), 10000):
+                f.write(b"".join(records[name].model_dump_json().encode("utf-8") + b"\n"
+                                 for name in self._order[start:start + 10000]))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        self._lines = len(self._records)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
@@ -6,9 +6,12 @@ environments by providing minimal APIs for packages like `datasets`,
 `langchain` packages. Individual tests may still monkeypatch more
 specific behavior as needed.
 """
+import importlib
 import sys
 import types
 
+import pytest
+
 
 def _make_module(name: str):
     m = types.ModuleType(name)
@@ -286,3 +289,26 @@ def _install_shims():
 
 # Install shims early during collection
 _install_shims()
+
+
+# The real faiss package wraps its SWIG classes on import, so importing it
+# a second time (after the shim is swapped back in) wraps them twice and
+# recurses. Import it at most once and reuse the module.
+_real_faiss = None
+
+
+@pytest.fixture
+def real_faiss(monkeypatch):
+    """Swap the faiss shim for the real library; skip when not installed."""
+    global _real_faiss
+    if _real_faiss is None:
+        monkeypatch.delitem(sys.modules, "faiss", raising=False)
+        try:
+            faiss = importlib.import_module("faiss")
+        except ImportError:
+            pytest.skip("faiss not installed")
+        if not hasattr(faiss, "index_factory"):
+            pytest.skip("faiss not installed")
+        _real_faiss = faiss
+    monkeypatch.setitem(sys.modules, "faiss", _real_faiss)
+    return _real_faiss
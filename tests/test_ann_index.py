@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+import pytest
+
+from src import ann_index
+
+
+@pytest.fixture
+def faiss_np(real_faiss):
+    return real_faiss, pytest.importorskip("numpy")
+
+
+def test_get_index_config_env_and_overrides(monkeypatch):
+    monkeypatch.setenv("FAISS_INDEX_TYPE", "IVF")
+    monkeypatch.setenv("FAISS_NPROBE", "4")
+    config = ann_index.get_index_config(nlist=16)
+    assert config["index_type"] == "ivf"
+    assert config["nprobe"] == 4 and config["nlist"] == 16
+    assert ann_index.get_index_config("hnsw", nprobe=2)["nprobe"] == 2
+    with pytest.raises(ValueError):
+        ann_index.get_index_config("lsh")
+
+
+def test_factory_strings():
+    cfg = ann_index.get_index_config
+    assert ann_index.factory_string(64, 1000, cfg("flat")) == "Flat"
+    assert ann_index.factory_string(64, 1000, cfg("hnsw", hnsw_m=16)) == "HNSW16"
+    assert ann_index.factory_string(64, 1000, cfg("pq", pq_m=8, pq_bits=6)) == "PQ8x6"
+    assert ann_index.factory_string(64, 100000, cfg("ivf")) == "IVF1264,Flat"
+    assert ann_index.factory_string(64, 10000, cfg("ivfpq", nlist=50, pq_m=16)) == "IVF50,PQ16x8"
+    # small corpora: at least 39 training vectors per cell, 2**pq_bits <= n
+    assert ann_index.factory_string(64, 3, cfg("ivf", nlist=100)) == "IVF1,Flat"
+    assert ann_index.factory_string(64, 1000, cfg("ivf", nlist=100)) == "IVF25,Flat"
+    assert ann_index.factory_string(64, 50, cfg("pq")) == "PQ8x5"
+    assert ann_index.factory_string(64, 100000, cfg("ivfpq", train_size=100)) == "IVF2,PQ8x6"
+    assert ann_index.factory_string(64, 1, cfg("pq")) == "Flat"
+    with pytest.raises(ValueError):
+        ann_index.factory_string(60, 1000, cfg("pq", pq_m=8))
+
+
+def test_flat_delegates_to_from_documents():
+    class FakeFAISS:
+        @classmethod
+        def from_documents(cls, docs, embeddings):
+            return ("from_documents", docs, embeddings)
+
+    assert ann_index.build_vector_store(["d"], "emb", FakeFAISS, index_type="flat") == ("from_documents", ["d"], "emb")
+
+
+@pytest.mark.parametrize("index_type", ["ivf", "hnsw", "pq", "ivfpq"])
+def test_build_faiss_index_finds_exact_neighbours(faiss_np, index_type):
+    faiss, np = faiss_np
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((2000, 32)).astype("float32")
+    config = ann_index.get_index_config(index_type, nlist=16, nprobe=16, pq_m=8, pq_bits=4, train_size=1000)
+    index = ann_index.build_faiss_index(vectors, config)
+    assert index.ntotal == 2000
+    _, ids = index.search(vectors[:20], 1)
+    # a vector's own nearest neighbour is itself (PQ is lossy, allow misses)
+    hits = (ids[:, 0] == np.arange(20)).mean()
+    assert hits >= (0.5 if "pq" in index_type else 0.95)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw", "pq", "ivfpq"])
+@pytest.mark.parametrize("n", [1, 5, 50])
+def test_build_faiss_index_on_small_corpora(faiss_np, index_type, n):
+    # a short PDF gives only a handful of chunks
+    faiss, np = faiss_np
+    vectors = np.random.default_rng(0).standard_normal((n, 32)).astype("float32")
+    index = ann_index.build_faiss_index(vectors, ann_index.get_index_config(index_type))
+    assert index.ntotal == n
+    _, ids = index.search(vectors[:1], 1)
+    assert ids[0, 0] >= 0
+
+
+def test_build_vector_store_wraps_trained_index(faiss_np):
+    faiss, np = faiss_np
+
+    class HashEmbeddings:
+        def embed_documents(self, texts):
+            return [[float((hash(t) >> s) & 0xFF) for s in range(0, 64, 8)] for t in texts]
+
+    class RecordingStore:
+        def __init__(self, embedding, index, docstore, index_to_docstore_id):
+            self.index = index
+            self.docstore = docstore
+            self.index_to_docstore_id = index_to_docstore_id
+
+    docs = [types.SimpleNamespace(page_content=f"doc {i}", metadata={}) for i in range(50)]
+    store = ann_index.build_vector_store(docs, HashEmbeddings(), RecordingStore, index_type="hnsw")
+    assert store.index.ntotal == 50
+    first_id = store.index_to_docstore_id[0]
+    assert store.docstore.search(first_id) is docs[0]
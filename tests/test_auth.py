@@ -0,0 +1,115 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import json
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException, Security
+from fastapi.testclient import TestClient
+
+from src import auth
+from src.auth import APIKeyAuth, KeyStore, hash_key
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def write_keys(path, entries):
+    tmp = str(path) + ".new"
+    with open(tmp, "w") as f:
+        json.dump({"keys": entries}, f)
+    os.replace(tmp, path)
+
+
+def test_keys_with_metadata_plain_or_hashed():
+    store = KeyStore([
+        {"key": "plain", "tenant": "dev"},
+        {"sha256": hash_key("secret"), "tenant": "acme", "quota": "100/minute", "plan": "pro"},
+    ])
+    assert len(store) == 2
+    entry = store.verify("secret")
+    assert (entry.tenant, entry.quota, entry.metadata) == ("acme", "100/minute", {"plan": "pro"})
+    assert entry.key_id == "key:" + hash_key("secret")[:16]
+    assert store.verify("plain").tenant == "dev"
+    for bad in (None, "", "secre", "secret ", "plain\n"):
+        assert store.verify(bad) is None
+    with pytest.raises(ValueError):
+        KeyStore([{"tenant": "no key"}])
+
+
+def test_file_is_reloaded_when_it_changes(tmp_path):
+    path = tmp_path / "keys.json"
+    write_keys(path, [{"key": "one", "tenant": "a"}])
+    clock = FakeClock()
+    store = KeyStore(path=str(path), reload_interval=5.0, clock=clock)
+    assert store.verify("one").tenant == "a"
+
+    write_keys(path, [{"key": "two", "tenant": "b"}])
+    assert store.verify("two") is None  # not checked again yet
+    clock.now = 5.0
+    assert store.verify("two").tenant == "b" and store.verify("one") is None
+    assert store.reloads == 2
+
+    path.write_text("{not json")
+    clock.now = 10.0
+    assert store.verify("two").tenant == "b"  # a broken file keeps the old keys
+    assert store.reloads == 2
+
+
+def test_from_env_defaults_to_the_app_key(tmp_path, monkeypatch):
+    monkeypatch.delenv("API_KEYS_FILE", raising=False)
+    store = KeyStore.from_env("builtin")
+    assert store.verify("builtin") is not None and len(store) == 1
+
+    path = tmp_path / "keys.json"
+    key = auth.add_key(str(path), tenant="acme", quota="5/minute")
+    monkeypatch.setenv("API_KEYS_FILE", str(path))
+    store = KeyStore.from_env("builtin")
+    assert store.verify("builtin") is None
+    assert store.verify(key).quota == "5/minute"
+    assert key not in path.read_text()  # only the hash is stored
+
+
+def test_dependency_returns_the_key_entry_or_401():
+    app = FastAPI()
+    require_key = APIKeyAuth(KeyStore([{"key": "k1", "tenant": "acme"}]))
+
+    @app.get("/whoami")
+    def whoami(key=Security(require_key)):
+        return {"tenant": key.tenant}
+
+    client = TestClient(app)
+    assert client.get("/whoami", headers={"X-API-Key": "k1"}).json() == {"tenant": "acme"}
+    assert client.get("/whoami", headers={"X-API-Key": "k2"}).status_code == 401
+    assert client.get("/whoami").status_code == 401
+    with pytest.raises(HTTPException):
+        require_key(api_key="nope")
+
+
+def test_apps_accept_keys_from_the_file(tmp_path, monkeypatch):
+    import importlib
+
+    path = tmp_path / "keys.json"
+    key = auth.add_key(str(path), tenant="acme")
+    monkeypatch.setenv("API_KEYS_FILE", str(path))
+    import main
+    try:
+        main = importlib.reload(main)
+        client = TestClient(main.app)
+        assert client.post("/qa", headers={"X-API-Key": key}, json={"query": "q"}).status_code == 200
+        assert client.post("/qa", headers={"X-API-Key": main.VALID_API_KEY}, json={"query": "q"}).status_code == 401
+    finally:
+        monkeypatch.delenv("API_KEYS_FILE")
+        importlib.reload(main)
+
+
+def test_cli_hash(capsys):
+    auth.main(["hash", "secret"])
+    assert capsys.readouterr().out.strip() == hash_key("secret")
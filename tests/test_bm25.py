@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+from src.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def doc(text, source="f.txt", page=0):
+    return types.SimpleNamespace(page_content=text, metadata={"source": source, "page": page})
+
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Hello, FAISS-index 42!") == ["hello", "faiss", "index", "42"]
+
+
+def test_search_ranks_exact_keyword_match_first():
+    docs = [
+        doc("Cats and dogs are pets."),
+        doc("The quarterly revenue report for ACME-4711 is attached."),
+        doc("Dogs love long walks in the park with other dogs."),
+    ]
+    index = BM25Index.from_documents(docs)
+    assert index.search("ACME-4711 revenue", k=1) == [docs[1]]
+    # higher term frequency wins for otherwise similar docs
+    assert index.search("dogs", k=2)[0] is docs[2]
+
+
+def test_search_unknown_terms_and_empty_index():
+    assert BM25Index().search("anything") == []
+    index = BM25Index.from_documents([doc("alpha beta")])
+    assert index.search("gamma") == []
+    assert index.search("alpha", k=0) == []
+
+
+def test_add_documents_updates_length_normalisation():
+    index = BM25Index.from_documents([doc("alpha")])
+    first = index.search_with_scores("alpha")[0][1]
+    index.add_documents([doc("beta " * 50)])
+    assert len(index) == 2
+    assert index.search_with_scores("alpha")[0][1] != first
+
+
+def test_reciprocal_rank_fusion_merges_equal_documents():
+    a, b, c = doc("a"), doc("b"), doc("c")
+    # copies of the same chunk (as returned by a vector store) are merged
+    fused = reciprocal_rank_fusion([[a, b], [doc("b"), c]])
+    assert [d.page_content for d in fused] == ["b", "a", "c"]
+    assert fused[1] is a
+    assert len(reciprocal_rank_fusion([[a, b], [c]], limit=2)) == 2
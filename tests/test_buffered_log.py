@@ -0,0 +1,95 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import os
+import threading
+import time
+
+import pytest
+
+from src.buffered_log import BufferedLogWriter
+
+
+def test_lines_are_written_in_order_on_flush_and_close(tmp_path):
+    path = tmp_path / "logs" / "api.txt"
+    writer = BufferedLogWriter(str(path), flush_lines=100, flush_interval=60)
+    writer.write("one")
+    writer.write("two\n")
+    assert not path.exists()  # below both thresholds: still buffered
+    assert writer.flush(timeout=5)
+    assert path.read_text() == "one\ntwo\n"
+    writer.write("three")
+    writer.close()
+    assert path.read_text() == "one\ntwo\nthree\n"
+    with pytest.raises(ValueError):
+        writer.write("late")
+
+
+def test_size_and_time_thresholds_trigger_a_batch(tmp_path):
+    by_size = tmp_path / "size.txt"
+    with BufferedLogWriter(str(by_size), flush_lines=3, flush_interval=60) as writer:
+        for i in range(3):
+            writer.write(f"line {i}")
+        deadline = time.time() + 5
+        while not by_size.exists() and time.time() < deadline:
+            time.sleep(0.01)
+        assert by_size.read_text().count("\n") == 3
+
+    by_time = tmp_path / "time.txt"
+    with BufferedLogWriter(str(by_time), flush_lines=100, flush_interval=0.05) as writer:
+        writer.write("tick")
+        time.sleep(0.3)
+        assert by_time.read_text() == "tick\n"
+
+
+def test_concurrent_writers_with_a_small_buffer(tmp_path):
+    path = tmp_path / "api.txt"
+    with BufferedLogWriter(str(path), capacity=16, flush_lines=8, flush_interval=0.01) as writer:
+        threads = [
+            threading.Thread(target=lambda n=n: [writer.write(f"{n}:{i}") for i in range(500)])
+            for n in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2000
+    for n in range(4):
+        assert [line for line in lines if line.startswith(f"{n}:")] == [f"{n}:{i}" for i in range(500)]
+
+
+def test_drop_when_full_counts_dropped_lines(tmp_path):
+    writer = BufferedLogWriter(str(tmp_path / "api.txt"), capacity=4, flush_lines=4, flush_interval=60, drop_when_full=True)
+    write_batch = writer._write_batch
+    writer._write_batch = lambda data: (time.sleep(0.05), write_batch(data))  # a slow disk
+    for i in range(100):
+        writer.write(str(i))
+    writer.close()
+    written = (tmp_path / "api.txt").read_text().splitlines()
+    assert writer.dropped > 0
+    assert len(written) + writer.dropped == 100
+
+
+def test_rotation_keeps_backups(tmp_path):
+    path = tmp_path / "api.txt"
+    with BufferedLogWriter(str(path), flush_lines=1, max_bytes=50, backup_count=2) as writer:
+        for i in range(12):
+            writer.write(f"entry {i:02d} " + "x" * 10)  # 20 bytes per line
+            writer.flush()
+    assert sorted(os.listdir(tmp_path)) == ["api.txt", "api.txt.1", "api.txt.2"]
+    assert path.stat().st_size <= 50
+    assert path.read_text().splitlines()[-1].startswith("entry 11")
+    assert (tmp_path / "api.txt.1").read_text().splitlines()[-1].startswith("entry 09")
+
+
+def test_reopens_when_the_file_is_rotated_externally(tmp_path):
+    path = tmp_path / "api.txt"
+    with BufferedLogWriter(str(path), flush_lines=1) as writer:
+        writer.write("before")
+        writer.flush()
+        os.replace(path, tmp_path / "api.txt.old")
+        writer.write("after")
+    assert path.read_text() == "after\n"
+    assert (tmp_path / "api.txt.old").read_text() == "before\n"
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import json
+import threading
+
+from src.checkpoint import JsonlCheckpoint
+
+
+def test_append_and_reload(tmp_path):
+    path = tmp_path / "nested" / "ck.jsonl"
+    with JsonlCheckpoint(str(path)) as ck:
+        ck.append({"id": "a", "value": 1})
+        ck.append({"id": "b", "value": 2})
+        ck.append({"id": "a", "value": 3})
+        assert "a" in ck and len(ck) == 2
+    reloaded = JsonlCheckpoint(str(path))
+    assert reloaded.get("a") == {"id": "a", "value": 3}
+    assert reloaded.get("missing") is None
+
+
+def test_torn_last_line_is_ignored_and_repaired(tmp_path):
+    path = tmp_path / "ck.jsonl"
+    path.write_text(json.dumps({"id": "a"}) + "\n" + '{"id": "b", "val')
+    with JsonlCheckpoint(str(path)) as ck:
+        assert "a" in ck and "b" not in ck
+        ck.append({"id": "b"})
+    lines = path.read_text().splitlines()
+    assert json.loads(lines[-1]) == {"id": "b"}
+    assert set(JsonlCheckpoint(str(path)).records) == {"a", "b"}
+
+
+def test_torn_file_is_repaired_once_across_resumes(tmp_path):
+    path = tmp_path / "ck.jsonl"
+    path.write_text(json.dumps({"id": "a"}) + "\n" + '{"id": "b", "val')
+    ck = JsonlCheckpoint(str(path))
+    ck.append({"id": "b"})
+    ck.close()
+    ck.append({"id": "c"})  # reopens the file
+    ck.close()
+    with JsonlCheckpoint(str(path)) as resumed:
+        resumed.append({"id": "d"})
+    lines = path.read_text().split("\n")
+    assert lines[-1] == "" and "" not in lines[:-1]  # no blank lines
+    assert set(JsonlCheckpoint(str(path)).records) == {"a", "b", "c", "d"}
+
+
+def test_custom_key_and_concurrent_appends(tmp_path):
+    path = tmp_path / "ck.jsonl"
+    with JsonlCheckpoint(str(path), key="sha256") as ck:
+        threads = [
+            threading.Thread(target=lambda n=n: [ck.append({"sha256": f"{n}-{i}"}) for i in range(50)])
+            for n in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert len(JsonlCheckpoint(str(path), key="sha256")) == 200
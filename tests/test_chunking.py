@@ -0,0 +1,101 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+import pytest
+
+from src import chunking
+from src.chunking import TokenChunker, approx_token_count, make_splitter
+
+
+def words(text):
+    return len(text.split())
+
+
+def page(text, page_no=0):
+    return types.SimpleNamespace(page_content=text, metadata={"source": "doc.pdf", "page": page_no})
+
+
+def test_approx_token_count():
+    assert approx_token_count("") == 0
+    assert approx_token_count("a cat, sat.") == 5
+    assert approx_token_count("internationalization") == 5
+
+
+def test_chunks_respect_budget_and_sentence_boundaries():
+    text = " ".join(f"Sentence number {i} has five." for i in range(40))
+    chunker = TokenChunker(chunk_tokens=20, overlap_tokens=0, count_tokens=words)
+    chunks = chunker.split_text(text)
+    assert all(words(c) <= 20 for c in chunks)
+    assert all(c.endswith(".") for c in chunks)
+    # 4 five-word sentences per chunk, no overlap: every sentence exactly once
+    assert len(chunks) == 10
+    assert " ".join(chunks) == text
+
+
+def test_overlap_carries_whole_sentences():
+    text = " ".join(f"S{i} a b c." for i in range(12))
+    chunks = TokenChunker(chunk_tokens=12, overlap_tokens=4, count_tokens=words).split_text(text)
+    assert chunks[0] == "S0 a b c. S1 a b c. S2 a b c."
+    assert chunks[1].startswith("S2 a b c.")
+    assert all(words(c) <= 12 for c in chunks)
+    assert chunks[-1].endswith("S11 a b c.")
+
+
+def test_paragraph_breaks_are_preserved_and_long_sentences_split():
+    long_sentence = " ".join(["word"] * 25) + "."
+    text = "Short intro.\n\n" + long_sentence
+    chunks = TokenChunker(chunk_tokens=10, overlap_tokens=0, count_tokens=words).split_text(text)
+    assert all(words(c) <= 10 for c in chunks)
+    assert sum(words(c) for c in chunks) == 27
+    assert TokenChunker(chunk_tokens=50, overlap_tokens=0, count_tokens=words).split_text(text) == [text]
+
+
+def test_split_documents_keeps_pages_and_tolerates_missing_metadata():
+    docs = [page("One. Two. Three.", 1), types.SimpleNamespace(page_content="Loose text.")]
+    out = TokenChunker(chunk_tokens=2, overlap_tokens=0, count_tokens=words).split_documents(docs)
+    assert [d.page_content for d in out] == ["One. Two.", "Three.", "Loose text."]
+    assert [d.metadata.get("page") for d in out] == [1, 1, None]
+    assert out[0].metadata["tokens"] == 2
+    # the source metadata is copied, not shared
+    assert "tokens" not in docs[0].metadata
+
+
+def test_split_stream_is_lazy_and_spans_pages():
+    consumed = []
+
+    def pages():
+        for i in range(100):
+            consumed.append(i)
+            yield page(f"Page {i} text.", i)
+
+    stream = TokenChunker(chunk_tokens=6, overlap_tokens=0, count_tokens=words).split_stream(pages())
+    first = next(stream)
+    assert first.page_content == "Page 0 text.\n\nPage 1 text."
+    assert first.metadata["page"] == 0
+    assert len(consumed) < 5
+
+
+def test_make_splitter_selects_backend(monkeypatch):
+    monkeypatch.delenv("RAG_SPLITTER", raising=False)
+    monkeypatch.setenv("RAG_CHUNK_TOKENS", "64")
+    splitter = make_splitter(250, 25)
+    assert isinstance(splitter, TokenChunker)
+    assert (splitter.chunk_tokens, splitter.overlap_tokens) == (64, 25)
+
+    monkeypatch.setenv("RAG_SPLITTER", "character")
+    sentinel = object()
+    assert make_splitter(250, 25, character_factory=lambda: sentinel) is sentinel
+
+    monkeypatch.setenv("RAG_SPLITTER", "nope")
+    with pytest.raises(ValueError):
+        make_splitter(250, 25)
+    with pytest.raises(ValueError):
+        TokenChunker(chunk_tokens=10, overlap_tokens=10)
+
+
+def test_default_counter_falls_back_without_tiktoken(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    assert chunking.default_token_counter() is approx_token_count
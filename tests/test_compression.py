@@ -0,0 +1,78 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import logging
+import types
+
+from src import compression
+from src.compression import compress_documents, compressing_retriever, rerank
+
+
+def words(text):
+    return len(text.split())
+
+
+def doc(text, page=0):
+    return types.SimpleNamespace(page_content=text, metadata={"page": page})
+
+
+FILLER = "The weather was mild. Lunch was served at noon. Nobody mentioned the parking lot."
+
+
+def test_rerank_promotes_keyword_matches():
+    docs = [doc(FILLER, 0), doc(FILLER + " Nothing else.", 1), doc("The invoice total is 4711 euro.", 2)]
+    assert rerank("invoice total", docs)[0] is docs[2]
+    assert rerank("anything", docs[:1]) == docs[:1]
+
+
+def test_compress_keeps_relevant_sentences_in_order_under_budget():
+    docs = [
+        doc(FILLER + " The invoice total is 4711 euro. " + FILLER + " The invoice is due in March.", 0),
+        doc(FILLER, 1),
+        doc("Payment of the invoice goes to ACME. " + FILLER, 2),
+    ]
+    out, stats = compress_documents("when is the invoice due and what is the total", docs, top_n=2, budget=30, count_tokens=words)
+    assert [d.metadata["page"] for d in out] == [0, 2]
+    assert out[0].page_content == "The invoice total is 4711 euro. The invoice is due in March."
+    assert stats["tokens_after"] <= 30
+    assert stats["tokens_before"] == words(docs[0].page_content) + words(docs[1].page_content)
+    assert stats["candidates"] == 3 and stats["docs"] == 2
+    # originals are untouched
+    assert docs[0].page_content.startswith("The weather")
+
+
+def test_compress_falls_back_to_first_sentence_without_matches():
+    out, _ = compress_documents("zebra", [doc(FILLER)], top_n=1, budget=100, count_tokens=words)
+    assert out[0].page_content == "The weather was mild."
+    assert compress_documents("zebra", [], top_n=3)[0] == []
+
+
+def test_compressing_retriever_is_opt_in(monkeypatch, caplog):
+    calls = []
+
+    class Base:
+        def __init__(self, n):
+            calls.append(n)
+
+        def invoke(self, query):
+            return [doc(FILLER, 0), doc("The invoice total is 4711 euro. " + FILLER, 1)]
+
+    monkeypatch.delenv("RAG_COMPRESSION", raising=False)
+    assert isinstance(compressing_retriever(Base, k=2), Base)
+    assert calls == [2]
+
+    monkeypatch.setenv("RAG_COMPRESSION", "1")
+    monkeypatch.setenv("RAG_CONTEXT_TOKENS", "50")
+    retriever = compressing_retriever(Base, k=1)
+    assert calls[-1] == 3
+    with caplog.at_level(logging.INFO, logger="compression"):
+        result = retriever.invoke("invoice total")
+    assert [d.page_content for d in result] == ["The invoice total is 4711 euro."]
+    assert "Context tokens" in caplog.text
+
+
+def test_compression_enabled_values(monkeypatch):
+    for value, expected in (("1", True), ("on", True), ("0", False), ("", False)):
+        monkeypatch.setenv("RAG_COMPRESSION", value)
+        assert compression.compression_enabled() is expected
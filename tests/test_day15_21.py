@@ -100,11 +100,14 @@ class DummyFAISS:
         self.docs = []
 
     @classmethod
-    def from_documents(cls, docs, embeddings):
+    def from_documents(cls, docs, embeddings, ids=None):
         inst = cls()
         inst.docs = docs
         return inst
 
+    def save_local(self, folder_path):
+        pass
+
     def as_retriever(self):
         return self
 
@@ -210,6 +213,9 @@ def inject_fakes(tmp_path, monkeypatch):
     for k, v in fake_modules.items():
         monkeypatch.setitem(sys.modules, k, v)
 
+    # Keep day18's incremental index state out of the repository
+    monkeypatch.setenv('DAY18_INDEX_DIR', str(tmp_path / 'day18_index'))
+
     # Ensure sample text files exist for day18 (file1..file10)
     root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     for i in range(1, 11):
@@ -236,7 +242,81 @@ def run_module_and_capture(name):
 
 
 @pytest.mark.parametrize('modname', MODULES_TO_TEST)
-def test_modules_run_without_errors(modname):
+def test_modules_run_without_errors(modname, monkeypatch):
+    # the examples with a CLI parse sys.argv; don't hand them pytest's
+    monkeypatch.setattr(sys, 'argv', [modname])
     out = run_module_and_capture(modname)
     # Check that output contains some expected marker or not an exception
     assert 'Exception:' not in out
+
+
+@pytest.mark.parametrize('modname', ['src.day16', 'src.day17', 'src.day18', 'src.day20'])
+def test_pipeline_modules_import_without_running(modname, monkeypatch):
+    import src.utils
+
+    def no_llm(**kw):
+        raise AssertionError("importing must not build an LLM")
+
+    monkeypatch.setattr(src.utils, 'make_chat_llm', no_llm)
+    monkeypatch.delitem(sys.modules, modname, raising=False)
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        module = importlib.import_module(modname)
+    assert buf.getvalue() == ''
+    assert callable(module.main)
+
+
+def test_pipeline_objects_run_in_process(monkeypatch, tmp_path):
+    monkeypatch.delenv('RAG_COMPRESSION', raising=False)
+    for name in ('src.day16', 'src.day18', 'src.day20'):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    day16 = importlib.import_module('src.day16')
+    day18 = importlib.import_module('src.day18')
+    day20 = importlib.import_module('src.day20')
+
+    pipeline = day16.SummaryKeywordPipeline(llm=DummyLLM())
+    assert pipeline.run("some text") == {'summary': 'dummy-summary', 'keywords': 'dummy-keywords'}
+
+    for name in ('a.txt', 'b.txt'):
+        (tmp_path / f'file_{name}').write_text('x')
+    index = day18.TextFileIndex(directory=str(tmp_path), mode='bm25')
+    assert index.build() is None
+    hits = index.search('sample content', k=5)
+    assert sorted(h.metadata['source'] for h in hits) == ['file_a.txt', 'file_b.txt']
+
+    pdf = Path(__file__).resolve().parents[1] / 'example.pdf'
+    qa = day20.PDFQAPipeline(str(pdf), mode='bm25', llm=DummyLLM())
+    answer, elapsed_ms = qa.ask('what is it about?')
+    assert answer == 'fake-answer'
+    assert elapsed_ms >= 0
+    with pytest.raises(FileNotFoundError):
+        day20.PDFQAPipeline(str(tmp_path / 'missing.pdf'), mode='bm25', llm=DummyLLM())
+
+
+def test_hybrid_watch_keeps_bm25_in_step_with_the_vector_index(tmp_path):
+    import types
+    sys.modules.pop('src.day18', None)
+    day18 = importlib.import_module('src.day18')
+
+    def doc(text, source):
+        return types.SimpleNamespace(page_content=text, metadata={'source': source})
+
+    class FakeIndexer:
+        vector_store = None
+        docs = [doc('apples and pears', 'a.txt')]
+
+        def documents(self):
+            return list(self.docs)
+
+        def watch(self, interval, stop, on_change):
+            # one poll: a file was added
+            self.vector_store = 'store'
+            self.docs.append(doc('bananas are yellow', 'b.txt'))
+            on_change({'added': ['b.txt'], 'changed': [], 'removed': []})
+
+    index = day18.TextFileIndex(directory=str(tmp_path), mode='hybrid')
+    index.indexer = FakeIndexer()
+    index.bm25_index = day18.BM25Index.from_documents(index.indexer.documents())
+    index.watch(interval=0)
+    assert index.vector_store == 'store'
+    assert [h.metadata['source'] for h in index.bm25_index.search('bananas', k=1)] == ['b.txt']
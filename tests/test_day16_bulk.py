@@ -0,0 +1,111 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import json
+import threading
+import time
+
+import pytest
+
+day16 = pytest.importorskip("src.day16")
+
+
+class FakePipeline:
+    """Records per-stage concurrency; fails for ids listed in `fail`."""
+
+    def __init__(self, delay=0.01, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.lock = threading.Lock()
+        self.active = {"summary": 0, "keywords": 0}
+        self.peak = {"summary": 0, "keywords": 0}
+        self.events = []
+
+    def _stage(self, stage, value):
+        with self.lock:
+            self.active[stage] += 1
+            self.peak[stage] = max(self.peak[stage], self.active[stage])
+            self.events.append((stage, "start", value))
+        time.sleep(self.delay)
+        with self.lock:
+            self.active[stage] -= 1
+        if value in self.fail:
+            raise RuntimeError("LLM error")
+        return f"{stage}({value})"
+
+    def summarize(self, text):
+        return self._stage("summary", text)
+
+    def keywords(self, summary):
+        return self._stage("keywords", summary)
+
+
+def docs(n):
+    return [(f"d{i}", f"t{i}") for i in range(n)]
+
+
+def read(path):
+    return [json.loads(line) for line in Path(path).read_text().splitlines()]
+
+
+def test_bulk_pipelines_stages_with_bounded_concurrency(tmp_path):
+    pipeline = FakePipeline()
+    out = tmp_path / "out.jsonl"
+    stats = day16.run_bulk(pipeline, docs(20), str(out), summary_concurrency=3, keyword_concurrency=2)
+    assert (stats["done"], stats["skipped"], stats["failed"]) == (20, 0, 0)
+    records = {r["id"]: r for r in read(out)}
+    assert records["d7"] == {"id": "d7", "summary": "summary(t7)", "keywords": "keywords(summary(t7))"}
+    assert pipeline.peak["summary"] <= 3 and pipeline.peak["keywords"] <= 2
+    # keyword extraction started before the last summary: the stages overlap
+    first_keyword = next(i for i, e in enumerate(pipeline.events) if e[0] == "keywords")
+    last_summary = max(i for i, e in enumerate(pipeline.events) if e[0] == "summary")
+    assert first_keyword < last_summary
+
+
+def test_bulk_resumes_without_redoing_finished_documents(tmp_path):
+    out = str(tmp_path / "out.jsonl")
+    first = day16.run_bulk(FakePipeline(delay=0, fail={"t3"}), docs(6), out)
+    assert (first["done"], first["failed"]) == (5, 1)
+
+    rerun = FakePipeline(delay=0)
+    second = day16.run_bulk(rerun, docs(6), out)
+    assert (second["done"], second["skipped"], second["failed"]) == (1, 5, 0)
+    assert [e[2] for e in rerun.events if e[0] == "summary"] == ["t3"]
+    assert sorted(r["id"] for r in read(out)) == [f"d{i}" for i in range(6)]
+
+
+def test_bulk_reads_input_lazily(tmp_path):
+    pulled = []
+
+    def source():
+        for doc in docs(50):
+            pulled.append(doc)
+            yield doc
+
+    pipeline = FakePipeline(delay=0.02)
+    seen_ahead = []
+
+    def summarize(text):
+        seen_ahead.append(len(pulled))
+        return FakePipeline.summarize(pipeline, text)
+
+    pipeline.summarize = summarize
+    day16.run_bulk(pipeline, source(), str(tmp_path / "out.jsonl"), summary_concurrency=2, keyword_concurrency=2, lookahead=4)
+    # when the first summary starts, at most `lookahead` documents were
+    # read, plus the one waiting for a free slot
+    assert seen_ahead[0] <= 5
+
+
+def test_cli_bulk_mode(tmp_path, monkeypatch, capsys):
+    src_dir = tmp_path / "docs"
+    (src_dir / "sub").mkdir(parents=True)
+    (src_dir / "a.txt").write_text("alpha")
+    (src_dir / "sub" / "b.txt").write_text("beta")
+    monkeypatch.setattr(day16, "SummaryKeywordPipeline", lambda: FakePipeline(delay=0))
+    out = tmp_path / "out.jsonl"
+    day16.main(["--input-dir", str(src_dir), "--output", str(out)])
+    assert "Processed 2 documents" in capsys.readouterr().out
+    assert sorted(r["id"] for r in read(out)) == ["a.txt", str(Path("sub") / "b.txt")]
+    with pytest.raises(SystemExit):
+        day16.main(["--input-dir", str(src_dir)])
@@ -0,0 +1,120 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+day17 = pytest.importorskip("src.day17")
+
+
+class FakeSummarizer:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    def summarize(self, kind, text):
+        with self.lock:
+            self.calls.append((kind, text))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return f"{kind}[{text.replace(chr(10), '|')}]"
+
+
+def make_tree(root, docs):
+    """Write one placeholder file per PDF; `pages` maps its path to page texts."""
+    pages = {}
+    for name, texts in docs.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"%PDF-1.4")
+        pages[str(path)] = texts
+    return pages
+
+
+def run(tmp_path, summarizer, pages, **kwargs):
+    kwargs.setdefault("extract_executor", ThreadPoolExecutor(2))
+    return day17.summarize_directory(
+        summarizer, str(tmp_path / "pdfs"), str(tmp_path / "out.jsonl"), extract=pages.__getitem__, **kwargs
+    )
+
+
+def read(path):
+    return {r["id"]: r for r in map(json.loads, Path(path).read_text().splitlines())}
+
+
+def test_map_reduce_covers_every_page(tmp_path):
+    pages = make_tree(tmp_path / "pdfs", {
+        "short.pdf": ["s1", "s2"],
+        "sub/long.pdf": [f"p{i}" for i in range(7)],
+        "notes.txt": [],
+    })
+    summarizer = FakeSummarizer(delay=0.01)
+    stats = run(tmp_path, summarizer, pages, pages_per_group=2, reduce_fanout=2, concurrency=3)
+
+    assert (stats["done"], stats["failed"], stats["pages"]) == (2, 0, 9)
+    assert stats["docs_per_min"] > 0
+    records = read(tmp_path / "out.jsonl")
+    assert records["short.pdf"]["summary"] == "document[s1|s2]"
+    long = records[str(Path("sub") / "long.pdf")]
+    assert (long["pages"], long["groups"]) == (7, 4)
+    # 4 map summaries reduced two at a time, then the last two combined
+    assert long["summary"] == "reduce[reduce[map[p0|p1]||map[p2|p3]]||reduce[map[p4|p5]||map[p6]]]"
+    kinds = [kind for kind, _ in summarizer.calls]
+    assert (kinds.count("map"), kinds.count("reduce"), kinds.count("document")) == (4, 3, 1)
+    assert summarizer.peak <= 3
+
+
+def test_rerun_skips_done_documents_and_reuses_cached_pages(tmp_path):
+    pages = make_tree(tmp_path / "pdfs", {"a.pdf": ["a1", "a2", "a3"], "b.pdf": ["b1", "b2", "b3"]})
+    first = run(tmp_path, FakeSummarizer(), pages, pages_per_group=1)
+    assert (first["done"], first["cache_hits"]) == (2, 0)
+
+    # b.pdf is edited: only its changed page and the reduce are recomputed
+    pages[str(tmp_path / "pdfs" / "b.pdf")][1] = "b2-edited"
+    out = read(tmp_path / "out.jsonl")
+    del out["b.pdf"]
+    (tmp_path / "out.jsonl").write_text("".join(json.dumps(r) + "\n" for r in out.values()))
+
+    summarizer = FakeSummarizer()
+    second = run(tmp_path, summarizer, pages, pages_per_group=1)
+    assert (second["done"], second["skipped"], second["cache_hits"]) == (1, 1, 2)
+    assert summarizer.calls == [("map", "b2-edited"), ("reduce", "map[b1]\n\nmap[b2-edited]\n\nmap[b3]")]
+    assert (tmp_path / "out.cache.jsonl").exists()
+
+
+def test_failed_and_empty_documents_are_retried(tmp_path):
+    pages = make_tree(tmp_path / "pdfs", {"ok.pdf": ["x"], "scan.pdf": ["  ", ""]})
+    stats = run(tmp_path, FakeSummarizer(), pages)
+    assert (stats["done"], stats["failed"]) == (1, 1)
+    assert list(read(tmp_path / "out.jsonl")) == ["ok.pdf"]
+
+
+def test_cli_batch_mode(tmp_path, monkeypatch, capsys):
+    pages = make_tree(tmp_path / "pdfs", {"a.pdf": ["one", "two"]})
+    monkeypatch.setattr(day17, "PDFSummarizer", FakeSummarizer)
+    monkeypatch.setattr(day17, "extract_pages", pages.__getitem__)
+    monkeypatch.setattr(day17, "ProcessPoolExecutor", ThreadPoolExecutor)
+    out = tmp_path / "out.jsonl"
+    day17.main(["--input-dir", str(tmp_path / "pdfs"), "--output", str(out)])
+    assert "Summarized 1 documents" in capsys.readouterr().out
+    assert read(out)["a.pdf"]["summary"] == "document[one|two]"
+    with pytest.raises(SystemExit):
+        day17.main(["--input-dir", str(tmp_path / "pdfs")])
+
+
+@pytest.mark.parametrize("fanout", [0, 1])
+def test_reduce_fanout_below_two_is_rejected(tmp_path, fanout):
+    pages = make_tree(tmp_path / "pdfs", {"long.pdf": [f"p{i}" for i in range(5)]})
+    with pytest.raises(ValueError, match="reduce_fanout"):
+        run(tmp_path, FakeSummarizer(), pages, pages_per_group=1, reduce_fanout=fanout)
@@ -0,0 +1,180 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import json
+import threading
+import time
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+
+np = pytest.importorskip("numpy")
+
+
+def _import_day21_with_shim(monkeypatch):
+    # Ensure lightweight langchain_community shim for imports
+    fake_lc = types.ModuleType("langchain_community")
+    fake_lc.document_loaders = types.ModuleType("langchain_community.document_loaders")
+    fake_lc.embeddings = types.ModuleType("langchain_community.embeddings")
+    fake_lc.vectorstores = types.ModuleType("langchain_community.vectorstores")
+    fake_lc.llms = types.ModuleType("langchain_community.llms")
+    fake_lc.llms.ChatOpenAI = lambda *a, **k: None
+    fake_lc.embeddings.OpenAIEmbeddings = lambda *a, **k: None
+    fake_lc.vectorstores.FAISS = type("FAISS", (), {})
+    fake_lc.document_loaders.PyPDFLoader = lambda path: None
+    monkeypatch.setitem(sys.modules, "langchain_community", fake_lc)
+    monkeypatch.setitem(sys.modules, "langchain_community.document_loaders", fake_lc.document_loaders)
+    monkeypatch.setitem(sys.modules, "langchain_community.embeddings", fake_lc.embeddings)
+    monkeypatch.setitem(sys.modules, "langchain_community.vectorstores", fake_lc.vectorstores)
+    monkeypatch.setitem(sys.modules, "langchain_community.llms", fake_lc.llms)
+
+    import importlib
+    if 'src.day21' in sys.modules:
+        del sys.modules['src.day21']
+    return importlib.import_module('src.day21')
+
+
+DOCS = [
+    types.SimpleNamespace(page_content=f"chunk {i}", metadata={"page": i}) for i in range(4)
+]
+
+
+class FakeStore:
+    """Mimics the LangChain FAISS attributes used for batched search."""
+
+    def __init__(self):
+        self.embed_calls = []
+        self.search_shapes = []
+        store = self
+
+        class Embedder:
+            def embed_documents(self, texts):
+                store.embed_calls.append(list(texts))
+                # question "qN" embeds next to chunk N
+                return [[float(t[1:]), 0.0] for t in texts]
+
+        class Index:
+            def search(self, x, k):
+                store.search_shapes.append(x.shape)
+                order = np.argsort(np.abs(np.arange(len(DOCS))[None, :] - x[:, :1]), axis=1)[:, :k]
+                return np.zeros(order.shape, dtype=np.float32), order
+
+        self.embedding_function = Embedder()
+        self.index = Index()
+        self.index_to_docstore_id = {i: f"id{i}" for i in range(len(DOCS))}
+        self.docstore = types.SimpleNamespace(search=lambda doc_id: DOCS[int(doc_id[2:])])
+
+    def as_retriever(self, **kw):
+        return "retriever"
+
+    def similarity_search(self, query, k=4):
+        raise AssertionError("batched search expected")
+
+
+def _patch_llm(monkeypatch, day21, combine):
+    monkeypatch.setattr(day21, "get_openai_api_key", lambda: "sk-123")
+    monkeypatch.setattr(day21, "make_chat_llm", lambda **kw: object())
+
+    class FakeQA:
+        @classmethod
+        def from_chain_type(cls, **kw):
+            chain = types.SimpleNamespace(run=lambda q: "per-question " + q)
+            if combine is not None:
+                chain.combine_documents_chain = combine
+            return chain
+
+    monkeypatch.setattr(day21, "RetrievalQA", FakeQA)
+
+
+def _lines(resp):
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+def test_batch_shares_retrieval_and_bounds_concurrency(monkeypatch):
+    day21 = _import_day21_with_shim(monkeypatch)
+    monkeypatch.delenv("RAG_RETRIEVAL_MODE", raising=False)
+    monkeypatch.delenv("RAG_COMPRESSION", raising=False)
+    store = FakeStore()
+    monkeypatch.setattr(day21, "vector_store", store)
+
+    active = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    class Combine:
+        def invoke(self, inputs):
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            time.sleep(0.02)
+            with lock:
+                active["now"] -= 1
+            return {"output_text": inputs["question"] + " -> " + inputs["input_documents"][0].page_content}
+
+    _patch_llm(monkeypatch, day21, Combine())
+    questions = [f"q{i % 4}" for i in range(8)]
+    resp = TestClient(day21.app).post("/ask_batch", json={"questions": questions, "concurrency": 2})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = _lines(resp)
+    assert sorted(line["index"] for line in lines) == list(range(8))
+    for line in lines:
+        n = line["index"] % 4
+        assert line["answer"] == f"q{n} -> chunk {n}"
+        assert line["sources"][0]["page"] == n
+    assert store.embed_calls == [questions]
+    assert store.search_shapes == [(8, 2)]
+    assert 1 < active["max"] <= 2
+
+
+def test_batch_falls_back_to_per_question_chain(monkeypatch):
+    day21 = _import_day21_with_shim(monkeypatch)
+    monkeypatch.delenv("RAG_RETRIEVAL_MODE", raising=False)
+    monkeypatch.setattr(day21, "vector_store", FakeStore())
+    _patch_llm(monkeypatch, day21, None)
+    resp = TestClient(day21.app).post("/ask_batch", json={"questions": ["a", "b"]})
+    assert sorted(line["answer"] for line in _lines(resp)) == ["per-question a", "per-question b"]
+
+
+def test_batch_reports_per_question_errors(monkeypatch):
+    day21 = _import_day21_with_shim(monkeypatch)
+    monkeypatch.delenv("RAG_RETRIEVAL_MODE", raising=False)
+    monkeypatch.setattr(day21, "vector_store", FakeStore())
+
+    class Combine:
+        def invoke(self, inputs):
+            if inputs["question"] == "q1":
+                raise RuntimeError("rate limited")
+            return {"output_text": "ok"}
+
+    _patch_llm(monkeypatch, day21, Combine())
+    lines = {line["index"]: line for line in _lines(TestClient(day21.app).post("/ask_batch", json={"questions": ["q0", "q1"]}))}
+    assert lines[0]["answer"] == "ok"
+    assert lines[1]["error"] == "rate limited"
+
+
+def test_batch_validation(monkeypatch):
+    day21 = _import_day21_with_shim(monkeypatch)
+    client = TestClient(day21.app)
+    assert client.post("/ask_batch", json={"questions": []}).status_code == 400
+    monkeypatch.setattr(day21, "vector_store", None)
+    monkeypatch.delenv("RAG_RETRIEVAL_MODE", raising=False)
+    assert client.post("/ask_batch", json={"questions": ["q"]}).status_code == 400
+
+
+def test_batch_compression_logs_tokens_and_latency(monkeypatch, caplog):
+    import logging
+
+    day21 = _import_day21_with_shim(monkeypatch)
+    monkeypatch.delenv("RAG_RETRIEVAL_MODE", raising=False)
+    monkeypatch.setenv("RAG_COMPRESSION", "1")
+    monkeypatch.setenv("RAG_RERANK_FETCH_K", "4")
+    monkeypatch.setattr(day21, "vector_store", FakeStore())
+    with caplog.at_level(logging.INFO, logger="compression"):
+        contexts = day21._batch_documents("vector", ["q1", "q2"])
+    assert len(contexts) == 2
+    records = [r.getMessage() for r in caplog.records if r.name == "compression"]
+    assert len(records) == 2
+    assert all(m.startswith("Context tokens") and m.endswith(" ms") for m in records)
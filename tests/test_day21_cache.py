@@ -0,0 +1,113 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import io
+import types
+from fastapi.testclient import TestClient
+
+
+def _import_day21_with_shim(monkeypatch):
+    # Ensure lightweight langchain_community shim for imports
+    fake_lc = types.ModuleType("langchain_community")
+    fake_lc.document_loaders = types.ModuleType("langchain_community.document_loaders")
+    fake_lc.embeddings = types.ModuleType("langchain_community.embeddings")
+    fake_lc.vectorstores = types.ModuleType("langchain_community.vectorstores")
+    fake_lc.llms = types.ModuleType("langchain_community.llms")
+    fake_lc.llms.ChatOpenAI = lambda *a, **k: None
+    fake_lc.embeddings.OpenAIEmbeddings = lambda *a, **k: None
+    fake_lc.vectorstores.FAISS = type("FAISS", (), {})
+    fake_lc.document_loaders.PyPDFLoader = lambda path: None
+    monkeypatch.setitem(sys.modules, "langchain_community", fake_lc)
+    monkeypatch.setitem(sys.modules, "langchain_community.document_loaders", fake_lc.document_loaders)
+    monkeypatch.setitem(sys.modules, "langchain_community.embeddings", fake_lc.embeddings)
+    monkeypatch.setitem(sys.modules, "langchain_community.vectorstores", fake_lc.vectorstores)
+    monkeypatch.setitem(sys.modules, "langchain_community.llms", fake_lc.llms)
+
+    import importlib
+    if 'src.day21' in sys.modules:
+        del sys.modules['src.day21']
+    return importlib.import_module('src.day21')
+
+
+def _patch_chain_factories(monkeypatch, day21, built):
+    monkeypatch.setattr(day21, "get_openai_api_key", lambda: "sk-123")
+
+    def fake_llm(**kw):
+        built["llm"] += 1
+        return object()
+
+    monkeypatch.setattr(day21, "make_chat_llm", fake_llm)
+
+    class FakeQA:
+        @classmethod
+        def from_chain_type(cls, **kw):
+            built["chain"] += 1
+
+            class Q:
+                def run(self, q):
+                    return "answer to " + q
+
+            return Q()
+
+    monkeypatch.setattr(day21, "RetrievalQA", FakeQA)
+
+
+def test_qa_chain_reused_across_requests(monkeypatch):
+    day21 = _import_day21_with_shim(monkeypatch)
+    built = {"llm": 0, "chain": 0}
+    _patch_chain_factories(monkeypatch, day21, built)
+
+    class VS:
+        def as_retriever(self, **kw):
+            return "retriever"
+
+    monkeypatch.setattr(day21, "vector_store", VS())
+    client = TestClient(day21.app)
+    for q in ("a", "b", "c"):
+        resp = client.post("/ask", json={"question": q})
+        assert resp.status_code == 200
+        assert resp.json()["answer"] == "answer to " + q
+    assert built == {"llm": 1, "chain": 1}
+
+
+def test_upload_invalidates_cached_chain(monkeypatch):
+    day21 = _import_day21_with_shim(monkeypatch)
+    built = {"llm": 0, "chain": 0}
+    _patch_chain_factories(monkeypatch, day21, built)
+
+    class FakeLoader:
+        def __init__(self, path):
+            pass
+
+        def load(self):
+            return [types.SimpleNamespace(page_content="p", metadata={"page": 1})]
+
+    class FakeSplitter:
+        def __init__(self, **kw):
+            pass
+
+        def split_documents(self, docs):
+            return docs
+
+    class FakeFAISS:
+        @classmethod
+        def from_documents(cls, docs, embeddings):
+            return types.SimpleNamespace(as_retriever=lambda **kw: "retriever")
+
+    monkeypatch.setattr(day21, "PyPDFLoader", FakeLoader)
+    monkeypatch.setattr(day21, "CharacterTextSplitter", FakeSplitter)
+    monkeypatch.setattr(day21, "OpenAIEmbeddings", lambda: None)
+    monkeypatch.setattr(day21, "FAISS", FakeFAISS)
+
+    client = TestClient(day21.app)
+    files = {"file": ("doc.pdf", io.BytesIO(b"%PDF-1.4 fake"), "application/pdf")}
+    assert client.post("/upload_pdf", files=files).status_code == 200
+    client.post("/ask", json={"question": "q"})
+    client.post("/ask", json={"question": "q"})
+    assert built["chain"] == 1
+
+    files = {"file": ("doc2.pdf", io.BytesIO(b"%PDF-1.4 fake"), "application/pdf")}
+    assert client.post("/upload_pdf", files=files).status_code == 200
+    client.post("/ask", json={"question": "q"})
+    assert built["chain"] == 2
@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import io
+import types
+from fastapi.testclient import TestClient
+
+
+def _import_day21_with_shim(monkeypatch):
+    # Ensure lightweight langchain_community shim for imports
+    fake_lc = types.ModuleType("langchain_community")
+    fake_lc.document_loaders = types.ModuleType("langchain_community.document_loaders")
+    fake_lc.embeddings = types.ModuleType("langchain_community.embeddings")
+    fake_lc.vectorstores = types.ModuleType("langchain_community.vectorstores")
+    fake_lc.llms = types.ModuleType("langchain_community.llms")
+    fake_lc.llms.ChatOpenAI = lambda *a, **k: None
+    fake_lc.embeddings.OpenAIEmbeddings = lambda *a, **k: None
+    fake_lc.vectorstores.FAISS = type("FAISS", (), {})
+    fake_lc.document_loaders.PyPDFLoader = lambda path: None
+    monkeypatch.setitem(sys.modules, "langchain_community", fake_lc)
+    monkeypatch.setitem(sys.modules, "langchain_community.document_loaders", fake_lc.document_loaders)
+    monkeypatch.setitem(sys.modules, "langchain_community.embeddings", fake_lc.embeddings)
+    monkeypatch.setitem(sys.modules, "langchain_community.vectorstores", fake_lc.vectorstores)
+    monkeypatch.setitem(sys.modules, "langchain_community.llms", fake_lc.llms)
+
+    import importlib
+    if 'src.day21' in sys.modules:
+        del sys.modules['src.day21']
+    return importlib.import_module('src.day21')
+
+
+def _patch_upload(monkeypatch, day21, pages):
+    class FakeLoader:
+        def __init__(self, path):
+            pass
+
+        def load(self):
+            return [types.SimpleNamespace(page_content=text, metadata={"page": i}) for i, text in enumerate(pages)]
+
+    class FakeSplitter:
+        def __init__(self, **kw):
+            pass
+
+        def split_documents(self, docs):
+            return docs
+
+    monkeypatch.setattr(day21, "PyPDFLoader", FakeLoader)
+    monkeypatch.setattr(day21, "CharacterTextSplitter", FakeSplitter)
+
+
+def _upload(client):
+    files = {"file": ("doc.pdf", io.BytesIO(b"%PDF-1.4 fake"), "application/pdf")}
+    return client.post("/upload_pdf", files=files)
+
+
+def test_bm25_mode_indexes_and_answers_without_embeddings(monkeypatch):
+    day21 = _import_day21_with_shim(monkeypatch)
+    monkeypatch.setenv("RAG_RETRIEVAL_MODE", "bm25")
+    _patch_upload(monkeypatch, day21, ["the invoice total is 4711 euro", "weather is nice"])
+
+    def no_embeddings(*a, **k):
+        raise AssertionError("embeddings must not be created in bm25 mode")
+
+    monkeypatch.setattr(day21, "OpenAIEmbeddings", no_embeddings)
+    monkeypatch.setattr(day21, "get_openai_api_key", lambda: "sk-123")
+    monkeypatch.setattr(day21, "make_chat_llm", lambda **kw: object())
+
+    class FakeQA:
+        @classmethod
+        def from_chain_type(cls, retriever, **kw):
+            class Q:
+                def run(self, q):
+                    docs = retriever.invoke(q)
+                    return {"result": docs[0].page_content, "source_documents": docs}
+
+            return Q()
+
+    monkeypatch.setattr(day21, "RetrievalQA", FakeQA)
+
+    client = TestClient(day21.app)
+    assert _upload(client).status_code == 200
+    assert day21.vector_store is None
+    resp = client.post("/ask", json={"question": "what is the invoice total?"})
+    assert resp.status_code == 200
+    assert resp.json()["answer"] == "the invoice total is 4711 euro"
+
+
+def test_bm25_mode_without_upload_returns_400(monkeypatch):
+    day21 = _import_day21_with_shim(monkeypatch)
+    monkeypatch.setenv("RAG_RETRIEVAL_MODE", "bm25")
+    client = TestClient(day21.app)
+    assert client.post("/ask", json={"question": "q"}).status_code == 400
+
+
+def test_upload_drops_duplicate_chunks_and_reports_savings(monkeypatch):
+    day21 = _import_day21_with_shim(monkeypatch)
+    monkeypatch.setenv("RAG_RETRIEVAL_MODE", "bm25")
+    footer = "Confidential. Copyright 2024 ACME Corporation. All rights reserved."
+    _patch_upload(monkeypatch, day21, [footer, "the invoice total is 4711 euro", footer])
+    resp = _upload(TestClient(day21.app))
+    assert resp.status_code == 200
+    assert resp.json()["chunks"] == 2
+    assert resp.json()["embeddings_saved"] == 1
+    assert len(day21.bm25_index.docs) == 2
@@ -14,8 +14,20 @@ def test_log_api_call_writes_file(tmp_path):
     try:
         os.chdir(tmp_path)
         day22.log_api_call("/some-endpoint", "bob")
+        # lines are written by a background writer in batches
+        day22.flush_logs()
         assert out.exists()
         txt = out.read_text()
         assert "/some-endpoint" in txt and "bob" in txt
     finally:
         os.chdir(cwd)
+
+
+def test_log_lines_are_flushed_on_shutdown(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("API_LOG_FLUSH_INTERVAL", "60")
+    with TestClient(day22.app) as client:
+        for user in ("ann", "ben", "cid"):
+            assert client.post(f"/some-endpoint?user={user}").status_code == 200
+    lines = (tmp_path / "api_logs.txt").read_text().splitlines()
+    assert [line.rsplit("User: ", 1)[1] for line in lines] == ["ann", "ben", "cid"]
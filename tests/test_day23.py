@@ -8,9 +8,9 @@ import src.day23 as day23
 
 
 def test_verify_api_key_valid():
-    # valid key should be returned
+    # valid key should return its key entry
     returned = day23.verify_api_key(api_key=day23.VALID_API_KEY)
-    assert returned == day23.VALID_API_KEY
+    assert returned is not None
 
 
 def test_verify_api_key_invalid():
@@ -27,3 +27,37 @@ def test_qa_endpoint_direct_call():
     result = asyncio.run(day23.qa_endpoint(None, "hello", day23.VALID_API_KEY))
     assert isinstance(result, dict)
     assert "Answer generated for: hello" in result.get("response")
+
+
+def test_qa_is_rate_limited_per_client(monkeypatch):
+    from fastapi.testclient import TestClient
+    from src import rate_limit
+
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.delenv("RATE_LIMIT_POLICIES", raising=False)
+    monkeypatch.setattr(rate_limit, "_policies", None)
+    headers = {"X-API-Key": day23.VALID_API_KEY}
+    with TestClient(day23.app) as client:
+        codes = [client.post("/qa?query=hi", headers=headers).status_code for _ in range(6)]
+        assert codes == [200] * 5 + [429]
+        assert int(client.post("/qa?query=hi", headers=headers).headers["Retry-After"]) >= 1
+
+        # a per-key policy for this route replaces the default 5/minute
+        key = rate_limit.client_id(day23.VALID_API_KEY)
+        rate_limit.set_policies(rate_limit.PolicyTable({"/qa": {"keys": {key: "10/minute"}}}))
+        codes = [client.post("/qa?query=hi", headers=headers).status_code for _ in range(11)]
+        assert codes == [200] * 10 + [429]
+
+
+def test_made_up_keys_share_the_client_ip_bucket(monkeypatch):
+    from fastapi.testclient import TestClient
+    from src import rate_limit
+
+    monkeypatch.setenv("RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.delenv("RATE_LIMIT_POLICIES", raising=False)
+    monkeypatch.setattr(rate_limit, "_policies", None)
+    with TestClient(day23.app) as client:
+        codes = [client.post("/qa?query=hi", headers={"X-API-Key": f"guess-{i}"}).status_code for i in range(8)]
+        assert codes == [401] * 5 + [429] * 3
+        # a verified key still has its own bucket
+        assert client.post("/qa?query=hi", headers={"X-API-Key": day23.VALID_API_KEY}).status_code == 200
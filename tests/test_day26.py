@@ -45,6 +45,85 @@ def test_sentiment_analyze(text, expected):
     resp = client.post("/sentiment", params={"text": text})
     assert resp.status_code == 200
     assert resp.json().get("sentiment") == expected
+
+
+def test_logging_goes_through_the_queue_as_json_lines(tmp_path, monkeypatch):
+    import json
+    import logging
+
+    monkeypatch.setattr(day26, "LOG_FILE", str(tmp_path / "app.log"))
+    monkeypatch.setenv("LOG_JSON", "1")
+    day26.configure_logging(day26.logging_config())
+    try:
+        (handler,) = logging.getLogger("app").handlers
+        assert type(handler).__name__ == "ListenerQueueHandler"
+        client = TestClient(day26.app)
+        client.post("/qa?query=hi", headers={"X-API-Key": day26.VALID_API_KEY})
+        handler.flush()
+        lines = [json.loads(line) for line in (tmp_path / "app.log").read_text().splitlines()]
+        app_lines = [line for line in lines if line["logger"] == "app"]
+        assert {"level": "INFO", "message": "QA query received: hi"}.items() <= app_lines[-1].items()
+    finally:
+        day26.configure_logging()
+
+
+def test_logging_can_stay_synchronous():
+    config = day26.logging_config(json_lines=False, use_queue=False)
+    assert "queue" not in config["handlers"]
+    assert config["loggers"]["app"]["handlers"] == ["console", "file"]
+    assert config["handlers"]["file"]["formatter"] == "default"
+
+
+def test_validation_errors_are_sampled_and_bodies_capped(tmp_path, monkeypatch):
+    import logging
+    from starlette.requests import Request
+
+    monkeypatch.setattr(day26, "LOG_FILE", str(tmp_path / "app.log"))
+    monkeypatch.setenv("LOG_QUEUE", "0")
+    monkeypatch.setenv("LOG_DEDUP_BURST", "3")
+    monkeypatch.setenv("LOG_BODY_LIMIT", "100")
+    day26.configure_logging(day26.logging_config())
+    reads = []
+    body = Request.body
+
+    async def counting_body(self):
+        reads.append(1)
+        return await body(self)
+
+    try:
+        client = TestClient(day26.app)
+        monkeypatch.setattr(Request, "body", counting_body)
+        for i in range(50):
+            resp = client.post("/sentiment", content=b"x" * 5000 + str(i).encode())
+            assert resp.status_code == 422
+        for i in range(20):
+            client.post("/qa?query=x", headers={"X-API-Key": f"guess-{i}"})
+        errors = [line for line in (tmp_path / "app.log").read_text().splitlines() if " - ERROR - " in line]
+        validation = [line for line in errors if "Validation error" in line]
+        assert len(validation) == 3 and len(reads) == 3
+        assert all("... (500" in line and len(line) < 600 for line in validation)
+        assert sum("Unauthorized" in line for line in errors) == 3
+
+        for log_filter in logging.getLogger("app").filters:
+            log_filter.flush()
+        summaries = [line for line in (tmp_path / "app.log").read_text().splitlines() if "more like this" in line]
+        assert len(summaries) == 3  # validation, unauthorized and the 401 responses
+    finally:
+        day26.configure_logging()
+
+
+def test_error_bodies_are_not_read_when_error_logging_is_off(monkeypatch):
+    from starlette.requests import Request
+
+    async def fail(self):
+        raise AssertionError("body read")
+
+    monkeypatch.setattr(day26.logger, "disabled", True)
+    monkeypatch.setattr(Request, "body", fail)
+    client = TestClient(day26.app)
+    assert client.post("/sentiment", content=b"{}").status_code == 422
+
+
 from fastapi.testclient import TestClient
 from main import app
 
@@ -65,7 +144,7 @@ def test_qa_success():
 def test_qa_missing_api_key():
     response = client.post("/qa", json={"query": "test"})
     assert response.status_code == 401
-    assert response.json() == {"message": "Invalid or missing API Key"}
+    assert response.json() == {"detail": "Invalid or missing API Key"}
 
 def test_qa_validation_error():
     response = client.post(
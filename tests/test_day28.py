@@ -20,14 +20,11 @@ def make_fake_llm(response_text: str):
 def test_predict_with_llm(monkeypatch):
     import src.day28 as day28
 
-    # Ensure the service key matches the module default
-    api_key = getattr(day28, "SERVICE_API_KEY")
-
     # Monkeypatch make_chat_llm to return a callable LLM
     monkeypatch.setattr(day28, "make_chat_llm", lambda: make_fake_llm("llm-reply"))
 
     req = day28.PredictRequest(prompt="Hello")
-    resp = day28.predict(req, x_api_key=api_key)
+    resp = day28.predict(req, key=day28.require_api_key(api_key=day28.SERVICE_API_KEY))
 
     assert resp.model == "ChatOpenAI"
     assert "llm-reply" in resp.output
@@ -36,8 +33,6 @@ def test_predict_with_llm(monkeypatch):
 def test_predict_hf_fallback(monkeypatch):
     import src.day28 as day28
 
-    api_key = getattr(day28, "SERVICE_API_KEY")
-
     # Force LLM not available
     monkeypatch.setattr(day28, "make_chat_llm", lambda: None)
     # Ensure module thinks HF is available
@@ -59,7 +54,7 @@ def test_predict_hf_fallback(monkeypatch):
     monkeypatch.setattr(day28, "requests", types.SimpleNamespace(post=fake_post))
 
     req = day28.PredictRequest(prompt="Hello HF")
-    resp = day28.predict(req, x_api_key=api_key)
+    resp = day28.predict(req, key=day28.require_api_key(api_key=day28.SERVICE_API_KEY))
 
     assert resp.model == "hf-inference"
     assert "hf-reply" in resp.output
@@ -69,6 +64,5 @@ def test_predict_unauthorized(monkeypatch):
     import src.day28 as day28
 
     # Wrong key should raise HTTPException
-    req = day28.PredictRequest(prompt="whoami")
     with pytest.raises(Exception):
-        day28.predict(req, x_api_key="wrong-key")
+        day28.require_api_key(api_key="wrong-key")
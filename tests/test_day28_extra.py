@@ -7,7 +7,7 @@ import src.day28 as day28
 
 
 def test_predict_with_llm(monkeypatch):
-    monkeypatch.setattr(day28, "require_api_key", lambda k: None)
+    monkeypatch.setitem(day28.app.dependency_overrides, day28.require_api_key, lambda: None)
     monkeypatch.setattr(day28, "make_chat_llm", lambda **kw: object())
     monkeypatch.setattr(day28, "invoke_llm_safely", lambda llm, p: "hello world")
 
@@ -19,7 +19,7 @@ def test_predict_with_llm(monkeypatch):
 
 
 def test_predict_hf_fallback_list(monkeypatch):
-    monkeypatch.setattr(day28, "require_api_key", lambda k: None)
+    monkeypatch.setitem(day28.app.dependency_overrides, day28.require_api_key, lambda: None)
     monkeypatch.setattr(day28, "make_chat_llm", lambda **kw: None)
 
     class FakeResp:
@@ -41,7 +41,7 @@ def test_predict_hf_fallback_list(monkeypatch):
 
 def test_predict_hf_fallback_dict_and_failure(monkeypatch):
     # HF returns a dict-shaped response
-    monkeypatch.setattr(day28, "require_api_key", lambda k: None)
+    monkeypatch.setitem(day28.app.dependency_overrides, day28.require_api_key, lambda: None)
     monkeypatch.setattr(day28, "make_chat_llm", lambda **kw: None)
 
     class FakeResp2:
@@ -25,5 +25,24 @@ class TestDay5API(unittest.TestCase):
         self.assertEqual(response.status_code, 404)
         self.assertEqual(response.json()["detail"], "User not found")
 
+    def test_get_user_ignores_case(self):
+        response = self.client.get("/user/testuser")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "TestUser")
+
+    def test_bulk_create_and_list_users(self):
+        users = [{"name": f"Bulk{i}", "age": i} for i in range(5)]
+        response = self.client.post("/users", json=users)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {"created": 5})
+        self.assertEqual(self.client.get("/user/bulk3").json()["age"], 3)
+
+        total = self.client.get("/users", params={"limit": 1}).json()["total"]
+        page = self.client.get("/users", params={"offset": total - 5, "limit": 3}).json()
+        self.assertEqual([u["name"] for u in page["users"]], ["Bulk0", "Bulk1", "Bulk2"])
+        self.assertEqual(page["next_offset"], total - 2)
+        last = self.client.get("/users", params={"offset": total - 2, "limit": 3}).json()
+        self.assertIsNone(last["next_offset"])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,210 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import importlib.util
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+_loaded = {}
+
+
+@pytest.fixture
+def real_sqlmodel(monkeypatch):
+    """Load src/db.py, day6 and day7 against the real sqlmodel, not the conftest shim."""
+    if not _loaded:
+        saved = {name: sys.modules.pop(name) for name in ("sqlmodel", "src.db") if name in sys.modules}
+        try:
+            sqlmodel = importlib.import_module("sqlmodel")
+            if not hasattr(sqlmodel, "SQLModel") or not hasattr(sqlmodel.SQLModel, "metadata"):
+                pytest.skip("sqlmodel not installed")
+            _loaded["sqlmodel"] = sqlmodel
+            _loaded["src.db"] = importlib.import_module("src.db")
+            for name in ("day6", "day7"):
+                spec = importlib.util.spec_from_file_location(f"real_{name}", ROOT / "src" / f"{name}.py")
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                _loaded[name] = module
+        finally:
+            sys.modules.update(saved)
+    monkeypatch.setitem(sys.modules, "sqlmodel", _loaded["sqlmodel"])
+    return _loaded
+
+
+@pytest.fixture
+def apps(real_sqlmodel, tmp_path, monkeypatch):
+    engine = real_sqlmodel["src.db"].make_engine(str(tmp_path / "test.db"))
+    for name in ("day6", "day7"):
+        monkeypatch.setattr(real_sqlmodel[name], "engine", engine)
+        real_sqlmodel[name].create_db_and_tables()
+    return real_sqlmodel["day6"], real_sqlmodel["day7"]
+
+
+def test_make_engine_applies_the_sqlite_profile(real_sqlmodel, tmp_path, monkeypatch):
+    db = real_sqlmodel["src.db"]
+    monkeypatch.setenv("SQLITE_SYNCHRONOUS", "FULL")
+    engine = db.make_engine(str(tmp_path / "test.db"), cache_size=-1000, mmap_size=None)
+    with engine.connect() as connection:
+        pragma = lambda name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 2  # FULL, from the environment
+        assert pragma("cache_size") == -1000
+        assert pragma("mmap_size") == 0  # left at SQLite's default
+        assert pragma("busy_timeout") == 5000
+    assert engine.echo is False
+    assert engine.pool.size() == 16
+
+
+def test_keyset_pages_follow_the_link_header(apps):
+    day6, _ = apps
+    client = TestClient(day6.app)
+    for i in range(7):
+        client.post("/task", json={"description": f"t{i}"})
+
+    seen, url = [], "/tasks?limit=3"
+    while url:
+        resp = client.get(url)
+        assert resp.status_code == 200
+        seen.append([task["description"] for task in resp.json()])
+        link = resp.headers.get("link")
+        url = link[1:link.index(">")] if link else None
+    assert seen == [["t0", "t1", "t2"], ["t3", "t4", "t5"], ["t6"]]
+
+    # the legacy listing still returns everything
+    assert len(client.get("/tasks").json()) == 7
+    assert client.get("/tasks?limit=0").status_code == 422
+
+
+def test_ndjson_export_streams_every_row_in_batches(apps, monkeypatch):
+    _, day7 = apps
+    client = TestClient(day7.app)
+    for i in range(25):
+        client.post("/books", json={"title": f"Book {i}", "author": "A"})
+    client.delete("/books/5")
+
+    batches = []
+    stream_ndjson = day7.stream_ndjson
+
+    def small_batches(engine, model):
+        for chunk in stream_ndjson(engine, model, batch_size=10):
+            batches.append(chunk)
+            yield chunk
+
+    monkeypatch.setattr(day7, "stream_ndjson", small_batches)
+    resp = client.get("/books?format=ndjson")
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [row["id"] for row in rows] == [i for i in range(1, 26) if i != 5]
+    assert rows[0] == {"id": 1, "title": "Book 0", "author": "A"}
+    assert len(batches) == 3
+
+    page = client.get("/books?after=20&limit=10")
+    assert [book["id"] for book in page.json()] == [21, 22, 23, 24, 25]
+    assert "link" not in page.headers
+
+
+def test_bulk_insert_returns_ids_in_order_for_arrays_and_ndjson(apps):
+    day6, day7 = apps
+    client = TestClient(day7.app)
+    client.post("/books", json={"title": "First", "author": "A"})
+
+    resp = client.post("/books/bulk", json=[{"title": f"Book {i}", "author": "B"} for i in range(5)])
+    assert resp.status_code == 201
+    assert resp.json() == {"created": 5, "ids": [2, 3, 4, 5, 6]}
+
+    lines = "\n".join(json.dumps({"title": f"Line {i}", "author": "C"}) for i in range(3)) + "\n"
+    resp = client.post("/books/bulk", content=lines, headers={"content-type": "application/x-ndjson"})
+    assert resp.json() == {"created": 3, "ids": [7, 8, 9]}
+    assert client.get("/books/8").json() == {"id": 8, "title": "Line 1", "author": "C"}
+
+    tasks = TestClient(day6.app)
+    assert tasks.post("/tasks/bulk", json=[]).json() == {"created": 0, "ids": []}
+    assert tasks.post("/tasks/bulk", json=[{"description": "x"}] * 3).json()["ids"] == [1, 2, 3]
+
+
+def test_bulk_insert_rejects_the_whole_load_on_a_bad_row(apps):
+    _, day7 = apps
+    client = TestClient(day7.app)
+
+    resp = client.post("/books/bulk", json=[{"title": "ok", "author": "A"}, {"title": "no author"}])
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["loc"] == ["body", 1, "author"]
+
+    lines = '{"title": "ok", "author": "A"}\n\n{"title": 1}\n'
+    resp = client.post("/books/bulk", content=lines, headers={"content-type": "application/x-ndjson"})
+    assert resp.status_code == 422
+    assert {tuple(error["loc"]) for error in resp.json()["detail"]} == {("body", 2, "title"), ("body", 2, "author")}
+
+    assert client.get("/books").json() == []
+
+
+def test_search_ranks_matches_and_follows_inserts_updates_and_deletes(apps):
+    _, day7 = apps
+    client = TestClient(day7.app)
+    client.post("/books/bulk", json=[
+        {"title": "The Hobbit", "author": "J. R. R. Tolkien"},
+        {"title": "Tolkien: A Biography", "author": "Humphrey Carpenter"},
+        {"title": "Dune", "author": "Frank Herbert"},
+        {"title": "Children of Dune", "author": "Frank Herbert"},
+    ])
+
+    assert [b["id"] for b in client.get("/books/search?q=herbert").json()] == [3, 4]
+    assert [b["id"] for b in client.get("/books/search?q=dune children").json()] == [4]
+    assert {b["id"] for b in client.get("/books/search?q=tolk*").json()} == {1, 2}
+    assert client.get("/books/search?q=tolk").json() == []
+    # FTS5 syntax in the input is searched as plain words, not parsed
+    assert client.get('/books/search?q="dune" OR NEAR(').json() == []
+    assert client.get("/books/search?q=%22%22").json() == []
+    # a prefix this short would rank most of the catalog
+    resp = client.get("/books/search?q=to*")
+    assert resp.status_code == 422 and "at least 3" in resp.json()["detail"]
+
+    client.patch("/books/3", json={"title": "Dune Messiah"})
+    assert client.get("/books/search?q=messiah").json() == [{"id": 3, "title": "Dune Messiah", "author": "Frank Herbert"}]
+    client.delete("/books/4")
+    assert [b["id"] for b in client.get("/books/search?q=dune").json()] == [3]
+    assert client.get("/books/3").status_code == 200
+
+
+def test_search_pages_with_a_link_header(apps):
+    _, day7 = apps
+    client = TestClient(day7.app)
+    client.post("/books/bulk", json=[{"title": f"Volume {i}", "author": "Series"} for i in range(5)])
+
+    seen, url = [], "/books/search?q=series&limit=2"
+    while url:
+        resp = client.get(url)
+        seen.extend(book["id"] for book in resp.json())
+        link = resp.headers.get("link")
+        url = link[link.index("/books"):link.index(">")] if link else None
+    assert sorted(seen) == [1, 2, 3, 4, 5]
+    assert client.get("/books/search?q=").status_code == 422
+
+
+def test_search_ranks_at_most_max_candidates(apps):
+    _, day7 = apps
+    client = TestClient(day7.app)
+    client.post("/books/bulk", json=[
+        {"title": "common", "author": "A"}, {"title": "common common common", "author": "B"}])
+    with day7.Session(day7.engine) as session:
+        ranked = day7.fts5_search(session, day7.Book, "common", 10, max_candidates=None)
+        assert [b.id for b in ranked] == [2, 1]
+        # only the first match (by rowid) is a candidate
+        assert [b.id for b in day7.fts5_search(session, day7.Book, "common", 10, max_candidates=1)] == [1]
+
+
+def test_create_fts5_indexes_existing_rows_once(real_sqlmodel, tmp_path):
+    sqlmodel, db, day7 = real_sqlmodel["sqlmodel"], real_sqlmodel["src.db"], real_sqlmodel["day7"]
+    engine = db.make_engine(str(tmp_path / "books.db"))
+    sqlmodel.SQLModel.metadata.create_all(engine)
+    with sqlmodel.Session(engine) as session:
+        session.add(day7.Book(title="Already here", author="Someone"))
+        session.commit()
+
+    assert db.create_fts5(engine, day7.Book, ["title", "author"]) is True
+    assert db.create_fts5(engine, day7.Book, ["title", "author"]) is False
+    with sqlmodel.Session(engine) as session:
+        assert [b.title for b in db.fts5_search(session, day7.Book, "already", 10)] == ["Already here"]
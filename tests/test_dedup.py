@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import random
+import types
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.dedup import MinHashDeduplicator, deduplicate_documents
+
+FOOTER = "Confidential. Copyright 2024 ACME Corporation. All rights reserved. Do not distribute this document."
+
+
+def doc(text, page):
+    return types.SimpleNamespace(page_content=text, metadata={"source": "report.pdf", "page": page})
+
+
+def body(seed, n=60):
+    rng = random.Random(seed)
+    return " ".join(f"w{rng.randint(0, 5000)}" for _ in range(n))
+
+
+def test_near_duplicates_dropped_with_pointer_to_kept_copy():
+    docs = [doc(FOOTER, 0), doc(body(1), 0), doc(FOOTER + " Page 2", 1), doc(body(2), 1), doc(FOOTER, 2)]
+    result = MinHashDeduplicator(threshold=0.7).deduplicate(docs)
+    assert result.kept == [docs[0], docs[1], docs[3]]
+    assert result.saved == 2
+    assert result.duplicate_of == {2: docs[0], 4: docs[0]}
+    assert docs[0].metadata["duplicates"] == [{"source": "report.pdf", "page": 1}, {"source": "report.pdf", "page": 2}]
+
+
+def test_distinct_and_partially_overlapping_chunks_are_kept():
+    text = body(3, 200).split()
+    # two chunks sharing a 20% overlap, as a character splitter produces
+    a, b = " ".join(text[:100]), " ".join(text[80:180])
+    docs = [doc(a, 0), doc(b, 0)] + [doc(body(s), s) for s in range(10, 30)]
+    result = MinHashDeduplicator().deduplicate(docs)
+    assert result.saved == 0
+    assert "duplicates" not in docs[0].metadata
+
+
+def test_threshold_uses_exact_jaccard():
+    words = body(4, 100).split()
+    edited = words[:]
+    edited[50] = "changed"  # 3 of 98 shingles differ
+    dedup = MinHashDeduplicator(threshold=0.9)
+    assert dedup.add(doc(" ".join(words), 0)) is None
+    assert dedup.add(doc(" ".join(edited), 1)) == 0
+    strict = MinHashDeduplicator(threshold=1.0)
+    strict.add(doc(" ".join(words), 0))
+    assert strict.add(doc(" ".join(edited), 1)) is None
+
+
+def test_documents_without_metadata_and_short_texts():
+    docs = [types.SimpleNamespace(page_content="Page"), types.SimpleNamespace(page_content="page"), types.SimpleNamespace(page_content="")]
+    result = MinHashDeduplicator().deduplicate(docs)
+    assert result.kept == [docs[0], docs[2]]
+
+
+def test_env_settings(monkeypatch):
+    docs = [doc(FOOTER, 0), doc(FOOTER, 1)]
+    monkeypatch.setenv("RAG_DEDUP", "0")
+    assert deduplicate_documents(docs).saved == 0
+    monkeypatch.delenv("RAG_DEDUP")
+    assert deduplicate_documents(docs).saved == 1
+    with pytest.raises(ValueError):
+        MinHashDeduplicator(num_perm=64, bands=10)
+
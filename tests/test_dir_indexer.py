@@ -0,0 +1,214 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import json
+import os
+import types
+
+import pytest
+
+from src.dir_indexer import DirectoryIndexer
+
+
+class FakeStore:
+    """In-memory stand-in for LangChain FAISS that persists to JSON."""
+
+    embedded = []
+
+    def __init__(self, docs=None):
+        self.docs = dict(docs or {})
+
+    @classmethod
+    def from_documents(cls, docs, embeddings, ids=None):
+        store = cls()
+        store.add_documents(docs, ids=ids)
+        return store
+
+    def add_documents(self, docs, ids=None):
+        FakeStore.embedded.extend(d.page_content for d in docs)
+        self.docs.update(zip(ids, docs))
+
+    def delete(self, ids):
+        for doc_id in ids:
+            del self.docs[doc_id]
+
+    def save_local(self, folder_path):
+        data = {k: [d.page_content, d.metadata] for k, d in self.docs.items()}
+        Path(folder_path, "store.json").write_text(json.dumps(data))
+
+    @classmethod
+    def load_local(cls, folder_path, embeddings, allow_dangerous_deserialization=False):
+        data = json.loads(Path(folder_path, "store.json").read_text())
+        return cls({k: types.SimpleNamespace(page_content=t, metadata=m) for k, (t, m) in data.items()})
+
+
+def load(path):
+    return [types.SimpleNamespace(page_content=Path(path).read_text(), metadata={})]
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(FakeStore, "embedded", [])
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(3):
+        (docs / f"file{i}.txt").write_text(f"content {i}")
+    return docs, tmp_path / "index"
+
+
+def make_indexer(docs, index):
+    return DirectoryIndexer(str(docs), "*.txt", str(index), None, FakeStore, load)
+
+
+def test_first_sync_embeds_everything_then_nothing(corpus):
+    docs, index = corpus
+    report = make_indexer(docs, index).sync()
+    assert report["added"] == ["file0.txt", "file1.txt", "file2.txt"]
+    assert report["embedded"] == 3
+
+    # a fresh process reloads the manifest and store and embeds nothing
+    FakeStore.embedded.clear()
+    indexer = make_indexer(docs, index)
+    report = indexer.sync()
+    assert report["unchanged"] == 3 and report["embedded"] == 0
+    assert FakeStore.embedded == []
+    assert sorted(d.metadata["source"] for d in indexer.vector_store.docs.values()) == [
+        "file0.txt", "file1.txt", "file2.txt",
+    ]
+
+
+def test_only_added_and_changed_files_are_embedded(corpus):
+    docs, index = corpus
+    indexer = make_indexer(docs, index)
+    indexer.sync()
+    FakeStore.embedded.clear()
+
+    (docs / "file1.txt").write_text("edited content")
+    (docs / "file3.txt").write_text("new file")
+    (docs / "file2.txt").unlink()
+    report = indexer.sync()
+
+    assert report["added"] == ["file3.txt"]
+    assert report["changed"] == ["file1.txt"]
+    assert report["removed"] == ["file2.txt"]
+    assert sorted(FakeStore.embedded) == ["edited content", "new file"]
+    contents = sorted(d.page_content for d in indexer.vector_store.docs.values())
+    assert contents == ["content 0", "edited content", "new file"]
+
+
+def test_touched_but_identical_file_is_not_reembedded(corpus):
+    docs, index = corpus
+    indexer = make_indexer(docs, index)
+    indexer.sync()
+    FakeStore.embedded.clear()
+
+    path = docs / "file0.txt"
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+    report = indexer.sync()
+    assert report["embedded"] == 0 and report["unchanged"] == 3
+    saved = json.loads((index / "manifest.json").read_text())
+    assert saved["files"]["file0.txt"]["mtime_ns"] == st.st_mtime_ns + 5_000_000_000
+
+
+def test_watch_applies_changes_until_stopped(corpus):
+    docs, index = corpus
+    indexer = make_indexer(docs, index)
+    reports = []
+
+    class StopAfterTwo:
+        def __init__(self):
+            self.waits = 0
+
+        def is_set(self):
+            return self.waits >= 2
+
+        def wait(self, interval):
+            self.waits += 1
+            (docs / "late.txt").write_text("late arrival")
+
+    indexer.watch(interval=0, stop=StopAfterTwo(), on_change=reports.append)
+    assert [r["added"] for r in reports] == [["file0.txt", "file1.txt", "file2.txt"], ["late.txt"]]
+
+
+def test_changed_embeddings_config_reindexes_everything(corpus, caplog):
+    docs, index = corpus
+
+    def indexer_with(embeddings):
+        return DirectoryIndexer(str(docs), "*.txt", str(index), embeddings, FakeStore, load)
+
+    indexer_with(types.SimpleNamespace(dim=384)).sync()
+    assert json.loads((index / "manifest.json").read_text())["config"]["dim"] == 384
+
+    FakeStore.embedded.clear()
+    assert indexer_with(types.SimpleNamespace(dim=384)).sync()["embedded"] == 0
+
+    indexer = indexer_with(types.SimpleNamespace(dim=128))
+    assert "reindexing everything" in caplog.text
+    report = indexer.sync()
+    assert report["added"] == ["file0.txt", "file1.txt", "file2.txt"] and report["embedded"] == 3
+    assert json.loads((index / "manifest.json").read_text())["config"]["dim"] == 128
+
+
+def test_real_faiss_reindexes_when_the_dimension_changes(corpus, real_faiss):
+    try:
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.documents import Document
+    except ImportError:
+        pytest.skip("langchain not installed")
+    from src.embeddings import HashingEmbeddings
+
+    docs, index = corpus
+
+    def load_doc(path):
+        return [Document(page_content=Path(path).read_text())]
+
+    DirectoryIndexer(str(docs), "*.txt", str(index), HashingEmbeddings(dim=384), FAISS, load_doc).sync()
+    (docs / "new.txt").write_text("new file")
+    indexer = DirectoryIndexer(str(docs), "*.txt", str(index), HashingEmbeddings(dim=128), FAISS, load_doc)
+    indexer.sync()
+    assert indexer.vector_store.index.d == 128 and indexer.vector_store.index.ntotal == 4
+
+
+def test_real_faiss_removes_vectors(corpus, real_faiss):
+    try:
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.documents import Document
+    except ImportError:
+        pytest.skip("langchain not installed")
+    from src.embeddings import HashingEmbeddings
+
+    docs, index = corpus
+
+    def load_doc(path):
+        return [Document(page_content=Path(path).read_text())]
+
+    indexer = DirectoryIndexer(str(docs), "*.txt", str(index), HashingEmbeddings(dim=32), FAISS, load_doc)
+    indexer.sync()
+    (docs / "file0.txt").unlink()
+    indexer.sync()
+
+    reloaded = DirectoryIndexer(str(docs), "*.txt", str(index), HashingEmbeddings(dim=32), FAISS, load_doc)
+    assert reloaded.vector_store.index.ntotal == 2
+    assert sorted(d.metadata["source"] for d in reloaded.documents()) == ["file1.txt", "file2.txt"]
+
+
+def test_file_vanishing_during_a_sync_counts_as_removed(corpus, monkeypatch):
+    docs, index = corpus
+    indexer = make_indexer(docs, index)
+    indexer.sync()
+    (docs / "file3.txt").write_text("new")
+
+    current_files = indexer.current_files
+
+    def glob_then_delete():
+        paths = current_files()
+        (docs / "file1.txt").unlink()  # gone between the glob and the stat
+        (docs / "file3.txt").unlink()
+        return paths
+
+    monkeypatch.setattr(indexer, "current_files", glob_then_delete)
+    report = indexer.sync()
+    assert report["removed"] == ["file1.txt"] and report["added"] == []
+    assert sorted(d.metadata["source"] for d in indexer.vector_store.docs.values()) == ["file0.txt", "file2.txt"]
@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+import numpy as np
+import pytest
+
+from src import embeddings as emb
+
+
+def test_hashing_embeddings_shape_dtype_and_norm():
+    model = emb.HashingEmbeddings(dim=64, batch_size=2)
+    vectors = model.embed_array(["hello world", "", "another text", "more"])
+    assert vectors.shape == (4, 64)
+    assert vectors.dtype == np.float32
+    norms = np.linalg.norm(vectors, axis=1)
+    assert np.allclose(norms[[0, 2, 3]], 1.0)
+    assert norms[1] == 0.0
+    assert model.embed_array([]).shape == (0, 64)
+
+
+def test_hashing_embeddings_deterministic_and_batch_independent():
+    texts = [f"document number {i} about retrieval" for i in range(10)]
+    a = emb.HashingEmbeddings(dim=128, batch_size=3).embed_array(texts)
+    b = emb.HashingEmbeddings(dim=128, batch_size=100).embed_array(texts)
+    assert np.array_equal(a, b)
+    single = emb.HashingEmbeddings(dim=128).embed_query(texts[4])
+    assert np.allclose(single, a[4])
+
+
+def test_hashing_embeddings_similar_texts_are_closer():
+    model = emb.HashingEmbeddings(dim=256)
+    query, near, far = model.embed_array([
+        "How do I reset my password?",
+        "Resetting your password: open settings",
+        "Quarterly revenue grew by ten percent",
+    ])
+    assert query @ near > query @ far
+
+
+def test_make_embeddings_backends(monkeypatch):
+    monkeypatch.delenv("EMBEDDINGS_BACKEND", raising=False)
+    assert emb.make_embeddings(openai_factory=lambda: "openai") == "openai"
+    with pytest.raises(ValueError):
+        emb.make_embeddings()
+
+    monkeypatch.setenv("EMBEDDINGS_BACKEND", "hashing")
+    monkeypatch.setenv("EMBEDDINGS_DIM", "32")
+    model = emb.make_embeddings(openai_factory=lambda: pytest.fail("must not build openai"))
+    assert isinstance(model, emb.HashingEmbeddings) and model.dim == 32
+
+    with pytest.raises(ValueError):
+        emb.get_embeddings_backend("word2vec")
+
+
+def test_sentence_transformer_backend_loads_model_lazily(monkeypatch):
+    loaded = []
+
+    class FakeModel:
+        def __init__(self, name, device=None):
+            loaded.append((name, device))
+
+        def encode(self, texts, **kwargs):
+            return [[1.0, 0.0]] * len(texts)
+
+    fake = types.ModuleType("sentence_transformers")
+    fake.SentenceTransformer = FakeModel
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake)
+
+    monkeypatch.setenv("EMBEDDINGS_BACKEND", "sentence-transformers")
+    model = emb.make_embeddings()
+    assert loaded == []
+    assert model.embed_documents(["a", "b"]) == [[1.0, 0.0], [1.0, 0.0]]
+    assert model.embed_query("c") == [1.0, 0.0]
+    assert loaded == [("all-MiniLM-L6-v2", "cpu")]
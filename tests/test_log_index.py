@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+from src.log_index import LogIndex, main
+
+
+def line(stamp, endpoint, user):
+    return f"[{stamp}] Endpoint: {endpoint} | User: {user}\n"
+
+
+LINES = [
+    line("2025-10-24 10:01:58", "/some-endpoint", "JohnDoe"),
+    line("2025-10-24 10:02:27", "/some-endpoint", "pappu"),
+    line("2025-10-24 10:59:59", "/other", "JohnDoe"),
+    "not a log line\n",
+    line("2025-10-24 11:00:00", "/some-endpoint", "JohnDoe"),
+]
+
+
+def test_ingest_and_aggregate(tmp_path):
+    log = tmp_path / "api_logs.txt"
+    log.write_text("".join(LINES))
+    index = LogIndex(str(tmp_path / "idx"))
+    assert index.ingest(str(log)) == {"rows": 4, "skipped": 1}
+
+    assert index.aggregate(["user", "hour"]) == [
+        ("JohnDoe", "2025-10-24 10:00:00", 2),
+        ("JohnDoe", "2025-10-24 11:00:00", 1),
+        ("pappu", "2025-10-24 10:00:00", 1),
+    ]
+    assert index.aggregate(["endpoint"], start="2025-10-24 10:02:00", end="2025-10-24 11:00:00") == [
+        ("/other", 1), ("/some-endpoint", 1),
+    ]
+    assert index.count(user="JohnDoe") == 3
+    assert index.count(user="nobody") == 0
+    assert index.count(start="2025-10-25") == 0
+    assert index.aggregate([]) == [(4,)]
+    with pytest.raises(ValueError):
+        index.aggregate(["week"])
+
+
+def test_incremental_ingest_only_reads_complete_new_lines(tmp_path):
+    log = tmp_path / "api_logs.txt"
+    log.write_text(LINES[0] + LINES[1][:10])  # the second line is still being written
+    index = LogIndex(str(tmp_path / "idx"))
+    assert index.ingest(str(log))["rows"] == 1
+    with open(log, "a") as f:
+        f.write(LINES[1][10:] + LINES[2])
+    assert index.ingest(str(log))["rows"] == 2
+    assert index.ingest(str(log))["rows"] == 0
+
+    reopened = LogIndex(str(tmp_path / "idx"))
+    assert len(reopened) == 3
+    assert reopened.count(endpoint="/other") == 1
+
+
+def test_rotation_reads_the_rest_of_the_old_file(tmp_path):
+    log = tmp_path / "api_logs.txt"
+    log.write_text(LINES[0])
+    index = LogIndex(str(tmp_path / "idx"))
+    index.ingest(str(log))
+    with open(log, "a") as f:
+        f.write(LINES[1])
+    os.replace(log, tmp_path / "api_logs.txt.1")
+    log.write_text(LINES[2])
+    assert index.ingest(str(log))["rows"] == 2
+    assert index.count() == 3
+
+
+def test_unsorted_rows_and_interrupted_ingest(tmp_path):
+    log = tmp_path / "api_logs.txt"
+    log.write_text(LINES[4] + LINES[0])
+    index = LogIndex(str(tmp_path / "idx"))
+    index.ingest(str(log))
+    assert index.meta["sorted"] is False
+    assert index.count(end="2025-10-24 11:00:00") == 1
+
+    # rows appended to the columns without a saved meta are dropped on open
+    with open(tmp_path / "idx" / "ts.i8", "ab") as f:
+        f.write(b"\0" * 8)
+    assert len(LogIndex(str(tmp_path / "idx"))) == 2
+    assert (tmp_path / "idx" / "ts.i8").stat().st_size == 16
+
+
+def test_cli(tmp_path, capsys):
+    log = tmp_path / "api_logs.txt"
+    log.write_text("".join(LINES))
+    main(["--log", str(log), "--index", str(tmp_path / "idx"), "--by", "user"])
+    out = capsys.readouterr().out
+    assert "Ingested 4 new lines (1 unparseable)" in out
+    assert "JohnDoe\t3" in out and "pappu\t1" in out
+    meta = json.loads((tmp_path / "idx" / "meta.json").read_text())
+    assert meta["users"] == ["JohnDoe", "pappu"]
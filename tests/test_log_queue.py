@@ -0,0 +1,164 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import json
+import logging
+import threading
+from logging.config import dictConfig
+
+import pytest
+
+from src.log_queue import DedupFilter, JsonFormatter, ListenerQueueHandler, queue_handler
+
+
+class SlowHandler(logging.Handler):
+    def __init__(self, gate=None):
+        super().__init__()
+        self.gate = gate
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait()
+        self.threads.add(threading.get_ident())
+        self.records.append(self.format(record))
+
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / "app.log"
+    dictConfig({
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {"json": {"()": "src.log_queue.JsonFormatter"}},
+        "handlers": {
+            "file": {"class": "logging.FileHandler", "filename": str(path), "formatter": "json"},
+            "queue": {"()": "src.log_queue.queue_handler", "handlers": ["file"]},
+        },
+        "loggers": {"qtest": {"handlers": ["queue"], "level": "INFO", "propagate": False}},
+    })
+    handler = logging.getLogger("qtest").handlers[0]
+    yield path, handler
+    handler.close()
+    logging.getLogger("qtest").handlers.clear()
+
+
+def test_dict_config_routes_records_through_the_listener(config):
+    path, handler = config
+    assert isinstance(handler, ListenerQueueHandler)
+    logger = logging.getLogger("qtest")
+    logger.info("query %s received", "x", extra={"user": "alice"})
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("failed")
+    handler.flush()
+    first, second = [json.loads(line) for line in path.read_text().splitlines()]
+    assert first["message"] == "query x received"
+    assert first["level"] == "INFO" and first["logger"] == "qtest" and first["user"] == "alice"
+    assert second["message"].startswith("failed") and "RuntimeError: boom" in second["message"]
+
+
+def test_logging_call_does_not_wait_for_the_handler():
+    gate = threading.Event()
+    target = SlowHandler(gate)
+    handler = ListenerQueueHandler(__import__("queue").Queue(), [target])
+    logger = logging.getLogger("qtest.slow")
+    logger.addHandler(handler)
+    try:
+        for i in range(100):
+            logger.warning("line %d", i)  # returns while the handler is blocked
+        assert target.records == []
+        gate.set()
+        handler.flush()
+        assert target.records == [f"line {i}" for i in range(100)]
+        assert target.threads == {handler.listener._thread.ident}
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def test_bounded_queue_drops_instead_of_blocking():
+    gate = threading.Event()
+    target = SlowHandler(gate)
+    logging._handlers["slow-target"] = target
+    try:
+        handler = queue_handler(["slow-target"], maxsize=10)
+    finally:
+        del logging._handlers["slow-target"]
+    record = logging.makeLogRecord({"msg": "x", "levelno": logging.INFO})
+    for _ in range(50):
+        handler.handle(record)
+    assert 1 <= handler.dropped <= 40
+    gate.set()
+    handler.close()  # drains what was queued
+    assert len(target.records) == 50 - handler.dropped
+
+
+def test_unknown_target_handler_is_an_error():
+    with pytest.raises(ValueError):
+        queue_handler(["no-such-handler"])
+
+
+def test_json_formatter_keeps_exceptions_and_custom_dates():
+    try:
+        raise KeyError("k")
+    except KeyError:
+        record = logging.getLogger("x").makeRecord("x", logging.ERROR, __file__, 1, "oops", (), sys.exc_info())
+    entry = json.loads(JsonFormatter(datefmt="%Y").format(record))
+    assert entry["message"] == "oops" and "KeyError" in entry["exc_info"]
+    assert len(entry["time"]) == 4
+
+
+@pytest.fixture
+def sampled():
+    clock = [0.0]
+    target = SlowHandler()
+    target.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    dedup = DedupFilter(interval=10.0, burst=2, clock=lambda: clock[0])
+    logger = logging.getLogger("qtest.dedup")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(target)
+    logger.addFilter(dedup)
+    yield logger, dedup, target.records, clock
+    logger.removeHandler(target)
+    logger.removeFilter(dedup)
+
+
+def test_dedup_collapses_repeats_into_a_summary(sampled):
+    logger, dedup, records, clock = sampled
+    for _ in range(50):
+        logger.error("bad key %s", "abc")
+    logger.info("info is never sampled")
+    logger.info("info is never sampled")
+    assert records == ["ERROR bad key abc"] * 2 + ["INFO info is never sampled"] * 2
+    assert dedup.suppressed == 48
+
+    clock[0] = 12.0  # next interval: the summary, then the new record
+    logger.error("bad key %s", "abc")
+    assert records[4:] == ["ERROR bad key abc [48 more like this in 10s]", "ERROR bad key abc"]
+
+
+def test_dedup_groups_by_key_and_reports_quiet_groups(sampled):
+    logger, dedup, records, clock = sampled
+    for i in range(5):
+        logger.warning("validation failed for body %d", i, extra={"dedup_key": "validation"})
+        logger.warning("other")
+    assert len(records) == 4
+    assert dedup.allows("unseen") and not dedup.allows("validation")
+
+    clock[0] = 11.0  # neither group logs again; any record triggers the sweep
+    logger.error("something else")
+    assert records[4:6] == [
+        "WARNING validation failed for body 0 [3 more like this in 10s]",
+        "WARNING other [3 more like this in 10s]",
+    ]
+    assert dedup.allows("validation")
+
+    for _ in range(3):
+        logger.error("something else")
+    dedup.flush()
+    assert records[-1] == "ERROR something else [2 more like this in 10s]"
@@ -0,0 +1,201 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import asyncio
+import multiprocessing
+
+import pytest
+
+from src import rate_limit
+from src.rate_limit import ALGORITHMS, MemoryBackend, PolicyTable, SharedMemoryBackend, parse_policy, token_bucket
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_bursts_then_refills_at_the_average_rate():
+    state, allowed = None, 0
+    for _ in range(7):
+        retry_after, state = token_bucket(state, 0.0, 5, 60.0)
+        allowed += retry_after == 0
+    assert allowed == 5
+    retry_after, state = token_bucket(state, 0.0, 5, 60.0)
+    assert retry_after == pytest.approx(12.0)  # one token every 12 s
+    assert token_bucket(state, 12.0, 5, 60.0)[0] == 0
+    assert token_bucket(state, 11.0, 5, 60.0)[0] == pytest.approx(1.0)
+
+
+def simulate(algorithm, times, limit=10, period=60.0):
+    state, allowed = None, []
+    for now in times:
+        retry_after, state = ALGORITHMS[algorithm].step(state, now, limit, period)
+        if retry_after == 0:
+            allowed.append(now)
+        else:
+            assert retry_after > 0
+    return allowed
+
+
+@pytest.mark.parametrize("algorithm", ["gcra", "token_bucket", "sliding_window"])
+def test_no_double_burst_at_window_edges(algorithm):
+    # 10/minute, a client hammering every 100 ms around the minute boundary
+    times = [50 + i * 0.1 for i in range(200)]
+
+    def busiest_11s(allowed):
+        return max(sum(1 for t in allowed if s <= t < s + 11) for s in times)
+
+    assert busiest_11s(simulate(algorithm, times)) <= 11
+    # fixed windows let 10 through just before 60 and 10 more just after
+    assert busiest_11s(simulate("fixed_window", times)) == 20
+
+
+def test_gcra_spaces_requests_after_the_burst():
+    state = None
+    for _ in range(10):
+        retry_after, state = ALGORITHMS["gcra"].step(state, 0.0, 10, 60.0)
+        assert retry_after == 0
+    retry_after, state = ALGORITHMS["gcra"].step(state, 0.0, 10, 60.0)
+    assert retry_after == pytest.approx(6.0)
+    assert ALGORITHMS["gcra"].step(state, 6.0, 10, 60.0)[0] == 0
+
+
+def test_sliding_window_retry_after_is_when_a_request_fits():
+    state = None
+    for _ in range(10):
+        retry_after, state = ALGORITHMS["sliding_window"].step(state, 30.0, 10, 60.0)
+    retry_after, _ = ALGORITHMS["sliding_window"].step(state, 30.0, 10, 60.0)
+    # the next window starts at 60; at 66 the previous 10 count for 9
+    assert retry_after == pytest.approx(36.0)
+    assert ALGORITHMS["sliding_window"].step(state, 30.0 + retry_after, 10, 60.0)[0] == 0
+    assert ALGORITHMS["sliding_window"].step(state, 29.0 + retry_after, 10, 60.0)[0] > 0
+
+
+def test_memory_backend_expires_idle_clients():
+    clock = FakeClock()
+    backend = MemoryBackend(shards=1, clock=clock)
+    for i in range(100):
+        backend.check_now(f"client{i}", 5, 10.0)
+    assert len(backend) == 100
+    clock.now += 10.0
+    for i in range(60):
+        backend.check_now("active", 5, 10.0)
+    assert len(backend) == 1
+
+    sharded = MemoryBackend(shards=8, clock=clock)
+    for i in range(100):
+        sharded.check_now(f"client{i}", 5, 10.0, "sliding_window")
+    clock.now += 15.0
+    sharded.sweep()
+    assert len(sharded) == 100  # sliding windows stay relevant for 2 periods
+    clock.now += 5.0
+    sharded.sweep()
+    assert len(sharded) == 0
+
+
+def test_policies():
+    assert parse_policy("5/minute") == (5, 60.0, None)
+    assert parse_policy("100/10s") == (100, 10.0, None)
+    assert parse_policy("3/2 hours") == (3, 7200.0, None)
+    assert parse_policy({"limit": 2, "period": 1, "algorithm": "sliding_window"}).algorithm == "sliding_window"
+    for bad in ("5", "0/minute", "5/fortnight", {"limit": 1, "period": 1, "algorithm": "nope"}):
+        with pytest.raises(ValueError):
+            parse_policy(bad)
+
+    table = PolicyTable({
+        "/qa": {"default": "5/minute", "keys": {"key:a": "100/minute"}},
+        "*": {"keys": {"key:a": "1/second", "ip:1.2.3.4": "1000/hour"}},
+    })
+    fallback = parse_policy("1/day")
+    assert table.lookup("/qa", "key:a", fallback).limit == 100
+    assert table.lookup("/qa", "ip:1.2.3.4", fallback).limit == 1000
+    assert table.lookup("/qa", "key:b", fallback).limit == 5
+    assert table.lookup("/other", "key:a", fallback).limit == 1
+    assert table.lookup("/other", "key:b", fallback) == fallback
+
+
+def test_policies_from_env(monkeypatch, tmp_path):
+    path = tmp_path / "policies.json"
+    path.write_text('{"/qa": {"default": "7/minute"}}')
+    monkeypatch.setenv("RATE_LIMIT_POLICIES", str(path))
+    assert PolicyTable.from_env().defaults["/qa"].limit == 7
+    monkeypatch.setenv("RATE_LIMIT_POLICIES", '{"/x": {"default": "1/s"}}')
+    assert PolicyTable.from_env().defaults["/x"].period == 1.0
+
+
+@pytest.mark.parametrize("make", [
+    lambda tmp, clock: MemoryBackend(clock=clock),
+    lambda tmp, clock: SharedMemoryBackend(str(tmp / "rl"), slots=256, stripe_slots=16, clock=clock),
+])
+@pytest.mark.parametrize("algorithm", sorted(ALGORITHMS))
+def test_backends_limit_each_key_separately(tmp_path, make, algorithm):
+    clock = FakeClock(1200.0)
+    backend = make(tmp_path, clock)
+    results = [backend.check_now("a", 3, 10.0, algorithm) for _ in range(4)]
+    assert results[:3] == [0, 0, 0] and results[3] > 0
+    assert backend.check_now("b", 3, 10.0, algorithm) == 0
+    clock.now += 20.0
+    assert asyncio.run(backend.check("a", 3, 10.0, algorithm)) == 0
+
+
+def test_shared_backend_reuses_idle_and_oldest_slots(tmp_path):
+    clock = FakeClock()
+    backend = SharedMemoryBackend(str(tmp_path / "rl"), slots=4, stripe_slots=4, probes=4, clock=clock)
+    for i in range(4):
+        clock.now += 1
+        assert backend.check_now(f"k{i}", 1, 100.0) == 0
+    # table full: k4 takes over the least recently used slot (k0's)
+    assert backend.check_now("k4", 1, 100.0) == 0
+    assert backend.check_now("k4", 1, 100.0) > 0
+    assert backend.check_now("k1", 1, 100.0) > 0
+    assert backend.check_now("k0", 1, 100.0) == 0
+
+
+def _worker(path, n, out):
+    backend = SharedMemoryBackend(path, slots=256, stripe_slots=16)
+    out.put(sum(backend.check_now("shared-key", 50, 3600.0) == 0 for _ in range(n)))
+
+
+def test_shared_backend_is_one_limit_across_processes(tmp_path):
+    out = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_worker, args=(str(tmp_path / "rl"), 40, out)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    allowed = sum(out.get(timeout=30) for _ in procs)
+    for p in procs:
+        p.join()
+    assert allowed == 50
+
+
+def test_make_backend(monkeypatch, tmp_path):
+    monkeypatch.delenv("RATE_LIMIT_BACKEND", raising=False)
+    assert isinstance(rate_limit.make_backend(), MemoryBackend)
+    monkeypatch.setenv("RATE_LIMIT_SHM_PATH", str(tmp_path / "rl"))
+    assert isinstance(rate_limit.make_backend("shared"), SharedMemoryBackend)
+    with pytest.raises(ValueError):
+        rate_limit.make_backend("bogus")
+
+
+def test_forwarded_for_is_only_believed_from_trusted_proxies(monkeypatch):
+    from starlette.requests import Request
+
+    def client_of(peer, forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        request = Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+        return asyncio.run(rate_limit.default_identifier(request))
+
+    monkeypatch.delenv("TRUSTED_PROXIES", raising=False)
+    # anyone can send the header, so it cannot pick the bucket
+    assert client_of("203.0.113.9", "1.2.3.4") == "ip:203.0.113.9"
+
+    monkeypatch.setenv("TRUSTED_PROXIES", "10.0.0.0/8, 192.168.1.1")
+    assert client_of("203.0.113.9", "1.2.3.4") == "ip:203.0.113.9"
+    assert client_of("10.1.2.3", "1.2.3.4") == "ip:1.2.3.4"
+    # a spoofed first entry is skipped: the last untrusted hop is the client
+    assert client_of("10.1.2.3", "6.6.6.6, 1.2.3.4, 192.168.1.1") == "ip:1.2.3.4"
+    assert client_of("10.1.2.3") == "ip:10.1.2.3"
@@ -0,0 +1,278 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import asyncio
+import math
+
+import pytest
+from redis.exceptions import NoScriptError, ResponseError
+
+from src import rate_limit
+from src.rate_limit import ALGORITHMS, RedisBackend
+
+try:
+    from lupa import lua51
+except ImportError:  # the script is then emulated with the Python steps
+    lua51 = None
+
+
+class StandInRedis:
+    """Enough of `redis.asyncio.Redis` for `RedisBackend`, in process.
+
+    With lupa installed `REDIS_SCRIPT` itself runs (on Lua 5.1, as in
+    Redis); otherwise each call runs the matching Python step function.
+    `round_trips` counts requests that would cross the network.
+    """
+
+    def __init__(self, now=1000.0, rtt=0.0):
+        self.now = now
+        self.rtt = rtt
+        self.data = {}
+        self.scripts = {}
+        self.round_trips = 0
+        self.lua = None
+        if lua51 is not None:
+            self.lua = lua51.LuaRuntime(unpack_returned_tuples=True)
+            self.lua.execute("redis = {error_reply = function(msg) return {err = msg} end}")
+            self.lua.globals().redis.call = self._call
+
+    def _call(self, command, *args):
+        if command == "TIME":
+            micros = round(self.now * 1e6)
+            return self.lua.table(str(micros // 1000000), str(micros % 1000000))
+        if command == "GET":
+            value = self.data.get(args[0])
+            return False if value is None else value
+        if command == "SET":
+            self.data[args[0]] = args[1]
+            return "OK"
+        raise ValueError(command)
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        if self.rtt:
+            await asyncio.sleep(self.rtt)
+
+    async def script_load(self, script):
+        await self._round_trip()
+        self.scripts["sha"] = self.lua.compile(script) if self.lua else script
+        return "sha"
+
+    def _eval(self, sha, numkeys, key, limit, period, algorithm):
+        if sha not in self.scripts:
+            return NoScriptError("NOSCRIPT No matching script.")
+        if self.lua is None:
+            if algorithm not in ALGORITHMS:
+                return ResponseError("unknown rate limit algorithm " + algorithm)
+            raw = self.data.get(key)
+            state = tuple(float(v) for v in raw.split()) if raw else None
+            retry_after, state = ALGORITHMS[algorithm].step(state, self.now, int(limit), float(period))
+            if retry_after == 0 or algorithm == "token_bucket":
+                self.data[key] = " ".join(repr(v) for v in state)
+            return repr(retry_after)
+        self.lua.globals().KEYS = self.lua.table(key)
+        self.lua.globals().ARGV = self.lua.table(limit, period, algorithm)
+        result = self.scripts[sha]()
+        if not isinstance(result, str):
+            return ResponseError(result["err"])
+        return result
+
+    async def evalsha(self, sha, numkeys, *args):
+        await self._round_trip()
+        result = self._eval(sha, numkeys, *args)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def pipeline(self, transaction=True):
+        return StandInPipeline(self)
+
+
+class StandInPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def evalsha(self, sha, numkeys, *args):
+        self.commands.append((sha, numkeys) + args)
+
+    async def execute(self, raise_on_error=True):
+        await self.redis._round_trip()
+        return [self.redis._eval(*command) for command in self.commands]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_each_check_is_one_script_call():
+    redis = StandInRedis()
+    backend = RedisBackend(client=redis, local_cache_ttl=0)
+
+    async def checks():
+        return [await backend.check("k", 2, 60.0, "fixed_window") for _ in range(3)]
+
+    results = run(checks())
+    assert results[:2] == [0, 0]
+    assert results[2] == pytest.approx(20.0)  # window 16 ends at 1020
+    assert redis.round_trips == 1 + 3  # script load, then one call per check
+
+
+@pytest.mark.parametrize("algorithm", sorted(ALGORITHMS))
+def test_script_matches_the_python_steps(algorithm):
+    redis = StandInRedis(now=1000.0)
+    backend = RedisBackend(client=redis, local_cache_ttl=0)
+    times = [1000.0 + i * 0.7 for i in range(120)]
+
+    async def checks():
+        results = []
+        for now in times:
+            redis.now = now
+            results.append(await backend.check("k", 10, 60.0, algorithm))
+        return results
+
+    state, expected = None, []
+    for now in times:
+        retry_after, state = ALGORITHMS[algorithm].step(state, now, 10, 60.0)
+        expected.append(retry_after)
+    assert run(checks()) == pytest.approx(expected, abs=1e-5)
+
+
+@pytest.mark.skipif(lua51 is None, reason="needs lupa to run the Lua script")
+def test_script_sets_the_idle_expiry_and_rejects_unknown_algorithms():
+    redis = StandInRedis()
+    redis.lua.execute("""
+        local call = redis.call
+        redis.call = function(...)
+          local args = {...}
+          if args[1] == 'SET' then last_px = args[5] end
+          return call(...)
+        end
+    """)
+    backend = RedisBackend(client=redis)
+    run(backend.check("k", 5, 60.0, "sliding_window"))
+    assert redis.lua.globals().last_px == 120000
+    with pytest.raises(ResponseError):
+        run(backend._evalsha(("k", "5", "60.0", "bogus")))
+
+
+def test_rejected_clients_are_answered_locally():
+    redis = StandInRedis()
+    clock = [0.0]
+    backend = RedisBackend(client=redis, local_cache_ttl=1.0, clock=lambda: clock[0])
+
+    async def checks():
+        results = [await backend.check("k", 1, 60.0, "gcra") for _ in range(50)]
+        clock[0] = 1.5  # the cached rejection expires, Redis is asked again
+        results.append(await backend.check("k", 1, 60.0, "gcra"))
+        return results
+
+    results = run(checks())
+    assert results[0] == 0
+    assert all(r > 0 for r in results[1:])
+    assert results[2] == pytest.approx(1.0)  # until the cache entry expires
+    assert backend.local_rejects == 48
+    assert redis.round_trips == 1 + 3
+    # a client under its limit is never cached
+    assert run(backend.check("other", 1, 60.0, "gcra")) == 0
+    assert "other" not in backend._over_limit
+
+
+def test_concurrent_checks_share_one_pipeline_round_trip():
+    redis = StandInRedis(rtt=0.01)
+    backend = RedisBackend(client=redis)
+
+    async def burst():
+        await backend.check("warm", 5, 60.0)  # loads the script
+        redis.round_trips = 0
+        return await asyncio.gather(*(backend.check(f"client{i % 10}", 5, 60.0) for i in range(100)))
+
+    results = run(burst())
+    assert redis.round_trips == 1
+    assert sum(r == 0 for r in results) == 50  # 5 per client
+
+
+def test_checks_arriving_during_a_round_trip_go_out_together_next():
+    redis = StandInRedis(rtt=0.05)
+    backend = RedisBackend(client=redis)
+
+    async def staggered(i):
+        await asyncio.sleep(0.002 * i)  # each arrives in its own loop iteration
+        return await backend.check(f"client{i}", 5, 60.0)
+
+    async def load():
+        await backend.check("warm", 5, 60.0)  # loads the script
+        redis.round_trips = 0
+        return await asyncio.gather(*(staggered(i) for i in range(10)))
+
+    assert run(load()) == [0] * 10
+    # the first check goes alone; the nine queued behind it share the next pipeline
+    assert redis.round_trips == 2
+
+
+def test_a_cancelled_check_does_not_fail_the_rest_of_its_batch():
+    redis = StandInRedis(rtt=0.01)
+    backend = RedisBackend(client=redis)
+
+    async def load():
+        await backend.check("warm", 5, 60.0)
+        # one check is in flight and six queue behind it
+        lead = asyncio.ensure_future(backend.check("lead", 5, 60.0))
+        await asyncio.sleep(0.002)
+        tasks = [asyncio.ensure_future(backend.check(f"client{i}", 5, 60.0)) for i in range(6)]
+        await asyncio.sleep(0.002)
+        tasks[2].cancel()  # its client disconnected
+        first = await asyncio.gather(*tasks, return_exceptions=True)
+        await lead
+        # and while the pipeline itself is in flight
+        tasks = [asyncio.ensure_future(backend.check(f"other{i}", 5, 60.0)) for i in range(4)]
+        await asyncio.sleep(0.001)
+        tasks[1].cancel()
+        second = await asyncio.gather(*tasks, return_exceptions=True)
+        return first, second
+
+    first, second = run(load())
+    assert isinstance(first[2], asyncio.CancelledError)
+    assert [r for i, r in enumerate(first) if i != 2] == [0.0] * 5
+    assert isinstance(second[1], asyncio.CancelledError)
+    assert [r for i, r in enumerate(second) if i != 1] == [0.0] * 3
+    assert "rate-limit:client2" not in redis.data  # the queued, cancelled check was never sent
+
+
+def test_local_rejections_are_bounded():
+    redis = StandInRedis()
+    backend = RedisBackend(client=redis, local_cache_size=3, clock=lambda: 0.0)
+
+    async def checks():
+        for i in range(5):
+            await backend.check(f"k{i}", 1, 60.0, "gcra")
+            await backend.check(f"k{i}", 1, 60.0, "gcra")  # rejected, cached
+
+    run(checks())
+    assert list(backend._over_limit) == ["k2", "k3", "k4"]
+
+
+def test_script_is_reloaded_after_a_server_flush():
+    redis = StandInRedis()
+    backend = RedisBackend(client=redis)
+
+    async def checks():
+        await backend.check("a", 5, 60.0)
+        redis.scripts.clear()
+        single = await backend.check("a", 5, 60.0)
+        redis.scripts.clear()
+        batch = await asyncio.gather(backend.check("a", 5, 60.0), backend.check("b", 5, 60.0))
+        return [single] + batch
+
+    assert run(checks()) == [0, 0, 0]
+    assert len(redis.data) == 2
+
+
+def test_make_backend_reads_the_local_cache_ttl(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_LOCAL_CACHE_TTL", "0.5")
+    backend = rate_limit.make_backend("redis")
+    assert backend.local_cache_ttl == 0.5
+    backend.client = StandInRedis()
+    retry = [run(backend.check("k", 3, 60.0, "gcra")) for _ in range(4)]
+    assert retry[:3] == [0, 0, 0] and math.isclose(retry[3], 20.0, abs_tol=1e-5)
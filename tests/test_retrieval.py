@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import types
+
+import pytest
+
+from src.bm25 import BM25Index
+from src import retrieval
+
+
+def doc(text):
+    return types.SimpleNamespace(page_content=text, metadata={})
+
+
+class FakeVectorStore:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = 0
+
+    def similarity_search(self, query, k=4):
+        self.calls += 1
+        return self.docs[:k]
+
+    def as_retriever(self, search_kwargs=None):
+        return ("vector-retriever", search_kwargs)
+
+
+def test_get_retrieval_mode(monkeypatch):
+    monkeypatch.delenv("RAG_RETRIEVAL_MODE", raising=False)
+    assert retrieval.get_retrieval_mode() == "vector"
+    monkeypatch.setenv("RAG_RETRIEVAL_MODE", " Hybrid ")
+    assert retrieval.get_retrieval_mode() == "hybrid"
+    with pytest.raises(ValueError):
+        retrieval.get_retrieval_mode("fuzzy")
+
+
+def test_retrieve_modes():
+    docs = [doc("semantic neighbour"), doc("order number 12345"), doc("unrelated")]
+    store = FakeVectorStore([docs[0], docs[2]])
+    index = BM25Index.from_documents(docs)
+
+    assert retrieval.retrieve("12345", "bm25", bm25_index=index, k=1) == [docs[1]]
+    assert store.calls == 0
+    assert retrieval.retrieve("12345", "vector", vector_store=store, bm25_index=index, k=1) == [docs[0]]
+    hybrid = retrieval.retrieve("12345", "hybrid", vector_store=store, bm25_index=index, k=2)
+    assert docs[1] in hybrid and docs[0] in hybrid
+    # hybrid falls back to whichever index exists
+    assert retrieval.retrieve("12345", "hybrid", bm25_index=index, k=1) == [docs[1]]
+
+
+def test_make_retriever():
+    store = FakeVectorStore([doc("v")])
+    assert retrieval.make_retriever("vector", vector_store=store, k=3) == ("vector-retriever", {"k": 3})
+
+    index = BM25Index.from_documents([doc("keyword match"), doc("other")])
+    retriever = retrieval.make_retriever("bm25", bm25_index=index, k=1)
+    assert [d.page_content for d in retriever.invoke("keyword")] == ["keyword match"]
+
+
+def test_batch_retrieve_matches_retrieve_per_query():
+    docs = [doc("semantic neighbour"), doc("order number 12345"), doc("unrelated")]
+    bm25 = BM25Index.from_documents(docs)
+    store = FakeVectorStore(docs)
+    queries = ["order 12345", "neighbour"]
+    for mode in retrieval.RETRIEVAL_MODES:
+        expected = [retrieval.retrieve(q, mode, vector_store=store, bm25_index=bm25, k=2) for q in queries]
+        assert retrieval.batch_retrieve(queries, mode, vector_store=store, bm25_index=bm25, k=2) == expected
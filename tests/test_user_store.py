@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pydantic import BaseModel
+
+from src.user_store import UserStore
+
+
+class User(BaseModel):
+    name: str
+    age: int
+
+
+def test_case_insensitive_lookup_prefers_the_first_created():
+    store = UserStore(User)
+    store.put(User(name="Ann", age=1))
+    store.put(User(name="ANN", age=2))
+    store.put(User(name="Straße", age=3))
+    assert store.find("aNN").age == 1
+    assert store.get("ANN").age == 2 and store.get("ann") is None
+    assert store.find("STRASSE").age == 3  # casefold, not lower
+    assert store.find("bob") is None
+    store.put(User(name="Ann", age=10))  # replacing keeps its place
+    assert store.find("ann").age == 10 and len(store) == 3
+
+
+def test_bulk_create_and_pages_in_creation_order():
+    store = UserStore(User)
+    assert store.put_many(User(name=f"u{i}", age=i) for i in range(25)) == 25
+    assert [u.age for u in store.page(0, 10)] == list(range(10))
+    assert [u.age for u in store.page(20, 10)] == list(range(20, 25))
+    assert store.page(30, 10) == []
+
+
+def test_persists_and_replays(tmp_path):
+    path = str(tmp_path / "users.jsonl")
+    store = UserStore(User, path=path)
+    store.put_many([User(name="a", age=1), User(name="B", age=2)])
+    store.put(User(name="a", age=3))
+    store.close()
+
+    with open(path, "ab") as f:
+        f.write(b'{"name": "half-writ')  # crash mid-write
+    store = UserStore(User, path=path)
+    assert store.find("b").age == 2 and store.get("a").age == 3
+    assert [u.name for u in store.page()] == ["a", "B"]
+    store.put(User(name="c", age=4))
+    store.close()
+    assert UserStore(User, path=path).get("c").age == 4
+
+
+def test_compaction_rewrites_one_line_per_user(tmp_path):
+    path = tmp_path / "users.jsonl"
+    store = UserStore(User, path=str(path), compact_min=10)
+    for age in range(30):
+        store.put(User(name=f"u{age % 5}", age=age))
+    # compacted whenever the file reached twice the users (and 10 lines)
+    assert len(path.read_text().splitlines()) < 10
+    store.compact()
+    assert len(path.read_text().splitlines()) == 5
+    store.close()
+    assert [u.age for u in UserStore(User, path=str(path)).page()] == [25, 26, 27, 28, 29]